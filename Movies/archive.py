@@ -0,0 +1,258 @@
+import datetime, glob, gzip, json, os, queue, sqlite3, threading, time
+from itemadapter import ItemAdapter
+from scrapy.exceptions import NotConfigured
+
+
+def encode_item(item):
+    """
+    Returns the fields of an item as one JSON line (dates in ISO format).
+    """
+
+    return json.dumps(ItemAdapter(item).asdict(), ensure_ascii=False,
+                      default=str) + '\n'
+
+def decode_item(line: str):
+    """
+    Returns the raw item fields of a JSON line (see `encode_item`).
+
+    The JSON-LD release date is changed back into a `datetime.date`.
+    """
+
+    # DECODING PROCESS
+    raw = json.loads(line)
+    structured = raw.get('structured') or {}
+    if structured.get('release_date'):
+        structured['release_date'] = datetime.date.fromisoformat(
+            structured['release_date'])
+
+    # FUNCTION OUTPUT
+    return raw
+
+
+class ArchiveWriter:
+    """
+    Appends raw items to a compressed archive from a background thread.
+
+    The archive is a directory of segments (`raw-00001.jsonl.gz`, etc.)
+    holding one item per JSON line. Items are queued by the crawling thread
+    and written by batches (`batch_size` items or items queued for `interval`
+    seconds), each batch being one gzip member appended to the current
+    segment, so that segments are regular gzip files. A new segment is
+    started once the current one reaches `segment_size` bytes.
+
+    The position of each item (segment, member offset and size, line within
+    the member) is saved in the `index.db` SQLite file of the archive, by
+    allocine movie id (the last archived version of a movie wins). Items
+    without an id are archived but not indexed (they can only be streamed).
+    """
+
+    def __init__(self, directory: str, segment_size: int = 64 * 1024**2,
+                 batch_size: int = 100, interval: float = 5,
+                 queue_size: int = 10000):
+        # BASIC SETTINGS & INITIALIZATION
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_size = segment_size
+        self.batch_size = batch_size
+        self.interval = interval
+        self.genre = None               # Spider vocabulary (see `reclean`)
+        self.error = None               # Exception raised by the writer
+
+        # WRITER THREAD (fed through a bounded queue, None means `close`)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def write(self, allocine_id: int, line: str):
+        """Queues one raw item (see `encode_item`) to be archived."""
+
+        if self.error:
+            raise self.error
+        self.queue.put((allocine_id, line))
+
+    def close(self):
+        """Writes all the queued items then stops the writer thread."""
+
+        self.queue.put(None)
+        self.thread.join()
+        if self.error:
+            raise self.error
+
+    # WRITER THREAD METHODS
+    def run(self):
+        # CONNECTION (SQLite objects can only be used by their own thread)
+        index = connect_index(self.directory)
+
+        # WRITING PROCESS (a batch is written once full, once its 1st item
+        # waited for `interval` seconds or on closing)
+        batch, entry = [], ()
+        try:
+            while entry is not None:
+                try:
+                    wait = deadline - time.monotonic() if batch else None
+                    entry = self.queue.get(timeout=max(wait, 0) if batch
+                                           else None)
+                except queue.Empty:
+                    entry = ()
+                if entry and not batch:
+                    deadline = time.monotonic() + self.interval
+                batch += [entry] if entry else []
+                if batch and (len(batch) >= self.batch_size or not entry):
+                    self.flush(index, batch)
+                    batch = []
+        except Exception as error:
+            self.error = error
+        finally:
+            index.close()
+
+    def flush(self, index, batch: list):
+        """
+        Appends a batch of items to the current segment and indexes them.
+        """
+
+        # BASIC SETTINGS & INITIALIZATION
+        member = gzip.compress(''.join(x for _, x in batch).encode())
+        segments = sorted(glob.glob(os.path.join(self.directory, 'raw-*')))
+        path = segments[-1] if segments else None
+        if not path or os.path.getsize(path) >= self.segment_size:
+            path = os.path.join(self.directory,
+                                f'raw-{len(segments) + 1:05d}.jsonl.gz')
+
+        # WRITING PROCESS
+        with open(path, 'ab') as file:
+            offset = file.tell()
+            file.write(member)
+
+        # INDEXING PROCESS (a NULL primary key would be given a random id)
+        segment = os.path.basename(path)
+        with index:
+            index.executemany(
+                "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?)",
+                ((allocine_id, segment, offset, len(member), line)
+                 for line, (allocine_id, _) in enumerate(batch)
+                 if allocine_id is not None))
+            if self.genre:
+                index.execute("INSERT OR REPLACE INTO meta VALUES "
+                              "('genre', ?)", (self.genre,))
+
+
+class ArchiveReader:
+    """
+    Reads raw items of an archive (see `ArchiveWriter`).
+
+    Items are either streamed (i.e. read segment after segment, in the order
+    they were archived) or read one by one by allocine movie id.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.index = connect_index(directory)
+
+    def __iter__(self):
+        # STREAMING PROCESS (gzip members of a segment are read as a whole)
+        pattern = os.path.join(self.directory, 'raw-*.jsonl.gz')
+        for path in sorted(glob.glob(pattern)):
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                for line in file:
+                    yield decode_item(line)
+
+    def get(self, allocine_id: int):
+        """Returns the raw item of a movie (None if not archived)."""
+
+        # BASIC SETTINGS & INITIALIZATION
+        row = self.index.execute(
+            "SELECT segment, offset, size, line FROM items "
+            "WHERE allocine_id = ?", (allocine_id,)).fetchone()
+        if not row:
+            return None
+
+        # READING PROCESS (only the gzip member of the item is decompressed)
+        segment, offset, size, line = row
+        with open(os.path.join(self.directory, segment), 'rb') as file:
+            file.seek(offset)
+            member = gzip.decompress(file.read(size))
+
+        # FUNCTION OUTPUT (JSON lines may hold other line breaks, ex: U+2028)
+        return decode_item(member.decode().split('\n')[line])
+
+    def vocabulary(self):
+        """Returns the spider genres vocabulary of the crawl (or None)."""
+
+        row = self.index.execute(
+            "SELECT value FROM meta WHERE key = 'genre'").fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        self.index.close()
+
+
+def connect_index(directory: str):
+    """
+    Returns a connection to the index of an archive (created if required).
+    """
+
+    # CONNECTION
+    index = sqlite3.connect(os.path.join(directory, 'index.db'))
+    index.execute("PRAGMA journal_mode=WAL")
+
+    # CREATES THE INDEX TABLES IF REQUIRED
+    index.executescript("""
+        CREATE TABLE IF NOT EXISTS items (
+            allocine_id INTEGER PRIMARY KEY,
+            segment TEXT NOT NULL,
+            offset INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            line INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT);""")
+
+    # FUNCTION OUTPUT
+    return index
+
+
+# IMPLEMENTING THE `ARCHIVE PIPELINE` (raw items saved before any cleaning)
+class RawItemArchivePipeline:
+    """
+    Archives the raw fields of each item (see `ArchiveWriter`).
+
+    The archive is a cheap source of truth: stored items can be cleaned again
+    at any time without crawling allocine again (see `Movies.reclean`). The
+    pipeline must run before `MovieScraperPipeline`, which cleans items in
+    place. Items are encoded on the spot but compressed and written by a
+    background thread. Disabled if the `ARCHIVE_DIR` setting is empty.
+    """
+
+    def __init__(self, directory: str, segment_size: int):
+        self.directory = directory
+        self.segment_size = segment_size
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        # BASIC SETTINGS & INITIALIZATION
+        directory = crawler.settings.get('ARCHIVE_DIR')
+        if not directory:
+            raise NotConfigured
+
+        # FUNCTION OUTPUT
+        return cls(directory, crawler.settings.getint('ARCHIVE_SEGMENT_SIZE'))
+
+    def open_spider(self, spider):
+        self.writer = ArchiveWriter(self.directory, self.segment_size)
+        self.stats = getattr(getattr(spider, 'crawler', None), 'stats', None)
+
+    def process_item(self, item, spider):
+        # SPIDER VOCABULARY (required to clean items again, see `reclean`)
+        self.writer.genre = self.writer.genre or getattr(spider, 'genre', None)
+
+        # ARCHIVING PROCESS (the item is encoded before being cleaned)
+        allocine_id = ItemAdapter(item).get('allocine_id')
+        self.writer.write(allocine_id, encode_item(item))
+
+        # ITEMS THAT CANNOT BE READ BY ID (see `ArchiveWriter.flush`)
+        if allocine_id is None and self.stats is not None:
+            self.stats.inc_value('archive/unindexed')
+        return item
+
+    def close_spider(self, spider):
+        self.writer.close()
@@ -0,0 +1,160 @@
+import functools, pickle, sqlite3, uuid
+from scrapy import Request
+from scrapy.utils.request import request_from_dict
+
+
+class Checkpoint:
+    """
+    Crawl journal allowing to resume a crawl after any crash (even SIGKILL).
+
+    The journal is a SQLite database (WAL mode) holding the pending requests
+    (i.e. requests not processed yet, pickled with their `meta` hence with the
+    partially assembled movie items carried by casting requests) together
+    with the last snapshot of the spider state (see `spider.get_state`).
+
+    Each callback outcome is saved in one single transaction: new requests are
+    added, the processed request is removed and the spider state is replaced.
+    The journal is therefore always consistent, whenever the process dies. A
+    request whose callback yielded items is only removed once all its items
+    went through the item pipelines (see `item_done`), so that no item is lost
+    between its scraping and its saving.
+    """
+
+    def __init__(self, path: str):
+        # CONNECTION (autocommit mode, transactions are explicitly managed)
+        self.db = sqlite3.connect(path, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL") # Survives process kills
+
+        # CREATES THE JOURNAL TABLES IF REQUIRED
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS requests (
+                key TEXT PRIMARY KEY,
+                request BLOB NOT NULL);
+            CREATE TABLE IF NOT EXISTS state (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                state BLOB NOT NULL);""")
+
+        # ITEMS NOT SAVED YET PER REQUEST KEY (see `commit` and `item_done`)
+        self.waiting = {}
+
+    # RESUMING METHODS
+    def is_resumable(self):
+        """Returns True if the journal holds pending requests."""
+
+        return bool(self.db.execute("SELECT 1 FROM requests").fetchone())
+
+    def pending(self, spider):
+        """
+        Returns the pending requests (i.e. requests to issue on resuming).
+
+        Parameter(s):
+            spider (Spider): Spider the request callbacks belong to.
+        """
+
+        # REQUESTS ARE ISSUED IN THE VERY SAME ORDER THEY WERE FIRST YIELDED
+        rows = self.db.execute("SELECT request FROM requests ORDER BY rowid")
+        return [request_from_dict(pickle.loads(x), spider=spider)
+                for x, in rows]
+
+    def state(self):
+        """Returns the last snapshot of the spider state (empty if none)."""
+
+        row = self.db.execute("SELECT state FROM state").fetchone()
+        return pickle.loads(row[0]) if row else {}
+
+    # JOURNALING METHODS
+    def commit(self, spider, done, requests: list, items: int = 0):
+        """
+        Saves the outcome of a callback in one single transaction.
+
+        Parameter(s):
+            spider      (Spider): Spider whose state is to be saved.
+            done  (Request|None): Processed request. None for start requests.
+            requests      (list): New requests yielded by the callback.
+            items          (int): Number of items yielded by the callback.
+        """
+
+        # BASIC SETTINGS & INITIALIZATION (requests already journaled by a
+        # nested checkpointed callback are skipped)
+        key = done.meta.get('checkpoint_key') if done is not None else None
+        rows = []
+        for request in requests:
+            if 'checkpoint_key' in request.meta:
+                continue
+            request.meta['checkpoint_key'] = uuid.uuid4().hex
+            data = pickle.dumps(request.to_dict(spider=spider), protocol=4)
+            rows.append((request.meta['checkpoint_key'], data))
+        state = pickle.dumps(spider.get_state(), protocol=4)
+
+        # JOURNALING PROCESS (processed request kept until its items are saved)
+        with self.db:
+            self.db.execute("BEGIN")
+            self.db.executemany("INSERT OR REPLACE INTO requests "
+                                "VALUES (?, ?)", rows)
+            if key and items:
+                self.waiting[key] = self.waiting.get(key, 0) + items
+            elif key and not self.waiting.get(key):
+                self.db.execute("DELETE FROM requests WHERE key = ?", (key,))
+            self.db.execute("INSERT OR REPLACE INTO state VALUES (0, ?)",
+                            (state,))
+
+    def item_done(self, request):
+        """
+        Counts one item of a request as saved (or dropped).
+
+        Once all its items are done, the request is removed from the journal.
+
+        Parameter(s):
+            request (Request|None): Request the item was scraped from.
+        """
+
+        # BASIC SETTINGS & INITIALIZATION
+        key = request.meta.get('checkpoint_key') if request else None
+        if key not in self.waiting:
+            return
+
+        # COUNTING PROCESS
+        self.waiting[key] -= 1
+        if self.waiting[key] <= 0:
+            del self.waiting[key]
+            with self.db:
+                self.db.execute("DELETE FROM requests WHERE key = ?", (key,))
+
+    # HELPER METHODS
+    def clear(self):
+        """Empties the journal (ex: once the crawl is finished)."""
+
+        with self.db:
+            self.db.execute("BEGIN")
+            self.db.execute("DELETE FROM requests")
+            self.db.execute("DELETE FROM state")
+
+    def close(self):
+        self.db.close()
+
+
+def checkpointed(callback):
+    """
+    Decorates spider callbacks (and errbacks) so that they are journaled.
+
+    The callback output is collected, saved into the spider `journal` (if
+    any, see `Checkpoint.commit`) and only then handed over to scrapy.
+    """
+
+    @functools.wraps(callback)
+    def wrapper(spider, response_or_failure):
+        # CALLBACK OUTPUT (errbacks may not be generators)
+        output = list(callback(spider, response_or_failure) or ())
+
+        # JOURNALING PROCESS
+        if spider.journal is not None:
+            request = getattr(response_or_failure, 'request', None)
+            requests = [x for x in output if isinstance(x, Request)]
+            spider.journal.commit(spider, request, requests,
+                                  len(output) - len(requests))
+
+        # CALLBACK OUTPUT HANDED OVER TO SCRAPY
+        yield from output
+
+    return wrapper
@@ -0,0 +1,196 @@
+import datetime, json, regex as re
+from lxml import etree
+
+
+class MovieExtractor:
+    """
+    Declarative extraction of the raw data of a movie page.
+
+    Fields are specified as a (scope, path) pair where `scope` is the page
+    section the `path` is relative to. All paths are compiled only once (i.e.
+    when the class is defined) into `lxml.etree.XPath` objects. On extraction,
+    each scope is looked for once and each field path is then evaluated
+    against the matching subtrees only, instead of rescanning the whole page
+    for each field.
+
+    Extracted values are the same `¤` joined strings `MoviesItem` expects.
+    """
+
+    # PAGE SECTIONS WHERE FIELDS ARE LOOKED FOR (None means the whole page)
+    scopes = {
+        'page': None,
+        'meta': "//div[contains(@class, 'card') and contains(@class, 'entity')]",
+        'tech': "//section[contains(@class, 'technical')]"}
+
+    # FIELDS SPECIFICATION (field: (scope, path relative to the scope))
+    fields = {
+        'title': ('meta', ".//div[@class='meta-body-item']//text()"),
+        'ratings': ('meta', ".//div[contains(@class, 'rating')]//text()"),
+        'title_fr': ('page', "//h1//text()"),
+        'synopsis': ('page',
+                     "//section[starts-with(@id, 'synopsis')]//p//text()"),
+        'creators': ('meta', ".//div[contains(@class, 'oneline')]//text()"),
+        'metadata': ('meta', ".//div[contains(@class, 'info')]//text()"),
+        'tech_data': ('tech', ".//div[@class='item']//text()"),
+        'tech_headers': ('tech', ".//span[contains(@class, 'light')]//text()"),
+        'film_poster': ('meta', ".//figure//img/@src")}
+
+    # EMBEDDED STRUCTURED DATA (JSON-LD `Movie` object)
+    jsonld = etree.XPath("//script[@type='application/ld+json']/text()")
+
+    # CASTING SECTION OF THE CASTING PAGE (see `extract_casting`)
+    casting = etree.XPath("//section[contains(@class, 'casting-actor')]")
+
+    # COMPILED VERSIONS OF THE ABOVE PATHS
+    compiled_scopes = {scope: etree.XPath(path) if path else None
+                       for scope, path in scopes.items()}
+    compiled_fields = {field: (scope, etree.XPath(path))
+                       for field, (scope, path) in fields.items()}
+
+    def extract(self, root):
+        """
+        Extracts all specified fields from a page. Returns a dictionary.
+
+        Parameter(s):
+            root (lxml.html.HtmlElement): Root of the parsed page. For a scrapy
+                                          response: `response.selector.root`
+        """
+
+        # LOOKS FOR EACH SCOPE ONLY ONCE
+        subtrees = {scope: self.get_subtrees(root, path)
+                    for scope, path in self.compiled_scopes.items()}
+
+        # EXTRACTION PROCESS (field values are joined with the '¤' separator)
+        data = {}
+        for field, (scope, path) in self.compiled_fields.items():
+            values = [value for tree in subtrees[scope] for value in path(tree)]
+            data[field] = "¤".join(values)
+
+        # FUNCTION OUTPUT
+        return data
+
+    def extract_structured(self, root):
+        """
+        Extracts movie data from the embedded JSON-LD. Returns a dictionary.
+
+        Allocine movie pages embed a schema.org `Movie` object. The fields it
+        provides are returned already clean (i.e. in the very same format as
+        the one `MovieScraperPipeline` produces) so that the related cleaning
+        stages can be skipped. Missing fields are simply not in the result,
+        which is empty if the page holds no (valid) JSON-LD at all.
+
+        Parameter(s):
+            root (lxml.html.HtmlElement): Root of the parsed page.
+        """
+
+        # BASIC SETTINGS & INITIALIZATION
+        movie, data = self.get_jsonld_movie(root), {}
+        names = lambda x: [y.get('name') if isinstance(y, dict) else y
+                           for y in (x if isinstance(x, list) else [x])]
+
+        # RELEASE DATE (ISO formatted in JSON-LD)
+        date = re.match(r'\d{4}-\d{2}-\d{2}', movie.get('datePublished') or '')
+        try:
+            date = datetime.date.fromisoformat(date.group()) if date else None
+        except ValueError:
+            date = None
+        if date:
+            data['release_date'] = date
+
+        # RUNTIME (ISO 8601 duration, ex: 'PT1H56M')
+        time = re.fullmatch(r'PT(?:(\d+)H)?(?:(\d+)M)?(?:\d+S)?',
+                            movie.get('duration') or '')
+        if time and any(time.groups()):
+            hours, minutes = (int(x) if x else 0 for x in time.groups())
+            data['runtime_min'] = hours * 60 + minutes
+
+        # GENRES AND DIRECTORS
+        for field, key in (('categories', 'genre'), ('directors', 'director')):
+            values = [x for x in names(movie.get(key)) if isinstance(x, str)]
+            values = [value.strip() for value in values if value.strip()]
+            if values:
+                data[field] = "¤".join(dict.fromkeys(values))
+
+        # FUNCTION OUTPUT
+        return data
+
+    def extract_casting(self, root):
+        """
+        Extracts actors and their raw role from a casting page in one pass.
+
+        Casting sections are walked element by element. The text of any
+        element with a 'link' class is an actor name and the text of the next
+        element with a 'light' class is the role of the actors met since the
+        previous role (ex: actor cards and table rows). Actors without any
+        role afterwards get None. Names and roles are returned raw (i.e. they
+        are cleaned by `MovieScraperPipeline.clean_casting`).
+
+        Parameter(s):
+            root (lxml.html.HtmlElement): Root of the parsed casting page.
+
+        Returns: A dict of actors to roles (in page order, 1st role kept)
+        """
+
+        # BASIC SETTINGS & INITIALIZATION
+        casting, pending = {}, []
+        classes = lambda x: (x.get('class') or '').lower()
+
+        # WALKING PROCESS (comments and processing instructions skipped)
+        for section in self.get_subtrees(root, self.casting):
+            for element in section.iter(tag=etree.Element):
+                if 'light' in classes(element):
+                    casting.update((x, element.text or '') for x in pending)
+                    pending = []
+                if 'link' in classes(element) and element.text:
+                    if element.text not in casting:
+                        casting[element.text] = None
+                        pending.append(element.text)
+
+        # FUNCTION OUTPUT
+        return casting
+
+    def get_jsonld_movie(self, root):
+        """
+        Returns the first JSON-LD `Movie` object of a page (or an empty dict).
+        """
+
+        # LOOKS INTO EACH JSON-LD SCRIPT (invalid ones are ignored)
+        for script in self.jsonld(root):
+            try:
+                objects = json.loads(script)
+            except ValueError:
+                continue
+
+            # OBJECTS CAN BE GIVEN ALONE, AS A LIST OR INTO A `@graph`
+            objects = objects if isinstance(objects, list) else [objects]
+            objects += [y for x in objects if isinstance(x, dict)
+                        for y in x.get('@graph', [])]
+            for candidate in objects:
+                if isinstance(candidate, dict):
+                    if candidate.get('@type') == 'Movie':
+                        return candidate
+
+        # FUNCTION OUTPUT (no movie found)
+        return {}
+
+    def get_subtrees(self, root, path):
+        """
+        Returns the outermost elements matching the given scope path.
+
+        Nested matches are discarded as their content already belongs to their
+        matching ancestor (it would be extracted twice otherwise).
+
+        Parameter(s):
+            root            (HtmlElement): Root of the parsed page.
+            path (etree.XPath|None): Compiled scope path. None for whole page.
+        """
+
+        # WHOLE PAGE SCOPE
+        if path is None:
+            return [root]
+
+        # KEEPS OUTERMOST MATCHING ELEMENTS ONLY
+        matches = path(root)
+        found = set(matches)
+        is_nested = lambda x: any(y in found for y in x.iterancestors())
+        return [element for element in matches if not is_nested(element)]
@@ -0,0 +1,201 @@
+import sqlite3, time
+from contextlib import contextmanager
+
+
+class Frontier:
+    """
+    Listing pages frontier shared by several spider processes (i.e. workers).
+
+    The frontier is a SQLite database (WAL mode) so that workers running on
+    the same host can share it safely. Workers claim listing pages, process
+    them and acknowledge them once all their movies are done. A claimed page
+    which is not acknowledged within `lease` seconds (ex: its worker crashed)
+    can be claimed again by any worker. The movie budget (i.e. the spider
+    `limit`) is global and booked atomically by workers, page by page: the
+    movies booked for a page are given back to the budget whenever the page
+    is given back (i.e. released, claimed again or abandoned).
+
+    Page states: 'todo' (to be claimed), 'claimed', 'done' or 'failed' (page
+    whose download failed `attempts` times). Once a crawl is over (see
+    `seed`), the next one starts from scratch.
+    """
+
+    def __init__(self, path: str, worker: str, lease: int = 600,
+                 attempts: int = 3):
+        # BASIC SETTINGS & INITIALIZATION
+        self.worker = worker
+        self.lease = lease
+        self.attempts = attempts
+
+        # CONNECTION (autocommit mode, transactions are explicitly managed)
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+
+        # CREATES THE FRONTIER TABLES IF REQUIRED
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                page_id INTEGER PRIMARY KEY,
+                state TEXT NOT NULL DEFAULT 'todo',
+                worker TEXT,
+                claimed_at REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                booked INTEGER NOT NULL DEFAULT 0);
+            CREATE TABLE IF NOT EXISTS workers (
+                worker TEXT PRIMARY KEY,
+                items INTEGER,
+                seconds REAL,
+                items_per_second REAL,
+                updated_at REAL);""")
+
+        # FRONTIERS OF FORMER VERSIONS (global budget instead of bookings)
+        columns = [x[1] for x in self.db.execute("PRAGMA table_info(pages)")]
+        if 'booked' not in columns:
+            self.db.execute("ALTER TABLE pages ADD COLUMN "
+                            "booked INTEGER NOT NULL DEFAULT 0")
+
+    # LISTING PAGES MANAGEMENT
+    def seed(self, first: int, last: int, limit: int = None):
+        """
+        Adds the given range of listing pages (if not already in frontier).
+
+        If the previous crawl is over, i.e. no page is being processed (no
+        live lease) and either no page is left or the budget is used up, all
+        pages and the budget are reset first: a new crawl starts.
+
+        Parameter(s):
+            first (int): Id of the first listing page.
+            last  (int): Id of the last listing page.
+            limit (int): Global number of movies. None (or 0) if unlimited.
+        """
+
+        # BASIC SETTINGS & INITIALIZATION
+        pages = ((page,) for page in range(first, last + 1))
+        now = time.time()
+
+        # SEEDING PROCESS (atomic thanks to the `IMMEDIATE` transaction)
+        with self.transaction():
+            live, todo, used = self.db.execute(
+                "SELECT COUNT(CASE WHEN state = 'claimed' AND claimed_at >= ? "
+                "THEN 1 END), COUNT(CASE WHEN state IN ('todo', 'claimed') "
+                "THEN 1 END), COALESCE(SUM(booked), 0) FROM pages",
+                (now - self.lease,)).fetchone()
+            if not live and (not todo or (limit and used >= limit)):
+                self.db.execute("UPDATE pages SET state = 'todo', "
+                                "worker = NULL, claimed_at = NULL, "
+                                "attempts = 0, booked = 0")
+            self.db.executemany("INSERT OR IGNORE INTO pages (page_id) "
+                                "VALUES (?)", pages)
+
+    def claim(self, count: int = None):
+        """
+        Claims up to `count` pages (all available if None). Returns their ids.
+
+        Available pages are pages still to do and pages whose lease expired.
+        """
+
+        # BASIC SETTINGS & INITIALIZATION
+        now = time.time()
+        limit = -1 if count is None else count
+
+        # CLAIMING PROCESS (atomic thanks to the `IMMEDIATE` transaction)
+        with self.transaction():
+            pages = [page for page, in self.db.execute(
+                "SELECT page_id FROM pages WHERE state = 'todo' "
+                "OR (state = 'claimed' AND claimed_at < ?) "
+                "ORDER BY page_id LIMIT ?", (now - self.lease, limit))]
+            self.db.executemany(
+                "UPDATE pages SET state = 'claimed', worker = ?, "
+                "claimed_at = ?, booked = 0 WHERE page_id = ?",
+                ((self.worker, now, x) for x in pages))
+
+        # FUNCTION OUTPUT
+        return pages
+
+    def ack(self, page_id: int):
+        """Marks the given page as done."""
+
+        with self.transaction():
+            self.db.execute("UPDATE pages SET state = 'done' "
+                            "WHERE page_id = ?", (page_id,))
+
+    def release(self, page_id: int):
+        """
+        Gives a page back (ex: download failure). Fails it after `attempts`.
+        """
+
+        with self.transaction():
+            self.db.execute(
+                "UPDATE pages SET attempts = attempts + 1, worker = NULL, "
+                "booked = 0, state = CASE WHEN attempts + 1 >= ? "
+                "THEN 'failed' ELSE 'todo' END WHERE page_id = ?",
+                (self.attempts, page_id))
+
+    def abandon(self):
+        """
+        Gives back the pages still claimed by the worker (ex: on closing),
+        without waiting for their lease to expire.
+        """
+
+        with self.transaction():
+            self.db.execute("UPDATE pages SET state = 'todo', worker = NULL, "
+                            "booked = 0 WHERE state = 'claimed' "
+                            "AND worker = ?", (self.worker,))
+
+    # GLOBAL MOVIE BUDGET MANAGEMENT
+    def book(self, page_id: int, count: int, limit: int = None):
+        """
+        Books `count` movies out of the global `limit`. Returns number granted.
+
+        Parameter(s):
+            page_id (int): Id of the claimed page the movies are listed on.
+            count   (int): Number of movies to book.
+            limit   (int): Global number of movies. None (or 0) if unlimited.
+        """
+
+        # BOOKING PROCESS (atomic thanks to the `IMMEDIATE` transaction)
+        with self.transaction():
+            used = self.used()
+            granted = min(count, max(limit - used, 0)) if limit else count
+            self.db.execute("UPDATE pages SET booked = booked + ? "
+                            "WHERE page_id = ?", (granted, page_id))
+
+        # FUNCTION OUTPUT
+        return granted
+
+    def used(self):
+        """Returns the number of movies booked so far by all workers."""
+
+        return self.db.execute("SELECT COALESCE(SUM(booked), 0) "
+                               "FROM pages").fetchone()[0]
+
+    # WORKERS MONITORING
+    def report(self, items: int, seconds: float):
+        """Saves the throughput of the current worker."""
+
+        with self.transaction():
+            self.db.execute(
+                "INSERT OR REPLACE INTO workers VALUES (?, ?, ?, ?, ?)",
+                (self.worker, items, seconds,
+                 items / seconds if seconds else None, time.time()))
+
+    # HELPER METHODS
+    @contextmanager
+    def transaction(self):
+        """
+        Runs the `with` block into one write transaction (`BEGIN IMMEDIATE`).
+
+        The write lock is taken at the very beginning of the transaction so
+        that concurrent workers never read stale data they are about to write.
+        """
+
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+    def close(self):
+        self.db.close()
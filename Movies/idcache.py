@@ -0,0 +1,92 @@
+from collections import OrderedDict
+
+
+class IdCache:
+    """
+    Size bounded cache of database `Id` by full name (least recently used out).
+
+    Names resolved within the current transaction are kept aside until it is
+    committed: a rollback removes them from the cache since their rows may
+    not exist anymore. Hits and misses are counted for the crawl stats.
+    """
+
+    def __init__(self, size: int):
+        # CACHED IDS (most recently used last) + IDS OF THE OPEN TRANSACTION
+        self.size = size
+        self.ids = OrderedDict()
+        self.pending = set()
+        self.hits = self.misses = 0
+
+    # CACHING METHODS
+    def get(self, names):
+        """
+        Returns {name: `Id`} of cached names and the set of missing names.
+
+        Parameter(s):
+            names (iterable): Full names of people or companies.
+        """
+
+        # LOOKUP PROCESS (hits become the most recently used names)
+        found, missing = {}, set()
+        for name in names:
+            if name in self.ids:
+                self.ids.move_to_end(name)
+                found[name] = self.ids[name]
+            else:
+                missing.add(name)
+
+        # FUNCTION OUTPUT
+        self.hits += len(found)
+        self.misses += len(missing)
+        return found, missing
+
+    def update(self, ids: dict, pending: bool = True):
+        """
+        Caches {name: `Id`} then drops the least recently used names if full.
+
+        Parameter(s):
+            ids      (dict): Names and their `Id`.
+            pending  (bool): Whether ids belong to the open transaction.
+        """
+
+        # CACHING PROCESS
+        self.ids.update(ids)
+        if pending:
+            self.pending.update(ids)
+
+        # EVICTION PROCESS
+        while len(self.ids) > self.size:
+            self.pending.discard(self.ids.popitem(last=False)[0])
+
+    def warm(self, rows):
+        """
+        Caches (`Id`, name) rows (ex: a table scan) up to the cache size.
+
+        Parameter(s):
+            rows (iterable): Rows as (`Id`, full name) tuples.
+        """
+
+        for code_id, name in rows:
+            if len(self.ids) >= self.size:
+                break
+            self.ids[name] = code_id
+
+    # TRANSACTION METHODS
+    def commit(self):
+        """Keeps the ids of the transaction (i.e. their rows are saved)."""
+
+        self.pending.clear()
+
+    def rollback(self):
+        """Forgets the ids of the transaction (i.e. rows maybe not saved)."""
+
+        for name in self.pending:
+            self.ids.pop(name, None)
+        self.pending.clear()
+
+    # STATISTICS
+    def hit_rate(self):
+        """Returns the share of names found in cache (None if no lookup)."""
+
+        total = self.hits + self.misses
+        return round(self.hits / total, 4) if total else None
@@ -11,10 +11,12 @@ class MoviesItem(scrapy.Item):
     # name = scrapy.Field()
 
     # MOVIE
+    allocine_id = scrapy.Field()        # Scraped data (allocine movie id)
     title = scrapy.Field()              # Data scraped then cleaned in-place
     title_fr = scrapy.Field()           # Data scraped then cleaned in-place
     synopsis = scrapy.Field()           # Data scraped then cleaned in-place
     film_poster = scrapy.Field()        # Data scraped then cleaned in-place
+    structured = scrapy.Field()         # Scraped data (clean JSON-LD fields)
 
 
     # MOVIE CREATORS
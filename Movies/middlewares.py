@@ -3,10 +3,15 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import hashlib, sqlite3, time
+from collections import deque
 from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.utils.httpobj import urlparse_cached
 
 # useful for handling different item types with a single interface
 from itemadapter import is_item, ItemAdapter
+from Movies.spiders.movies_spider import movie_lost
 
 
 class MoviesSpiderMiddleware:
@@ -101,3 +106,415 @@ class MoviesDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class MovieValidatorCacheMiddleware:
+    """
+    Conditional re-fetch of movie pages according their HTTP validators.
+
+    For each allocine movie id, the `ETag` and `Last-Modified` headers as well
+    as a digest of the body of both the movie page and the casting page are
+    persisted (see `VALIDATOR_CACHE_FILE` setting). Movie pages are then
+    requested as conditional GETs and whenever allocine answers `304 Not
+    Modified` (or the page digest did not change) the request is ignored. The
+    movie is then neither parsed nor cleaned nor saved, and its casting page
+    is not even requested.
+
+    Validators of a movie are only saved once its item went through all item
+    pipelines (i.e. once saved), so that a crash, a dropped item or a lost
+    movie (see `movie_lost` signal) never leads to a movie being wrongly
+    considered as up to date on the next crawl.
+
+    The cache is a SQLite database (WAL mode) so that the workers of a
+    sharded crawl can share it safely (see `Frontier`).
+
+    Limit: casting pages are only requested for modified movie pages, hence
+    a casting modified alone goes unnoticed. Casting digests are only kept
+    for crawl stats (see `validator_cache/casting/hit`).
+    """
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        # MIDDLEWARE IS ONLY ACTIVE WHEN REQUIRED IN SETTINGS
+        if not crawler.settings.getbool('VALIDATOR_CACHE_ENABLED'):
+            raise NotConfigured
+
+        # INSTANCIATION AND SIGNALS CONNECTION
+        s = cls(crawler.settings.get('VALIDATOR_CACHE_FILE'), crawler.stats)
+        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(s.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(s.item_dropped, signal=signals.item_dropped)
+        crawler.signals.connect(s.item_dropped, signal=signals.item_error)
+        crawler.signals.connect(s.movie_lost, signal=movie_lost)
+        return s
+
+    def __init__(self, path: str, stats):
+        # BASIC SETTINGS & INITIALIZATION
+        self.path = path
+        self.stats = stats
+        self.cache = None           # Persisted validators (see `spider_opened`)
+        self.pending = {}           # Validators waiting for their item saving
+
+    def spider_opened(self, spider):
+        # CONNECTION (autocommit mode, shared by workers of a sharded crawl)
+        self.cache = sqlite3.connect(self.path, timeout=60,
+                                     isolation_level=None)
+        self.cache.execute("PRAGMA journal_mode=WAL")
+        self.cache.execute("PRAGMA synchronous=NORMAL")
+
+        # CREATES THE VALIDATORS TABLE IF REQUIRED
+        self.cache.execute("""
+            CREATE TABLE IF NOT EXISTS validators (
+                movie_id INTEGER NOT NULL,
+                page TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                digest TEXT,
+                PRIMARY KEY (movie_id, page))""")
+
+    def spider_closed(self, spider):
+        self.cache.close()
+
+    def load(self, movie_id: int, page: str):
+        """
+        Returns the persisted validators of a movie page (empty if none).
+
+        Parameter(s):
+            movie_id (int): Allocine movie id.
+            page     (str): Page type ('movie' or 'casting').
+        """
+
+        row = self.cache.execute(
+            "SELECT etag, last_modified, digest FROM validators "
+            "WHERE movie_id = ? AND page = ?", (movie_id, page)).fetchone()
+        return dict(zip(('etag', 'last_modified', 'digest'), row or ()))
+
+    def store(self, movie_id: int, pages: dict):
+        """
+        Persists the validators of movie pages (in a single transaction).
+
+        Parameter(s):
+            movie_id (int): Allocine movie id.
+            pages   (dict): Validators (see `get_validators`) by page type.
+        """
+
+        self.cache.executemany(
+            "INSERT OR REPLACE INTO validators (movie_id, page, etag, "
+            "last_modified, digest) VALUES (?, ?, ?, ?, ?)",
+            [(movie_id, page, x['etag'], x['last_modified'], x['digest'])
+             for page, x in pages.items()])
+
+    def process_request(self, request, spider):
+        # ONLY MOVIE PAGES ARE CONDITIONALY REQUESTED
+        movie_id = request.meta.get('allocine_id')
+        if request.meta.get('page_type') != 'movie' or movie_id is None:
+            return None
+
+        # ADDS VALIDATORS TO THE REQUEST HEADERS IF ANY
+        validators = self.load(movie_id, 'movie')
+        if validators.get('etag'):
+            request.headers.setdefault('If-None-Match', validators['etag'])
+        if validators.get('last_modified'):
+            request.headers.setdefault('If-Modified-Since',
+                                       validators['last_modified'])
+        return None
+
+    def process_response(self, request, response, spider):
+        # BASIC SETTINGS & INITIALIZATION
+        page = request.meta.get('page_type')
+        movie_id = request.meta.get('allocine_id')
+        if page not in ('movie', 'casting') or movie_id is None:
+            return response
+
+        # MOVIE PAGE NOT MODIFIED ACCORDING ALLOCINE (i.e. `304` status)
+        if response.status == 304:
+            self.stats.inc_value(f'validator_cache/{page}/not_modified')
+            raise IgnoreRequest(f"Movie {movie_id} not modified")
+        elif response.status != 200:
+            return response
+
+        # MOVIE PAGE NOT MODIFIED ACCORDING ITS DIGEST
+        validators = self.get_validators(response)
+        if self.load(movie_id, page).get('digest') == validators['digest']:
+            self.stats.inc_value(f'validator_cache/{page}/hit')
+            self.store(movie_id, {page: validators})
+            if page == 'movie':
+                raise IgnoreRequest(f"Movie {movie_id} not modified")
+            return response # Casting required anyway as movie was modified
+
+        # NEW OR MODIFIED PAGE (validators saved once movie item is saved)
+        self.stats.inc_value(f'validator_cache/{page}/miss')
+        self.pending.setdefault(movie_id, {})[page] = validators
+        return response
+
+    def get_validators(self, response):
+        """
+        Returns a dictionary with the validators of the given response.
+        """
+
+        # BASIC SETTINGS & INITIALIZATION
+        header = lambda x: (response.headers.get(x) or b'').decode('latin-1')
+
+        # FUNCTION OUTPUT
+        return {'etag': header('ETag'),
+                'last_modified': header('Last-Modified'),
+                'digest': hashlib.sha1(response.body).hexdigest()}
+
+    def item_scraped(self, item, response, spider):
+        # SAVES VALIDATORS OF THE MOVIE PAGES ONCE ITS ITEM IS SAVED
+        movie_id = ItemAdapter(item).get('allocine_id')
+        validators = self.pending.pop(movie_id, None)
+        if validators:
+            self.store(movie_id, validators)
+
+    def item_dropped(self, item, response, spider, **kwargs):
+        # DISCARDS VALIDATORS OF THE MOVIE PAGES AS ITS ITEM WAS NOT SAVED
+        self.pending.pop(ItemAdapter(item).get('allocine_id'), None)
+
+    def movie_lost(self, allocine_id, spider):
+        # DISCARDS VALIDATORS OF THE MOVIE PAGES AS IT WAS NOT (FULLY) SCRAPED
+        self.pending.pop(allocine_id, None)
+
+
+class MovieThrottleMiddleware:
+    """
+    Adaptive throttling (AIMD) of requests per endpoint class.
+
+    Requests are sorted into endpoint classes ('listing', 'movie', 'casting',
+    'poster') each of which gets its own downloader slot. For each class, the
+    latency percentiles as well as the rate of `429` and `5xx` answers (and of
+    network errors) are tracked over the last `THROTTLE_WINDOW` responses. The
+    slot delay and concurrency are then adjusted as follows:
+        * Additive increase: once per round of `concurrency` successful
+          responses (provided the latency 95th percentile stays under
+          `THROTTLE_TARGET_LATENCY`), the delay is lowered by one step down to
+          `THROTTLE_MIN_DELAY`. Once there, the concurrency is increased by
+          one up to `THROTTLE_MAX_CONCURRENCY`.
+        * Multiplicative decrease: on `429`, `5xx`, network errors or too high
+          latencies, the concurrency is halved. Once down to one, the delay is
+          doubled (up to `THROTTLE_MAX_DELAY`). A `Retry-After` header is
+          honoured. There is at most one decrease per round.
+
+    `THROTTLE_MIN_DELAY` and `THROTTLE_MAX_CONCURRENCY` are the hard ceilings
+    set by ops. The classes of a host share `CONCURRENT_REQUESTS_PER_DOMAIN`:
+    if their concurrencies add up to more, each slot gets its share of it (at
+    least one request though). New slots start with the current delay and
+    concurrency of their class (i.e. `THROTTLE_START_CONCURRENCY` at first).
+    Current concurrency, delay, rate (responses/sec), latency
+    percentiles and error rate of each class are exposed in the crawl stats
+    (`throttle/<class>/...`).
+    """
+
+    # ENDPOINT CLASSES (poster images are recognized by their extension)
+    classes = ('listing', 'movie', 'casting', 'poster')
+    images = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        # MIDDLEWARE IS ONLY ACTIVE WHEN REQUIRED IN SETTINGS
+        settings = crawler.settings
+        if not settings.getbool('THROTTLE_ENABLED'):
+            raise NotConfigured
+        if settings.getbool('AUTOTHROTTLE_ENABLED'):
+            raise NotConfigured("Both throttles would set the same delays")
+
+        # INSTANCIATION
+        return cls(crawler,
+                   start_delay=settings.getfloat('DOWNLOAD_DELAY'),
+                   min_delay=settings.getfloat('THROTTLE_MIN_DELAY'),
+                   max_delay=settings.getfloat('THROTTLE_MAX_DELAY'),
+                   delay_step=settings.getfloat('THROTTLE_DELAY_STEP'),
+                   start_concurrency=settings.getint(
+                       'THROTTLE_START_CONCURRENCY'),
+                   max_concurrency=settings.getint('THROTTLE_MAX_CONCURRENCY'),
+                   target_latency=settings.getfloat('THROTTLE_TARGET_LATENCY'),
+                   window=settings.getint('THROTTLE_WINDOW'),
+                   host_concurrency=settings.getint(
+                       'CONCURRENT_REQUESTS_PER_DOMAIN'))
+
+    def __init__(self, crawler, start_delay: float = 1, min_delay: float = 0,
+                 max_delay: float = 60, delay_step: float = 0.1,
+                 start_concurrency: int = 1, max_concurrency: int = 16,
+                 target_latency: float = 2, window: int = 100,
+                 host_concurrency: int = 0):
+        # BASIC SETTINGS & INITIALIZATION
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay_step = delay_step
+        self.max_concurrency = max(max_concurrency, 1)
+        self.target_latency = target_latency
+        self.host_concurrency = host_concurrency  # 0 means no limit
+        self.hosts = {}                           # {host: {class: slot key}}
+
+        # CONTROL STATE OF EACH ENDPOINT CLASS (see `get_state`)
+        self.states = {}
+        self.get_state = lambda x: self.states.setdefault(x, {
+            'delay': min(max(start_delay, min_delay), max_delay),
+            'concurrency': min(max(start_concurrency, 1), max_concurrency),
+            'round': 0,                       # Clean responses in a row
+            'cooldown': 0,                    # Responses left before decrease
+            'latencies': deque(maxlen=window),
+            'outcomes': deque(maxlen=window), # True for errors
+            'times': deque(maxlen=window)})   # Response times (rate)
+
+    def process_request(self, request, spider):
+        # EACH ENDPOINT CLASS (of each host) GETS ITS OWN DOWNLOADER SLOT
+        endpoint = self.get_endpoint(request)
+        host = urlparse_cached(request).hostname
+        key = f'{host}/{endpoint}'
+        if request.meta.setdefault('download_slot', key) != key:
+            return None # Slot chosen by the spider: not throttled
+        request.meta['throttle_class'] = endpoint
+
+        # NEW CLASS OF THE HOST (slots of the host share its concurrency)
+        if endpoint not in self.hosts.setdefault(host, {}):
+            self.hosts[host][endpoint] = key
+            self.adjust_slots(host)
+        return None
+
+    def process_response(self, request, response, spider):
+        # FEEDBACK FROM THE SERVER ANSWER
+        error = response.status == 429 or response.status >= 500
+        retry_after = self.get_retry_after(response) if error else None
+        self.feedback(request, error, retry_after)
+        return response
+
+    def process_exception(self, request, exception, spider):
+        # NETWORK ERRORS (ex: timeouts) ARE CONSIDERED AS OVERLOAD SIGNS
+        if not isinstance(exception, IgnoreRequest):
+            self.feedback(request, True)
+        return None
+
+    def feedback(self, request, error: bool, retry_after: float = None):
+        """
+        Updates the endpoint class state and adjusts its slot (AIMD).
+
+        Parameter(s):
+            request     (Request): Request which has just been answered.
+            error          (bool): Whether the answer is an overload sign.
+            retry_after   (float): Delay required by the server (if any).
+        """
+
+        # BASIC SETTINGS & INITIALIZATION
+        endpoint = request.meta.get('throttle_class')
+        if endpoint is None:
+            return
+        state = self.get_state(endpoint)
+        latency = request.meta.get('download_latency')
+
+        # MEASURES UPDATE
+        state['outcomes'].append(error)
+        state['times'].append(time.monotonic())
+        if latency is not None and not error:
+            state['latencies'].append(latency)
+        too_slow = self.get_percentile(state, 95) > self.target_latency
+        state['round'] = 0 if error or too_slow else state['round'] + 1
+        state['cooldown'] -= 1
+
+        # MULTIPLICATIVE DECREASE (at most once per round, i.e. answers to
+        # requests sent before the previous decrease are not considered)
+        if (error or too_slow) and (state['cooldown'] <= 0 or retry_after):
+            state['cooldown'] = state['concurrency']
+            if state['concurrency'] > 1:
+                state['concurrency'] = max(state['concurrency'] // 2, 1)
+            else:
+                state['delay'] = max(state['delay'] * 2, self.delay_step)
+            if retry_after:
+                state['delay'] = max(state['delay'], retry_after)
+            state['delay'] = min(state['delay'], self.max_delay)
+
+        # ADDITIVE INCREASE (delay first, then concurrency)
+        elif state['round'] >= state['concurrency']:
+            if state['delay'] > self.min_delay:
+                state['delay'] = max(state['delay'] - self.delay_step,
+                                     self.min_delay)
+            else:
+                state['concurrency'] = min(state['concurrency'] + 1,
+                                           self.max_concurrency)
+            state['round'] = 0
+
+        # APPLIES THE NEW SETTINGS TO THE DOWNLOADER SLOTS AND UPDATES STATS
+        self.adjust_slots(urlparse_cached(request).hostname)
+        self.update_stats(endpoint, state)
+
+    def adjust_slots(self, host: str):
+        """
+        Applies the delay and concurrency of each class of a host to its slot.
+
+        Concurrencies are scaled down so that their sum stays within the host
+        concurrency (`CONCURRENT_REQUESTS_PER_DOMAIN`). Slots not created yet
+        (or dropped once idle) get the same values on creation (see
+        `DOWNLOAD_SLOTS`).
+
+        Parameter(s):
+            host (str): Host name of the requests.
+        """
+
+        # BASIC SETTINGS & INITIALIZATION
+        downloader = self.crawler.engine.downloader
+        slots = self.hosts.get(host, {})
+        states = {key: self.get_state(x) for x, key in slots.items()}
+        total = sum(x['concurrency'] for x in states.values())
+        limit = self.host_concurrency
+
+        # ADJUSTING PROCESS (share of the host concurrency if required)
+        for key, state in states.items():
+            concurrency = state['concurrency']
+            if limit and total > limit:
+                concurrency = max(concurrency * limit // total, 1)
+            downloader.per_slot_settings[key] = {
+                **downloader.per_slot_settings.get(key, {}),
+                'delay': state['delay'], 'concurrency': concurrency}
+            slot = downloader.slots.get(key)
+            if slot is not None:
+                slot.delay = state['delay']
+                slot.concurrency = concurrency
+
+    def update_stats(self, endpoint: str, state: dict):
+        """Exposes the current state of an endpoint class in crawl stats."""
+
+        # BASIC SETTINGS & INITIALIZATION
+        times, outcomes = state['times'], state['outcomes']
+        span = times[-1] - times[0] if len(times) > 1 else 0
+        values = {
+            'concurrency': state['concurrency'],
+            'delay': round(state['delay'], 3),
+            'rate': round((len(times) - 1) / span, 2) if span else 0,
+            'error_rate': round(sum(outcomes) / len(outcomes), 3),
+            'latency_p50': round(self.get_percentile(state, 50), 3),
+            'latency_p95': round(self.get_percentile(state, 95), 3)}
+
+        # UPDATING PROCESS
+        for name, value in values.items():
+            self.stats.set_value(f'throttle/{endpoint}/{name}', value)
+        if outcomes[-1]:
+            self.stats.inc_value(f'throttle/{endpoint}/errors')
+
+    def get_endpoint(self, request):
+        """Returns the endpoint class of the given request."""
+
+        # CLASS GIVEN BY THE SPIDER ('listing', 'movie' or 'casting')
+        if request.meta.get('page_type') in self.classes:
+            return request.meta['page_type']
+
+        # OTHER REQUESTS (images are posters, anything else a listing page)
+        path = urlparse_cached(request).path.lower()
+        return 'poster' if path.endswith(self.images) else 'listing'
+
+    def get_percentile(self, state: dict, percent: int):
+        """Returns a latency percentile of an endpoint class (0 if none)."""
+
+        latencies = sorted(state['latencies'])
+        if not latencies:
+            return 0
+        return latencies[min(len(latencies) * percent // 100,
+                             len(latencies) - 1)]
+
+    def get_retry_after(self, response):
+        """Returns the `Retry-After` delay (seconds) of a response if any."""
+
+        value = (response.headers.get('Retry-After') or b'').decode('latin-1')
+        return float(value) if value.strip().isdigit() else None
\ No newline at end of file
@@ -1,10 +1,16 @@
-import dateparser, nltk, regex as re
-import sqlalchemy.exc as alchemyError
+import copy, datetime, multiprocessing, os, queue, threading, time
+import regex as re
+from concurrent.futures import ProcessPoolExecutor
 from Databases import queries, schema
 from itemadapter import ItemAdapter
+from types import SimpleNamespace
+from twisted.internet import defer, threads
+from twisted.python.failure import Failure
+from Movies.idcache import IdCache
+from Movies.seen import SeenMovies
 
-# DOWNLOAD THE STOPWORDS CORPUS FROM NLTK
-nltk.download('stopwords')
+# FRENCH STOP WORDS (nltk corpus shipped with the package, no download)
+STOPWORDS = os.path.join(os.path.dirname(__file__), 'data', 'stopwords_fr.txt')
 
 # IMPLEMENTING THE `CLEANING PIPELINE`
 class MovieScraperPipeline:
@@ -12,7 +18,33 @@ class MovieScraperPipeline:
     PIPELINE DEDICATED TO SCRAPED DATA CLEANING
     """
     # Making a python `set` of french words to stop (i.e. drop)
-    fr_stopset = set(nltk.corpus.stopwords.words('french'))
+    with open(STOPWORDS, encoding='utf-8') as file:
+        fr_stopset = frozenset(x.strip() for x in file
+                               if x.strip() and not x.startswith('#'))
+
+    # Pattern of whole words (stop words are found by lookup in `fr_stopset`)
+    words = re.compile(r'\w+')
+
+    # Technical data fields and the pattern of their header (case insensitive)
+    technical = {field: re.compile(header, re.I) for field, header in {
+        'visa': 'visa',
+        'types': 'film',
+        'color': 'couleur',
+        'budget': 'budget',
+        'awards': 'r.compense',
+        'languages': 'langue',
+        'distributors': 'distributeur',
+        'nationalities': 'nation',
+        'production_year': 'ann.e'}.items()}
+
+    # Pool of cleaning processes (see `CLEANING_WORKERS` and `get_executor`)
+    executor = None
+
+    # Flattening patterns, with and without commas management (see `flatten`)
+    flatteners = {
+        commas: re.compile(r'( *+{0}(?:\W*{0})? *+)| {{2,}}'.format(
+            r'(?:¤|[^ \S]|(?<!\d),(?!\d))' if commas else r'(?:¤|[^ \S])'))
+        for commas in (True, False)}
 
     # SETTER METHODS
     def get_spider_attr(self, spider):
@@ -21,7 +53,8 @@ class MovieScraperPipeline:
 
         The purpose is not only to get the said spider's attributes but also to
         clean them and set them as new attributes for the current instance of
-        `MovieScraperPipeline`.
+        `MovieScraperPipeline`. Each vocabulary is also compiled once for all
+        into a pattern matching any of its values (ex: `genre_pattern`).
         
         Parameter(s):
             spider (movies_spider): The movies_spider instance to target.
@@ -35,9 +68,98 @@ class MovieScraperPipeline:
 
             # CLONING STAGE
             setattr(self, attribute, values)
+            setattr(self, f'{attribute}_pattern', self.compile_words(values))
+
+    def compile_words(self, words):
+        """
+        Compiles a collection of words into one trie optimised regex.
+
+        Words sharing a prefix share the same branch of the pattern (ex:
+        'Comédie' and 'Comédie dramatique' give 'Comédie(?: dramatique)?') so
+        that any string is parsed in one linear pass and the longest word is
+        always matched first, whatever the order of the given collection.
+
+        Parameter(s):
+            words (iterable): Words (or groups of words) to be matched.
+        """
+
+        # BUILDING THE TRIE OF WORDS ('' key marks the end of a word)
+        trie = {}
+        for word in words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[''] = {}
+
+        # CONVERTING THE TRIE INTO A REGEX (recursively, branch by branch)
+        def convert(node):
+            branches = [re.escape(char) + convert(child)
+                        for char, child in sorted(node.items()) if char]
+            if len(branches) == 1 and '' not in node:
+                return branches[0]
+            pattern = '(?:{})'.format('|'.join(branches)) if branches else ''
+            return pattern + '?' if pattern and '' in node else pattern
+
+        # FUNCTION OUTPUT (a pattern matching nothing if no word given)
+        return re.compile(convert(trie) or '(?!)')
+
+
+    @classmethod
+    def from_vocabularies(cls, genre: str, country: str = ''):
+        """
+        Returns a pipeline ready to clean items without any spider.
+
+        Parameter(s):
+            genre   (str): Genres vocabulary (ex: 'Action¤Comédie¤Drame').
+            country (str): Countries vocabulary (same format).
+        """
+
+        pipeline = cls()
+        pipeline.get_spider_attr(SimpleNamespace(genre=genre, country=country))
+        return pipeline
+
+
+    # STATELESS CLEANING API (raw items given and returned as dicts)
+    def clean(self, raw: dict):
+        """
+        Returns the clean fields of a raw item. The raw item is left as is.
+
+        Parameter(s):
+            raw (dict): Raw item fields (i.e. as scraped by `movies_spider`).
+        """
+
+        fields = copy.deepcopy(dict(raw))
+        self.clean_item(fields)
+        return fields
+
+    def clean_batch(self, raws):
+        """
+        Cleans raw items one by one (lazily). Yields their clean fields.
+
+        Parameter(s):
+            raws (iterable): Raw items (see `clean`).
+        """
+
+        for raw in raws:
+            yield self.clean(raw)
 
 
     # GENERAL AND/OR COMMON DATA CLEANING METHODS
+    def get_structured(self, adapter, field: str):
+        """
+        Returns the value of a field as given by the movie page JSON-LD.
+
+        Fields available in JSON-LD (see `MovieExtractor.extract_structured`)
+        are already clean, so that their cleaning stage can be skipped (i.e.
+        the fast path). None is returned for any field missing from JSON-LD
+        and the regular cleaning stage is then applied (i.e. the fallback).
+
+        Parameter(s):
+            field (str): Name of the field (ex: 'release_date')
+        """
+
+        return (adapter.get('structured') or {}).get(field)
+
     def get_first(self, regex, string):
         """
         Parses given string with given regex. Returns 1st match or None.
@@ -82,6 +204,11 @@ class MovieScraperPipeline:
         """
         Removes controls characters, commas (if non numeric), and extra spaces.
 
+        Separators (i.e. '¤', control characters and commas) are changed into
+        one single '¤' together with any surrounding spaces and any non word
+        characters between them (ex: '¤ - ¤' becomes '¤'). Extra spaces are
+        changed into a single space. All of it in one pass (see `flatteners`).
+
         Parameter(s):
             txt     (str): String to be cleaned
             commas (bool): Whether to drop any commas (float numbers ignored)
@@ -89,61 +216,103 @@ class MovieScraperPipeline:
         Returns: A clean string (cleaned version of the given string)
         """
 
-        # SETTING UP REGEXES TO BE APPLIED SUCCESSIVELY
-        regexes = [r'(?<!\d),(?!\d)'] if commas else [] # Commas management
-        regexes += [r'[^ \S]', r'\s*¤+\s*', r'¤+\W*¤+'] # Ctrl & Irrelev. chars
-
-        # FLATTENING & CLEANING PROCESS:
-        for regex in regexes:
-            txt = re.sub(regex, '¤', txt)
-
-        # FUNCTION OUTPUT
-        return re.sub(r'\s+', ' ', txt) # Returns flatten withiut extra spaces
+        # FLATTENING & CLEANING PROCESS (1st group only matches separators)
+        replace = lambda x: '¤' if x.lastindex else ' '
+        return self.flatteners[commas].sub(replace, txt)
 
 
     # METHODS DEDICATED TO ITEM CLEANING
     def process_item(self, item, spider):
         """
         MONITORING FUNCTION TO DRIVE THE CLEANING PROCESS OF SCRAPED DATA.
+
+        Items are cleaned right away, unless the `CLEANING_WORKERS` setting is
+        set: the cleaning then runs in a pool of processes (see `get_executor`)
+        so that the reactor (i.e. downloads and parsing) is never blocked by a
+        big item. A Deferred fired with the cleaned item is returned instead.
         """
 
-        # BASIC SETTINGS & INITIALIZATION
-        self.adapter = ItemAdapter(item)
-        _ = None if hasattr(self, 'genre') else self.get_spider_attr(spider)
+        # BASIC SETTINGS & INITIALIZATION (vocabularies and workers once)
+        adapter = ItemAdapter(item)
+        if not hasattr(self, 'genre'):
+            self.get_spider_attr(spider)
+            self.executor = self.get_executor(spider)
+
+        # JSON-LD FAST PATH MONITORING (see `get_structured`)
+        structured = adapter.get('structured') or {}
+        path = 'fast_path' if structured else 'fallback'
+        spider.crawler.stats.inc_value(f'jsonld/{path}')
+        for field in structured:
+            spider.crawler.stats.inc_value(f'jsonld/fields/{field}')
+
+        # DATA CLEANING PIPELINE (in the current process)
+        if self.executor is None:
+            self.clean_item(adapter)
+            return item
+
+        # DATA CLEANING PIPELINE (in a worker process, see `clean_fields`)
+        future = self.executor.submit(clean_fields, adapter.asdict())
+        return self.get_deferred(future).addCallback(
+            lambda fields: adapter.update(fields) or item)
+
+    def clean_item(self, adapter):
+        """
+        Cleans all the fields of an item in-place.
+
+        Parameter(s):
+            adapter (ItemAdapter|dict): Item (or dict of its fields) to clean.
+        """
 
         # DATA CLEANING PIPELINE
-        self.clean_titles()      # Cleaning of the french and original titles
-        self.clean_synopsis()    # Synopsis cleaning
-        self.clean_film_poster() # Movie poster (get clean url)
-        self.clean_creators()    # Extract directors and writers
-        self.clean_metadata()    # Extract release date and place, genres, etc.
-        self.clean_technnical()  # Extract distributors, origin, languages etc.
-        self.clean_ratings()     # Extract Press and Public ratings
-        self.clean_casting()     # Extracts actor names and related role(s)
-
-
-        # print("##############################################################")
-        # #for key, value in response.meta['data'].items():
-        # for key, value in item.items():
-        #     # if value:
-        #     print(f'{key}:\n{repr(value)}')
-        #     try:
-        #         print(f" >>> {self.flatten(self.adapter.get(key))}")
-        #     except:
-        #         print("None or Error!")
-        #     print()
-        # #print(dir(response.meta['item']))
-        # #print(response.meta['item'])
-        # print("##############################################################")
-        # print("--------------------------------------------------------------")
-
-        return item
-
-    def clean_titles(self):
+        self.clean_titles(adapter)      # French and original titles cleaning
+        self.clean_synopsis(adapter)    # Synopsis cleaning
+        self.clean_film_poster(adapter) # Movie poster (get clean url)
+        self.clean_creators(adapter)    # Extract directors and writers
+        self.clean_metadata(adapter)    # Release date and place, genres, etc.
+        self.clean_technnical(adapter)  # Distributors, origin, languages etc.
+        self.clean_ratings(adapter)     # Extract Press and Public ratings
+        self.clean_casting(adapter)     # Actor names and related role(s)
+
+    def get_executor(self, spider):
+        """
+        Returns a pool of `CLEANING_WORKERS` processes (None if not set).
+
+        Parameter(s):
+            spider (movies_spider): Spider whose vocabularies are required.
+        """
+
+        # FUNCTION OUTPUT
+        workers = spider.settings.getint('CLEANING_WORKERS')
+        return get_cleaners(workers, spider.genre, spider.country)
+
+    def get_deferred(self, future):
+        """
+        Returns a Deferred fired (in the reactor thread) once `future` is done.
+        """
+
+        # BASIC SETTINGS & INITIALIZATION
+        from twisted.internet import reactor
+        deferred = defer.Deferred()
+        def fire(future):
+            if future.exception() is not None:
+                deferred.errback(Failure(future.exception()))
+            else:
+                deferred.callback(future.result())
+
+        # FUNCTION OUTPUT (futures are done in an executor thread)
+        future.add_done_callback(lambda x: reactor.callFromThread(fire, x))
+        return deferred
+
+    def close_spider(self, spider):
+        # WAITS FOR THE ITEMS STILL BEING CLEANED THEN STOPS THE WORKERS
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def clean_titles(self, adapter):
         # CLEANING PROCESS (applied to each given title field)
         for field in ['title', 'title_fr']:
             # GET FIELD TO CLEAN AND FLATTEN IT
-            title = self.flatten(self.adapter.get(field))
+            title = self.flatten(adapter.get(field))
 
             # STRIP THE ABOVE RESULT ON RIGHT SIDE (drops spaces and "¤")
             title = re.sub(r'[\s¤]*$', '', title)
@@ -153,13 +322,13 @@ class MovieScraperPipeline:
             title = re.sub(r'^[\s¤]*', '', title) if title else None
 
             # UPDATING THE ITEM'S FIELD WITH A CLEAN VALUE OR SIMPLY NONE.
-            self.adapter[field] = title
+            adapter[field] = title
 
         # CHECK MOVIE TITLE IN FRANCE
-        if not self.adapter.get('title_fr'):
-            self.adapter['title_fr'] = self.adapter.get('title')
+        if not adapter.get('title_fr'):
+            adapter['title_fr'] = adapter.get('title')
 
-    def clean_synopsis(self):
+    def clean_synopsis(self, adapter):
         """
         Applies a basic cleaning on scraped data. Returns a string or None.
 
@@ -168,20 +337,20 @@ class MovieScraperPipeline:
         """
 
         # BASIC CLEANING PROCESS
-        synopsis = self.flatten(self.adapter.get('synopsis'), commas=False)
+        synopsis = self.flatten(adapter.get('synopsis'), commas=False)
         synopsis = synopsis.strip(" ,¤")
 
         # FUNCTION OUTPUT
-        self.adapter['synopsis'] = synopsis if synopsis else None
+        adapter['synopsis'] = synopsis if synopsis else None
 
-    def clean_film_poster(self):
+    def clean_film_poster(self, adapter):
         # INITIALIZATION
         field, regex = 'film_poster', r'http.+\.jpg'
 
         # CLEANING PROCESS
-        self.adapter[field] = self.get_first(regex, self.adapter.get(field))
+        adapter[field] = self.get_first(regex, adapter.get(field))
 
-    def clean_creators(self):
+    def clean_creators(self, adapter):
         """
         This method extracts the list of directors and that of screenwriters.
         """
@@ -190,26 +359,33 @@ class MovieScraperPipeline:
         field = 'creators'
 
         # CLEANS 'creators' FIELD IN-PLACE BEFORE EXTRACTING DETAILED DATA
-        self.adapter[field] = self.flatten(self.adapter.get(field))
+        adapter[field] = self.flatten(adapter.get(field))
 
         # EXTRACTS SCREENWRITER NAMES FROM 'creators' (raw data to be cleaned)
-        makers = self.adapter.get(field)
+        makers = adapter.get(field)
         writers = self.get_first(r'(?i)(?<=¤+\s*par\s*¤+).*$', makers)
 
-        # EXTRACTS DIRECTORS NAMES FROM 'creators' (ras data to be cleaned)
-        directors = re.sub(r'(?i)¤+\s*par\s*¤+.*$', '', makers)
-        directors = self.get_first(r'(?i)(?<=¤+\s*de\s*¤+).*$', directors)
+        # EXTRACTS DIRECTORS NAMES FROM 'creators' (unless given in JSON-LD)
+        directors = self.get_structured(adapter, 'directors')
+        if not directors:
+            directors = re.sub(r'(?i)¤+\s*par\s*¤+.*$', '', makers)
+            directors = self.get_first(r'(?i)(?<=¤+\s*de\s*¤+).*$', directors)
 
         # CLEANING OF SCREENWRITER AND DIRECTOR NAMES + IN-PLACE BACKUP
         makers = {'directors': directors, 'screenwriters': writers}
         for field, names in makers.items():
+            # JSON-LD DATA IS ALREADY CLEAN
+            if self.get_structured(adapter, field):
+                adapter[field] = self.get_structured(adapter, field)
+                continue
+
             # CLEANING PROCESS
             names = self.get_all(r'[\p{L}\s]+', names if names else '')
 
             # IN-PLACE BACKUP
-            self.adapter[field] = "¤".join(names) if names else None
+            adapter[field] = "¤".join(names) if names else None
 
-    def clean_ratings(self):
+    def clean_ratings(self, adapter):
         """
         Extracts movie ratings (press & public) and reformats it.
         """
@@ -220,17 +396,17 @@ class MovieScraperPipeline:
         fields = {'press_rating': 'presse', 'public_rating': 'spectateurs'}
 
         # CLEANS 'ratings' FIELD IN-PLACE BEFORE EXTRACTING DETAILED DATA
-        self.adapter[master] = self.flatten(self.adapter.get(master))
+        adapter[master] = self.flatten(adapter.get(master))
 
         # EXTRACTING & CLEANING PROCESS + SCRAPY ITEM UPDATE (field by field)
         for field, header in fields.items():
-            rating = self.get_first(regexp(header), self.adapter.get(master))
+            rating = self.get_first(regexp(header), adapter.get(master))
             rating = float(re.sub(r',', '.', rating)) if rating else None
-            self.adapter[field] = rating
+            adapter[field] = rating
 
 
     # Sub section dedicated to `metadata` cleaning
-    def clean_metadata(self):
+    def clean_metadata(self, adapter):
         """
         Parses metadata to get clean date, medium, duration and genre of movie.
         """
@@ -239,42 +415,44 @@ class MovieScraperPipeline:
         field = 'metadata'
 
         # CLEANS 'metadata' FIELD IN-PLACE BEFORE EXTRACTING DETAILED DATA
-        self.adapter[field] = self.flatten(self.adapter.get(field))
+        adapter[field] = self.flatten(adapter.get(field))
 
         # EXTRACTION & CLEANING PROCESS
-        backup = self.adapter.get(field) # Creates raw data backup (see below)
-        self.get_movie_date()            # Retrieves and reformat release date
-        self.get_runtime()               # Retrieves and reformat movie runtime
-        self.get_genres()                # Retrieves all genres
-        self.get_place()                 # Rectrieves release place
+        backup = adapter.get(field)      # Creates raw data backup (see below)
+        self.get_movie_date(adapter)     # Retrieves and reformat release date
+        self.get_runtime(adapter)        # Retrieves and reformat movie runtime
+        self.get_genres(adapter)         # Retrieves all genres
+        self.get_place(adapter)          # Rectrieves release place
 
         # RECOVERS ORIGINAL 'metadata' FIELD (for post processing check only)
-        self.adapter[field] = backup
+        adapter[field] = backup
 
-    def get_movie_date(self):
+    def get_movie_date(self, adapter):
         """
-        Extracts the release date from the scraped data and reformats it (min).
+        Extracts the release date from the scraped data as a `datetime.date`.
 
         Additionnaly, the 'metadata' field is realtime updated to drop the
         freshly extracted date making subsequent extractions easier. 
         """
 
         # BASIC SETTINGS & INITIALIZATION
-        meta, isodate = 'metadata', '%Y/%m/%d'
+        meta = 'metadata'
 
         # MOVIE RELEASE DATE - STAGE 1 - Extracting alphanumeric date
         regx = r'\d+\s*\p{L}+\s*\d{4}'                      # Date pattern
-        date = self.get_first(regx, self.adapter.get(meta)) # Get date or none
+        date = self.get_first(regx, adapter.get(meta))      # Get date or none
 
-        # MOVIE RELEASE DATE - STAGE 2 - Reformating date + scrapy Item update
-        date = dateparser.parse(date) if date else None # Creates a date parser
-        date = date.strftime(isodate) if date else None # Changes date format
-        self.adapter['release_date'] = date             # Update scrapy item
+        # MOVIE RELEASE DATE - STAGE 2 - Parsing date + scrapy Item update
+        if self.get_structured(adapter, 'release_date'):
+            date = self.get_structured(adapter, 'release_date') # Parsed
+        else:
+            date = queries.parse_date(date)                     # Parsing
+        adapter['release_date'] = date                          # Saving
 
         # UPDATE 'metadata' FIELD (For easier subsequent cleaning process only)
-        self.adapter[meta] = re.sub(regx, '', self.adapter.get(meta))
+        adapter[meta] = re.sub(regx, '', adapter.get(meta))
 
-    def get_runtime(self):
+    def get_runtime(self, adapter):
         """
         Extracts movie duration from scraped data, parses and reformats it.
 
@@ -287,22 +465,24 @@ class MovieScraperPipeline:
 
         # MOVIE DURATION - STAGE 1 - Extracting alphanumeric duration
         regx = r'(?i)\d+\s*h\s*\d+[\p{L}\s]*(?=¤)'          # Duration pattern
-        time = self.get_first(regx, self.adapter.get(meta)) # Get time or none
+        time = self.get_first(regx, adapter.get(meta))      # Get time or none
 
         # MOVIE DURATION - STAGE 2 - Reformating duration
-        if time:
+        if self.get_structured(adapter, 'runtime_min'):
+            time = self.get_structured(adapter, 'runtime_min')  # In minutes
+        elif time:
             expr = r'(?i)(?<=\d+)\s*h\s*0*'         # Regex to match 'h'
             time = re.sub(expr, '*60+', time)       # 'h' becomes '*60'
             time = re.sub(r'[\p{L}\s]*', '', time)  # Drops any leters & spaces
             time = int(eval(time))                  # Computes length (minutes)
 
         # MOVIE DURATION - STAGE 2 - Scrapy Item update
-        self.adapter['runtime_min'] = time         # Update scrapy item
+        adapter['runtime_min'] = time               # Update scrapy item
 
         # UPDATE 'metadata' FIELD (For easier subsequent cleaning process only)
-        self.adapter[meta] = re.sub(regx, '', self.adapter.get(meta))
+        adapter[meta] = re.sub(regx, '', adapter.get(meta))
 
-    def get_genres(self):
+    def get_genres(self, adapter):
         """
         Retrieves all genres of the movie being scraped.
 
@@ -314,16 +494,22 @@ class MovieScraperPipeline:
         # BASIC SETTINGS & INITIALIZATION
         meta, field = 'metadata', 'categories'
 
-        # MOVIE GENRES - Extraction + scrcapy Item update
-        regex = r"|".join(self.genre)                      # Genres pattern
-        genres = re.findall(regex, self.adapter.get(meta)) # Get time or none
-        genres = '¤'.join(set(genres)) if genres else None # Merging result
-        self.adapter[field] = genres if genres else None   # Saving
+        # MOVIE GENRES - Extraction and removal from 'metadata' in one pass
+        found = []                                         # Genres found
+        drop = lambda x: found.append(x.group()) or ''     # Saves then drops
+        metadata = self.genre_pattern.sub(drop, adapter.get(meta))
+
+        # SCRAPY ITEM UPDATE
+        if self.get_structured(adapter, field):
+            genres = self.get_structured(adapter, field)   # Already merged
+        else:
+            genres = '¤'.join(dict.fromkeys(found))        # Merging
+        adapter[field] = genres if genres else None        # Saving
 
         # UPDATE 'metadata' FIELD (For easier subsequent cleaning process only)
-        self.adapter[meta] = re.sub(regex, '', self.adapter.get(meta))
+        adapter[meta] = metadata
 
-    def get_place(self):
+    def get_place(self, adapter):
         """
         Retrieves the release place(s) of the movie being scraped.
         """
@@ -332,18 +518,17 @@ class MovieScraperPipeline:
         md = 'metadata'
 
         # REMOVES ANY NON RELEVANT WORDS FROM RAW DATA (i.e. drops stop words)
-        regx = '(?:^|(?<=\W)){}(?=\W|$)'.format                   # Unit regex
-        regx = "|".join([regx(word) for word in self.fr_stopset]) # Full regex
-        self.adapter[md] = re.sub(regx, '', self.adapter.get(md)) # Drops words
+        drop = lambda x: '' if x.group() in self.fr_stopset else x.group()
+        adapter[md] = self.words.sub(drop, adapter.get(md))
 
         # EXTRACTING RELEASE PLACE(S)
-        places = self.get_all(regex=r'[\p{L}\s]+', string=self.adapter.get(md))
+        places = self.get_all(regex=r'[\p{L}\s]+', string=adapter.get(md))
 
         # UPDATE OF THE SCRAPY ITEM
-        self.adapter['release_place'] = '¤'.join(places) if places else None
+        adapter['release_place'] = '¤'.join(places) if places else None
 
     # Sub section dedicated to `technical` data cleaning
-    def clean_technnical(self):
+    def clean_technnical(self, adapter):
         """
         Extracts technical details from scraped data (origin, distributor, etc).
         """
@@ -351,49 +536,62 @@ class MovieScraperPipeline:
         # BASIC SETTINGS & INITIALIZATION
         data = 'tech_data'
         heads = 'tech_headers'
-        fields = {'visa': 'visa',
-                  'types': 'film',
-                  'color': 'couleur',
-                  'budget': 'budget',
-                  'awards': 'r.compense',
-                  'languages': 'langue',
-                  'distributors': 'distributeur',
-                  'nationalities': 'nation',
-                  'production_year': 'ann.e'}
 
         # IN-PLACE CLEANING OF SCRAPED DATA BEFORE DETAILS EXTRACTION
         # >>> Remmoves any controls, comas (if not numeric), and extra spaces
         for field in (data, heads):
-            self.adapter[field] = self.flatten(self.adapter.get(field))
-
-        # GETS CLEAN HEADERS SET
-        # >>> To make the recovery of related data easier and more robust
-        headers = self.get_all(r'[^¤]*', self.adapter.get(heads)) # Headers set
-
-        # EXTRACTION & CLEANING PROCESS FIELD BY FIELD
-        regex = r'(?i)(?:^|[^¤])*{}(?:[^¤]|$)*'.format
-        regmask = lambda x: "|".join(header for header in (headers - set([x])))
-        for field, header in fields.items():
-            # EXTRACTS AND CLEANS THE HEADER ASSOCIATED WITH THE CURRENT FIELD
-            header = self.get_first(regex(header), self.adapter.get(heads))
+            adapter[field] = self.flatten(adapter.get(field))
 
-            # REPLACES ALL HEADERS BY '§' EXCEPT THE ONE BEING PROCESSED 
-            value = re.sub(regmask(header), '§', self.adapter.get(data))
+        # GETS CLEAN HEADERS (in page order) AND THEIR VALUES (in one pass)
+        headers = self.get_all(r'[^¤]*', adapter.get(heads), False)
+        sections = self.get_sections(adapter.get(data), set(headers))
 
-            # EXTRACTS DATA RELATED TO CURRENTLY PROCESSED FIELD (I.E. HEADER)
-            value = self.get_first(f'(?<={header})[^§]*', value)     #Gets data
-            value = self.get_all(r'[^¤]*', value) if value else []   #Cleaning
-
-            # UPDATING SCRAPY ITEM
-            self.adapter[field] = '¤'.join(value) if value else None
+        # EXTRACTION PROCESS FIELD BY FIELD (1st header matching the field)
+        for field, pattern in self.technical.items():
+            header = next((x for x in headers if pattern.search(x)), None)
+            values = sections.get(header)
+            adapter[field] = '¤'.join(values) if values else None
 
         # ADDITIONAL STAGES (to be implemented)
         # Dissociating `Budget` amount from the currency >> dedicated method
         # Decomposing `color`. For instance some movies are "Couleur et N/B"
         # etc.
 
+    def get_sections(self, data: str, headers: set):
+        """
+        Splits technical data into a mapping of headers to their values.
+
+        Data is scanned once, '¤' separated part by part. Any part being a
+        header starts the section of this header and any other part is a value
+        of the current section. Only the 1st section of a header is kept and a
+        header is a value of its own section (ex: 'Couleur¤Couleur' gives
+        {'Couleur': {'Couleur': None}}).
+
+        Parameter(s):
+            data    (str): Flattened technical data.
+            headers (set): Clean headers of the technical data.
+
+        Returns: A dict of headers to dicts of unique values (in page order)
+        """
+
+        # BASIC SETTINGS & INITIALIZATION
+        sections, header, values = {}, None, None
+
+        # SPLITTING PROCESS
+        for part in data.split('¤'):
+            part = part.strip(' ')
+            if part in headers and part != header:
+                header = part
+                values = None if part in sections else {}
+                sections.setdefault(part, values)
+            elif part and values is not None:
+                values[part] = None
+
+        # FUNCTION OUTPUT
+        return sections
+
     # Sub section dedicated to `casting` data cleaning
-    def clean_casting(self):
+    def clean_casting(self, adapter):
         """
         Leverages scraped date related to the casting to get actors & roles.
 
@@ -403,79 +601,182 @@ class MovieScraperPipeline:
         # BASIC SETTINGS & INITIALIZATION
         field, roles = 'casting', {}
         del_role_txt = r'(?i)r[oô]le\s*:*\s*'
-        actors_regex = r'(?i)(?<=link[^>]*>)[^<]*'
-        roles_regexp = r'(?i)(?<={}.*light[^>]*>)[^<]*'.format
+        clean = lambda x: re.sub(del_role_txt, '', self.flatten(x))
 
-        # IN-PLACE CLEANING OF SCRAPED DATA BEFORE DETAILS EXTRACTION
+        # CLEANING PROCESS (actors and roles as given by `extract_casting`)
         # >>> Remmoves any controls, comas (if not numeric), and extra spaces
-        self.adapter[field] = self.flatten(self.adapter.get(field))
-        self.adapter[field] = re.sub(del_role_txt, '', self.adapter.get(field))
+        for actor, role in (adapter.get(field) or {}).items():
+            actor = clean(actor).strip(' ¤')
+            if actor and actor not in roles:
+                roles[actor] = clean(role).strip(' <>¤') if role else None
+
+        # UPDATE SCRAPY ITEM
+        adapter[field] = roles
 
-        # GETS ACTORS LIST        
-        actors = self.get_all(actors_regex, self.adapter.get(field))
+# CLEANING WORKERS (see `CLEANING_WORKERS` setting and `reclean` command)
+cleaner = None # Pipeline instance of the current worker process
 
-        # GETS THE MOVIE CHARACTERS (I.E ROLES)
-        for actor in actors:
-            role = self.get_first(roles_regexp(actor), self.adapter.get(field))
-            role = role.strip(' <>¤') if role else None
-            roles[actor] = role
+def get_cleaners(workers: int, genre: str, country: str = ''):
+    """
+    Returns a pool of `workers` cleaning processes (None if `workers` is 0).
 
-        # UPDATE SCRAPY ITEM
-        self.adapter[field] = roles
+    Workers are spawned (i.e. not forked from a process running reactor
+    threads) and given the vocabularies once for all on start (see
+    `start_cleaner`). Items are then sent to them as plain dicts.
+
+    Parameter(s):
+        workers (int): Number of processes.
+        genre   (str): Genres vocabulary (as scraped by the spider).
+        country (str): Countries vocabulary (as scraped by the spider).
+    """
+
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+        initializer=start_cleaner,
+        initargs=(genre, country)) if workers > 0 else None
+
+def start_cleaner(genre: str, country: str):
+    """Initialises a cleaning worker process (i.e. its pipeline instance)."""
+
+    global cleaner
+    cleaner = MovieScraperPipeline.from_vocabularies(genre, country)
+
+def clean_fields(fields: dict):
+    """
+    Cleans the fields of an item in a worker process. Returns clean fields.
+    """
+
+    cleaner.clean_item(fields)
+    return fields
+
+def clean_chunk(raws: list):
+    """Cleans a chunk of raw items in a worker process (see `clean_batch`)."""
+
+    return list(cleaner.clean_batch(raws))
 
 # IMPLEMENTING THE `STORAGE PIPELINE` OR `DATABASE PIPELINE` (save data in DB)
 class MovieDataBasePipeline:
+    """
+    Saves clean items into the movie database by batches.
+
+    Items are buffered and saved together, in a single transaction, once
+    `DB_BATCH_SIZE` items are buffered or once the first buffered item waited
+    for `DB_BATCH_INTERVAL` milliseconds (and on closing). Each table is
+    filled with one bulk INSERT per batch, rows already in the database being
+    skipped one by one (see `queries.insert_ignore`).
+
+    Each item is returned once actually saved (i.e. once its batch is
+    committed), so that `item_scraped` means saved. If the `DB_WRITER_QUEUE`
+    setting is set, batches are saved by a writer thread owning the session
+    (see `run`) so that database stalls never block the crawl. If the
+    `DB_REPLACE_MOVIES` setting is set, movies already saved are replaced
+    instead of being skipped (see `save_movies`).
+    """
     # DO NOT FORGET TO ACTIVATE:DEACTIVATE THIS PIPELINE IN SETTINGS
 
+    # Tables filled from the movie `Id` and a list of values (see `get_record`)
+    dependents = {'genres': (schema.Genres, 'Genre'),
+                  'countries': (schema.Countries, 'Country'),
+                  'languages': (schema.Languages, 'Language')}
+
     # ACTIVATING DATABASE CONNECTION
     def open_spider(self, spider):
-        self.session_maker = schema.db_connect(echo=False)
+        settings = spider.settings
+        self.session_maker = schema.db_connect(
+            pool_size=settings.getint('DB_POOL_SIZE', 5),
+            pool_pre_ping=settings.getbool('DB_POOL_PRE_PING', False),
+            pool_recycle=settings.getint('DB_POOL_RECYCLE', -1))
+        queries.check_database(self.session_maker.kw['bind'])
+
+        # WRITING BUFFER (see `flush`)
+        self.batch, self.timer = [], None
+        self.batch_size = spider.settings.getint('DB_BATCH_SIZE', 100)
+        self.interval = spider.settings.getint('DB_BATCH_INTERVAL', 1000)
+        self.replace = spider.settings.getbool('DB_REPLACE_MOVIES', False)
+
+        # CACHES OF `Id` BY NAME (see `get_ids`)
+        size = spider.settings.getint('DB_ID_CACHE_SIZE', 100000)
+        self.warm = spider.settings.getbool('DB_ID_CACHE_WARM', True)
+        self.stats = getattr(getattr(spider, 'crawler', None), 'stats', None)
+        self.caches = {table: IdCache(size) for table in
+                       (schema.Persons, schema.Companies) if size > 0}
+
+        # LOADS THE ALLOCINE IDS OF SAVED MOVIES (shared with the spider)
+        self.seen_path = spider.settings.get('SEEN_MOVIES_FILE')
+        self.seen_movies = SeenMovies.load(self.seen_path)
+        spider.seen_movies = self.seen_movies
+
+        # SESSION (owned by the writer thread if any, fed through a queue)
+        # The queue is bounded by the semaphore instead of `maxsize`, so
+        # that a full queue never blocks the reactor thread
+        size = spider.settings.getint('DB_WRITER_QUEUE', 0)
+        self.writer, self.error = None, None
+        if size > 0:
+            self.queue = queue.Queue()
+            self.room = defer.DeferredSemaphore(size)
+            self.writer = threading.Thread(target=self.run, daemon=True)
+            self.writer.start()
+        else:
+            self.connect()
+
+    def connect(self):
+        """Opens the session then warms the `Id` caches up (table scans)."""
+
+        # CONNECTION
         self.session = self.session_maker()
 
+        # CACHES WARMING (`DB_ID_CACHE_SIZE` names at most per table)
+        if self.warm:
+            for table, cache in self.caches.items():
+                cache.warm(self.session
+                           .query(table.Id, table.Full_Name)
+                           .limit(cache.size)
+                           .yield_per(10000))
+            self.session.commit()
+
     # SAVING DATA METHODS (Filling the database)
     def process_item(self, item, spider):
         """
-        Save clean scraped data into a dedicated movie database.
+        Buffers a clean item to be saved into the movie database.
 
-        This function is somehow the conductor of the saving process as it does
-        not really make the job itself but calls dedicated sub methods.
+        The rows of the item are built right away (i.e. a bad item fails on
+        its own) but saved along with other items (see `flush`). Returns a
+        Deferred fired with the item once it is saved, or failed with the
+        error otherwise. With a writer thread, an item is queued once the
+        queue has room (i.e. its Deferred waits, the reactor does not).
         """
 
-        # FILLING OF PRIMARY TABLES
-        self.update_movies_table(item)
-        self.update_persons_table(item)
-        self.update_companies_table(item)
-
-        # FILLING DEPENDENT TABLES
-        self.update_genres_table(item)
-        self.update_countries_table(item)
-        self.update_languages_table(item)
-
-        # FILLING ASSOCIATION TABLES
-        self.update_actors_table(item)
-        self.update_directors_table(item)
-        self.update_screenwriters_table(item)
-        self.update_distributors_table(item)
-        #self.session.commit()
-        return item
-
-    # Subsection dedicated to primary tables
-    def update_movies_table(self, item):
+        # WRITER THREAD MODE (a slot is freed once the item is saved)
+        entry = (self.get_record(item), item, defer.Deferred())
+        if self.writer is not None:
+            if not self.room.tokens and self.stats is not None:
+                self.stats.inc_value('db/writer/queue_full')
+            return self.room.run(self.enqueue, entry)
+
+        # BUFFERING PROCESS
+        self.batch.append(entry)
+
+        # SAVING PROCESS (once the batch is full or after a while)
+        from twisted.internet import reactor
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+        elif self.timer is None and reactor.running:
+            self.timer = reactor.callLater(self.interval / 1000, self.flush)
+        return entry[2]
+
+    def get_record(self, item):
         """
-        Gets dedicated data from the item and saves them into `movies` table.
+        Returns the rows to save for an item (names instead of unknown `Id`).
 
-        Returns a warning message in the console if movie already registered.
+        Parameter(s):
+            item (MoviesItem): Clean item (see `MovieScraperPipeline`).
         """
 
-        # BASIC SETTINGS & INITIALIZATION
-        film = item['title_fr']
-        release_date =self.get_python_date(item['release_date'])
-
-        # INSTANCIATES A MOVIE FROM `MOVIES` CLASS (i.e. builds a new row)
-        movie = schema.Movies(
+        # MOVIE ROW (i.e. `movies` table)
+        movie = dict(
             # Main movie characteristics
             Title = item['title'],
-            Title_Fr = film,
+            Title_Fr = item['title_fr'],
             Synopsis = item['synopsis'],
             Duration = item['runtime_min'],
             Poster_URL = item['film_poster'],
@@ -487,169 +788,330 @@ class MovieDataBasePipeline:
             Budget = item['budget'],
             Format = item['color'],
             Category = item['types'],
-            Release_Date = release_date,
+            Release_Date = self.get_python_date(item['release_date']),
             Release_Place = item['release_place'],
             Production_Year = item['production_year'])
 
-        # ADD THE NEW MOVIE (i.e. the new row) IN THE `Movies` TABLE
-        message = f"`{film}` is already in the database!"
-        self.add_and_commit(movie, warner=message)
-
-        # RETRIEVES THE MOVIE ID
-        self.movie_id = queries.get_movie_id(film, release_date, self.session)
+        # PEOPLE AND COMPANIES (names are replaced by their `Id` on saving)
+        casting = item['casting'] or {}
+        directors = set(self.split(item['directors']))
+        screenwriters = set(self.split(item['screenwriters']))
 
-    def update_persons_table(self, item):
+        # FUNCTION OUTPUT
+        return {'allocine_id': item.get('allocine_id'),
+                'movie': movie,
+                'casting': casting,
+                'directors': directors,
+                'screenwriters': screenwriters,
+                'persons': set(casting) | directors | screenwriters,
+                'companies': set(self.split(item['distributors'])),
+                'genres': set(self.split(item['categories'])),
+                'countries': set(self.split(item['nationalities'])),
+                'languages': set(self.split(item['languages']))}
+
+    def flush(self):
         """
-        Gets dedicated data from the item and saves them into `persons` table.
+        Saves the buffered items into the database (see `write`) then fires
+        their Deferred (see `fire`).
         """
 
-        # GETS PEOPLE NAMES (all people related to the movie)
-        persons = set(item['casting']) if item['casting'] else set()
-        for field in ('directors', 'screenwriters'):
-            persons.update(self.split(item[field]))
-
-        # ADDS PERSONS NAME IN THE `persons` TABLE
-        for name in persons:
-            self.add_and_commit(schema.Persons(Full_Name=name), warner=None)
+        # BASIC SETTINGS & INITIALIZATION
+        if self.timer is not None and self.timer.active():
+            self.timer.cancel()
+        entries, self.batch, self.timer = self.batch, [], None
 
-        # RETRIEVES PERSONS `Id` AND SAVE THEM TEMPORARY FOR QUICK ACCESS
-        # >>> Required to fill association tables (`actors`, `directors`, etc.)
-        self.persons = queries.get_persons_id(persons, self.session)
+        # SAVING PROCESS
+        self.fire(entries, self.write([record for record, _, _ in entries]))
 
-    def update_companies_table(self, item):
-        """
-        Gets dedicated data from the item and saves them into `persons` table.
+    def write(self, batch: list):
         """
+        Saves records into the database in a single transaction.
 
-        # GETS COMPANIES NAME (all people related to the movie)
-        companies = set(self.split(item['distributors']))
+        If the transaction fails (i.e. not because of rows already saved, which
+        are skipped), records are saved again one by one so that only the bad
+        ones are lost (with a message). Returns the error of each record (None
+        if saved).
 
-        # ADDING PERSONS NAME IN THE `persons` TABLE
-        for name in companies:
-            self.add_and_commit(schema.Companies(Full_Name=name), warner=None)
+        Parameter(s):
+            batch (list): Records of the items to save (see `get_record`).
+        """
 
-        # RETRIEVES COMPANIES `Id` AND SAVE THEM TEMPORARY FOR QUICK ACCESS
-        # >>> Required to fill association tables
-        self.companies = queries.get_companies_id(companies, self.session)
+        # SAVING PROCESS (the whole batch at once, otherwise item by item)
+        error = self.commit(batch)
+        if error is None:
+            return [None] * len(batch)
+        return [self.commit([x], warns=True) for x in batch]
 
-    # Subsection dedicated to dependent tables
-    def update_genres_table(self, item):
+    def saved(self, batch: list, errors: list):
         """
-        Gets dedicated data from the item and saves them into `genres` table.
+        Records saved movies as seen and updates the crawl stats.
+
+        Parameter(s):
+            batch  (list): Records of the items (see `get_record`).
+            errors (list): Error of each record (see `write`).
         """
 
-        # ADDING PERSONS NAME IN THE `persons` TABLE
-        for genre in set(self.split(item['categories'])):
-            movie_genre = schema.Genres(MovieId=self.movie_id, Genre=genre)
-            self.add_and_commit(movie_genre, warner=None)
+        # RECORDS THE MOVIES AS SEEN (see spider `incremental` mode)
+        for record, error in zip(batch, errors):
+            if error is None:
+                self.seen_movies.add(record['allocine_id'])
+        self.update_stats()
 
-    def update_countries_table(self, item):
-        """
-        Gets dedicated data from the item and saves them in `countries` table.
+    def run(self):
         """
+        Writer thread: saves queued items by batches (see `DB_WRITER_QUEUE`).
 
-        # ADDING PERSONS NAME IN THE `persons` TABLE
-        for country in set(self.split(item['nationalities'])):
-            movie_country = schema.Countries(MovieId=self.movie_id,
-                                             Country=country)
-            self.add_and_commit(movie_country, warner=None)
+        A batch is saved once full, once its first item waited for
+        `DB_BATCH_INTERVAL` milliseconds or on closing (None queued). The
+        Deferred of each item is then fired in the reactor thread, with the
+        item if saved or with the error otherwise. Once the writer failed, all
+        items are failed until closing (see `close_spider`).
+        """
 
-    def update_languages_table(self, item):
+        # BASIC SETTINGS & INITIALIZATION
+        from twisted.internet import reactor
+        entries, entry = [], ()
+        try:
+            self.connect()
+
+            # WRITING PROCESS
+            while entry is not None:
+                try:
+                    wait = deadline - time.monotonic() if entries else None
+                    entry = self.queue.get(timeout=max(wait, 0) if entries
+                                           else None)
+                except queue.Empty:
+                    entry = ()
+                if entry and not entries:
+                    deadline = time.monotonic() + self.interval / 1000
+                entries += [entry] if entry else []
+                if entries and (len(entries) >= self.batch_size or not entry):
+                    batch = [record for record, _, _ in entries]
+                    errors = self.write(batch)
+                    reactor.callFromThread(self.fire, entries, errors)
+                    entries = []
+        except Exception as error:
+            # FAILS THE PENDING ITEMS THEN ANY ITEM UNTIL CLOSING
+            self.error = error
+            reactor.callFromThread(self.fire, entries, [error] * len(entries))
+            while entry is not None:
+                entry = self.queue.get()
+                if entry:
+                    reactor.callFromThread(self.fire, [entry], [error])
+        finally:
+            if hasattr(self, 'session'):
+                self.session.close()
+
+    def enqueue(self, entry: tuple):
         """
-        Gets dedicated data from the item and saves them in `languages` table.
+        Queues an item for the writer thread (see `run`) then returns its
+        Deferred. Fails right away once the writer failed.
+
+        Parameter(s):
+            entry (tuple): (record, item, Deferred) of the item.
         """
 
-        # ADDING PERSONS NAME IN THE `persons` TABLE
-        for language in set(self.split(item['languages'])):
-            movie_language = schema.Languages(MovieId=self.movie_id,
-                                              Language=language)
-            self.add_and_commit(movie_language, warner=None)
+        # QUEUEING PROCESS (never blocks, the room is checked by the caller)
+        if self.error:
+            raise self.error
+        self.queue.put_nowait(entry)
+        return entry[2]
 
-    # Subsection dedicated to association tables
-    def update_actors_table(self, item):
+    def fire(self, entries: list, errors: list):
         """
-        Fills the `actors` association table which links movies and persons
+        Fires the Deferred of saved items (reactor thread if any).
+
+        Parameter(s):
+            entries (list): Queued (record, item, Deferred) tuples.
+            errors  (list): Error of each record (None if saved).
         """
 
-        # FILLING PROCESS
-        for name, role in item['casting'].items():
-            actor = schema.Actors(MovieId=self.movie_id,
-                                  PersonId=self.persons[name],
-                                  Characters=role)
-            self.add_and_commit(actor, warner=None)
+        # BOOK KEEPING (reactor thread)
+        self.saved([record for record, _, _ in entries], errors)
+
+        # FIRING PROCESS
+        for (_, item, deferred), error in zip(entries, errors):
+            if error is None:
+                deferred.callback(item)
+            else:
+                deferred.errback(Failure(error))
 
-    def update_directors_table(self, item):
+    def commit(self, records: list, warns: bool = False):
         """
-        Fills the `directors` association table which links movies and persons
+        Saves records (see `get_record`) then commits. Returns the error if
+        the transaction failed (None otherwise).
+
+        Parameter(s):
+            records (list): Records of the items to save.
+            warns   (bool): Whether to print a message on failure.
         """
 
-        # FILLING PROCESS
-        for name in set(self.split(item['directors'])):
-            director = schema.Directors(MovieId=self.movie_id,
-                                        PersonId=self.persons[name])
-            self.add_and_commit(director, warner=None)
+        # COMMITING PROCESS (validation of the transaction)
+        if not records:
+            return None
+        try:
+            self.save(records)
+            self.session.commit()
+            for cache in self.caches.values():
+                cache.commit()
+            return None
+        except Exception as error: # Ex: a bad record (not only SQL errors)
+            self.session.rollback()
+            for cache in self.caches.values():
+                cache.rollback()
+            if warns:
+                title = records[0]['movie']['Title_Fr']
+                print(f"`{title}` not saved. Session rolled back: {error}")
+            return error
+
+    def save(self, records: list):
+        """
+        Fills all the tables with the rows of the given records (no commit).
 
-    def update_screenwriters_table(self, item):
+        Parameter(s):
+            records (list): Records of the items to save (see `get_record`).
         """
-        Fills the `directors` association table which links movies and persons
+
+        # LAST VERSION OF EACH MOVIE ONLY IF REPLACED (see `save_movies`)
+        if self.replace:
+            key = lambda x: (x['movie']['Title_Fr'], x['movie']['Release_Date'])
+            records = list({key(x): x for x in records}.values())
+
+        # FILLING OF PRIMARY TABLES (and retrieving `Id` at the same time)
+        names = lambda field: set().union(*(x[field] for x in records))
+        movies = self.save_movies(records)
+        if self.replace:
+            queries.delete_dependents(list(set(movies)), self.session)
+        persons = self.get_ids(schema.Persons, names('persons'))
+        companies = self.get_ids(schema.Companies, names('companies'))
+
+        # BUILDING ROWS OF DEPENDENT AND ASSOCIATION TABLES
+        rows = {table: [] for table in (schema.Genres, schema.Countries,
+                                        schema.Languages, schema.Actors,
+                                        schema.Directors, schema.ScreenWriters,
+                                        schema.Distributors)}
+        for record, movie_id in zip(records, movies):
+            for field, (table, column) in self.dependents.items():
+                rows[table] += [{'MovieId': movie_id, column: value}
+                                for value in record[field]]
+            rows[schema.Actors] += [
+                {'MovieId': movie_id, 'PersonId': persons[name],
+                 'Characters': role}
+                for name, role in record['casting'].items()]
+            rows[schema.Directors] += [
+                {'MovieId': movie_id, 'PersonId': persons[name]}
+                for name in record['directors']]
+            rows[schema.ScreenWriters] += [
+                {'MovieId': movie_id, 'PersonId': persons[name]}
+                for name in record['screenwriters']]
+            rows[schema.Distributors] += [
+                {'MovieId': movie_id, 'CompId': companies[name]}
+                for name in record['companies']]
+
+        # FILLING DEPENDENT AND ASSOCIATION TABLES (one statement per table)
+        for table, values in rows.items():
+            if values:
+                statement = queries.insert_ignore(table, self.session)
+                self.session.execute(statement, values)
+
+    def save_movies(self, records: list):
         """
+        Fills the `movies` table and returns the movie `Id` of each record.
 
-        # FILLING PROCESS
-        for name in set(self.split(item['screenwriters'])):
-            screenwriter = schema.ScreenWriters(MovieId=self.movie_id,
-                                                PersonId=self.persons[name])
-            self.add_and_commit(screenwriter, warner=None)
+        Prints a warning for each movie already in the database (same french
+        title and release date), whose `Id` is returned all the same. Their
+        rows are replaced instead if `DB_REPLACE_MOVIES` is set (ex: movies
+        cleaned again, see `reclean`).
 
-    def update_distributors_table(self, item):
-        """
-        Fills the `directors` table which associates movies and companies
+        Parameter(s):
+            records (list): Records of the items to save (see `get_record`).
         """
 
-        # FILLING PROCESS
-        for name, compid in self.companies.items():
-            distributor = schema.Distributors(MovieId=self.movie_id,
-                                              CompId=compid)
-            self.add_and_commit(distributor, warner=None)
+        # BASIC SETTINGS & INITIALIZATION (a movie once per statement)
+        keys = [(x['movie']['Title_Fr'], x['movie']['Release_Date'])
+                for x in records]
+        movies = {}
+        for key, record in zip(keys, records):
+            movies.setdefault(key, record['movie'])
+
+        # REPLACES THE MOVIES ALREADY SAVED (no warning)
+        if self.replace:
+            saved = queries.upsert_movies(list(movies.values()), self.session)
+            return [saved[key] for key in keys]
+
+        # ADD THE NEW MOVIES (i.e. the new rows) IN THE `Movies` TABLE
+        saved = queries.insert_movies(list(movies.values()), self.session)
+
+        # WARNS USER ABOUT MOVIES ALREADY REGISTERED (then gets their `Id`)
+        new = set(saved)
+        for key in keys:
+            if key not in new:
+                print(f"`{key[0]}` is already in the database!")
+            new.discard(key)
+        missing = {key[0] for key in keys if key not in saved}
+        if missing:
+            saved = {**queries.get_movies_id(missing, self.session), **saved}
 
-    # VARIOUS HELPER METHODS (Involved in the saving process but not directly)
-    def add_and_commit(self, item, warner=""):
+        # FUNCTION OUTPUT
+        return [saved[key] for key in keys]
+
+    def get_ids(self, table, names: set):
         """
-        Commit changes if ACID compliant or rollback otherwise with message.
+        Returns {name: `Id`} of people or companies (unknown ones are saved).
+
+        Names are looked for in the cache of the table first, so that only
+        names never met before are sent to the database (`DB_ID_CACHE_SIZE`
+        names at most are cached per table, 0 disables caches).
 
         Parameter(s):
-            item (MobieDB): Instance (i.e. row) of one table to be added to it. 
-            warner (str): OPTIONAL. Message to display if transaction aborted.
-                          Default: `Transaction aborted. Session rolled back`
-                          Optionally : `warner` can be set to None in order not
-                          to show any warning message. At your own risk !
+            table (MovieDB): Either `schema.Persons` or `schema.Companies`.
+            names    (set): Full names of people or companies.
         """
-        # PROCESSING WARNING MESSAGE
-        txt = "Transaction aborted. Session rolled back"
-        warner = txt if warner == "" else warner
 
-        # ADDING GIVEN INSTANCE TO THE DATABASE
-        self.session.add(item)
+        # BASIC SETTINGS & INITIALIZATION
+        cache = self.caches.get(table)
+        if cache is None:
+            return queries.upsert_names(table, names, self.session)
 
-        # COMMITING PROCESS (validation of the transaction)
-        try:
-            self.session.commit()
-        except alchemyError.IntegrityError:
-            self.session.rollback()
-            if warner:
-                print(warner)
+        # LOOKUP PROCESS (cache then database)
+        ids, missing = cache.get(names)
+        saved = queries.upsert_names(table, missing, self.session)
+        cache.update(saved)
+
+        # FUNCTION OUTPUT
+        return {**ids, **saved}
 
-    def get_python_date(self, date: str):
+    def update_stats(self):
+        """Updates the hit rates of the `Id` caches in the crawl stats."""
+
+        # BASIC SETTINGS & INITIALIZATION
+        if self.stats is None:
+            return
+
+        # STATS UPDATE (ex: `db/id_cache/persons/hit_rate`)
+        for table, cache in self.caches.items():
+            prefix = f'db/id_cache/{table.__tablename__}'
+            self.stats.set_value(f'{prefix}/hits', cache.hits)
+            self.stats.set_value(f'{prefix}/misses', cache.misses)
+            self.stats.set_value(f'{prefix}/hit_rate', cache.hit_rate())
+
+    # VARIOUS HELPER METHODS (Involved in the saving process but not directly)
+    def get_python_date(self, date):
         """
         Parse a string reprensenting a date and returns a `datetime` object.
 
+        Dates already parsed (see `MovieScraperPipeline.get_movie_date`) are
+        returned as they are.
+
         Parameter(s):
-            date (str): String representing a date otherwise None
+            date (str|datetime.date): String representing a date otherwise None
 
         Returns: A datetime.date object or simply None
         """
 
-        date = dateparser.parse(date) if date else None
-        return date.date() if date else None
+        if isinstance(date, datetime.date):
+            return date
+        return queries.parse_date(date)
 
     def split(self, string: str, sep: str = '¤'):
         """
@@ -671,5 +1133,26 @@ class MovieDataBasePipeline:
 
     # CLOSING DATABASE CONNECTION
     def close_spider(self, spider):
+        # WRITER THREAD MODE (waits for the queued items to be saved)
+        if self.writer is not None:
+            self.queue.put_nowait(None)
+            deferred = threads.deferToThread(self.writer.join)
+            return deferred.addCallback(lambda _: self.close())
+
+        # SAVES THE BUFFERED ITEMS (whatever the reason the spider closes)
+        self.flush()
+
         # Fermer la connection à la base de données
-        self.session.close()
\ No newline at end of file
+        self.session.close()
+        self.close()
+
+    def close(self):
+        """Saves seen movies then raises the error of the writer (if any)."""
+
+        # SAVES THE ALLOCINE IDS OF SAVED MOVIES FOR NEXT INCREMENTAL CRAWLS
+        if self.seen_path:
+            self.seen_movies.save(self.seen_path)
+
+        # WRITER ERROR (items already failed with it, see `run`)
+        if self.error:
+            raise self.error
\ No newline at end of file
@@ -0,0 +1,140 @@
+import argparse, gzip, itertools, os, time
+from collections import deque
+from types import SimpleNamespace
+from scrapy.utils.project import get_project_settings
+from Databases import schema
+from Movies.archive import ArchiveReader, decode_item
+from Movies.pipelines import (MovieDataBasePipeline, MovieScraperPipeline,
+                              clean_chunk, get_cleaners)
+
+
+def read_items(path: str):
+    """
+    Streams the raw items of an archive or of a JSON lines file.
+
+    Each line of the file holds the fields of one raw item (see
+    `archive.encode_item`). The file is gzip compressed if its name ends with
+    '.gz'. Archives are directories (see `RawItemArchivePipeline`).
+
+    Parameter(s):
+        path (str): Path of the archive or of the raw items file.
+    """
+
+    # ARCHIVE STREAMING
+    if os.path.isdir(path):
+        archive = ArchiveReader(path)
+        try:
+            yield from archive
+        finally:
+            archive.close()
+        return
+
+    # FILE READING PROCESS (line by line)
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield decode_item(line)
+
+def clean_items(raws, genre: str, workers: int, size: int):
+    """
+    Cleans raw items chunk by chunk in `workers` processes (in order).
+
+    Raw items are read lazily: no more than two chunks per worker are being
+    cleaned or waiting for their turn at any time, so that files of any size
+    can be processed.
+
+    Parameter(s):
+        raws (iterable): Raw items (see `read_items`).
+        genre     (str): Genres vocabulary (see `get_genres`).
+        workers   (int): Number of cleaning processes (0 for none).
+        size      (int): Number of items per chunk.
+    """
+
+    # CLEANING IN THE CURRENT PROCESS
+    if workers <= 0:
+        yield from MovieScraperPipeline.from_vocabularies(genre).clean_batch(
+            raws)
+        return
+
+    # CLEANING IN WORKER PROCESSES
+    chunks = iter(lambda: list(itertools.islice(raws, size)), [])
+    with get_cleaners(workers, genre) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(clean_chunk, chunk))
+            if len(pending) > 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+def get_genres(path: str):
+    """
+    Returns the genres vocabulary to clean items with ('¤' separated).
+
+    It is the spider vocabulary saved in the archive if any. Otherwise, the
+    genres already saved in the database are used since all genres found by
+    previous crawls are in the `genres` table.
+
+    Parameter(s):
+        path (str): Path of the archive or of the raw items file.
+    """
+
+    # SPIDER VOCABULARY (archives only)
+    if os.path.isdir(path):
+        archive = ArchiveReader(path)
+        genre = archive.vocabulary()
+        archive.close()
+        if genre:
+            return genre
+
+    # GENRES OF THE DATABASE
+    session = schema.db_connect()()
+    try:
+        genres = session.query(schema.Genres.Genre).distinct()
+        return '¤'.join(genre for genre, in genres)
+    finally:
+        session.close()
+
+def main(argv=None):
+    # COMMAND LINE INTERFACE
+    parser = argparse.ArgumentParser(
+        description='Cleans stored raw items again and saves them into the '
+                    'movies database (no crawl required).')
+    parser.add_argument('path', help='Raw items archive (directory) or file '
+                        '(JSON lines, .gz ok)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Cleaning processes (0: current process only)')
+    parser.add_argument('--chunk', type=int, default=500,
+                        help='Number of items sent to a worker at once')
+    parser.add_argument('--genres', help="Genres vocabulary ('¤' or comma "
+                        "separated). Archive or database genres if not given.")
+    args = parser.parse_args(argv)
+
+    # BASIC SETTINGS & INITIALIZATION
+    genre = (args.genres.replace(',', '¤') if args.genres
+             else get_genres(args.path))
+    spider = SimpleNamespace(settings=get_project_settings())
+    spider.settings.set('DB_WRITER_QUEUE', 0) # No reactor to fire Deferreds
+    spider.settings.set('DB_REPLACE_MOVIES', True) # Stored movies rewritten
+    database = MovieDataBasePipeline()
+    database.open_spider(spider)
+
+    # RE-CLEANING PROCESS (items saved in the very same order)
+    start, count = time.perf_counter(), 0
+    try:
+        raws = read_items(args.path)
+        for item in clean_items(raws, genre, args.workers, args.chunk):
+            saving = database.process_item(item, spider)
+            saving.addErrback(lambda failure: None) # Reported on saving
+            count += 1
+    finally:
+        database.close_spider(spider)
+
+    # SUMMARY
+    elapsed = time.perf_counter() - start
+    print(f'{count} items cleaned and saved in {elapsed:.1f} s')
+
+
+if __name__ == '__main__':
+    main()
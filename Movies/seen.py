@@ -0,0 +1,83 @@
+import os
+from array import array
+from bisect import bisect_left
+
+
+class SeenMovies:
+    """
+    Compact and persisted set of allocine movie ids (i.e. movies already seen).
+
+    Ids are kept in a sorted array of unsigned integers (4 bytes per movie)
+    so that a catalogue of 100k movies weights less than 400 kB in memory and
+    on disk. Lookups are binary searches. Ids added during a crawl are kept
+    in a small python `set` and merged into the sorted array on saving.
+    """
+
+    def __init__(self, ids=()):
+        # SORTED ARRAY OF KNOWN IDS + SET OF IDS ADDED SINCE LAST MERGE
+        self.ids = array('I', sorted(set(ids)))
+        self.new = set()
+
+    # LOADING AND SAVING METHODS
+    @classmethod
+    def load(cls, path: str):
+        """
+        Loads and returns a `SeenMovies` instance from the given file.
+
+        An empty instance is returned if the file does not exist yet.
+
+        Parameter(s):
+            path (str): Path to the file where ids are persisted.
+        """
+
+        # BASIC SETTINGS & INITIALIZATION
+        seen = cls()
+
+        # LOADING PROCESS (the file is a raw dump of the sorted array)
+        if path and os.path.exists(path):
+            with open(path, 'rb') as file:
+                seen.ids.frombytes(file.read())
+
+        # FUNCTION OUTPUT
+        return seen
+
+    def save(self, path: str):
+        """
+        Merges new ids into the sorted array and saves it to the given file.
+
+        The file is first written aside then renamed, so that a crash while
+        saving never leaves a truncated file behind.
+
+        Parameter(s):
+            path (str): Path to the file where ids are persisted.
+        """
+
+        # MERGING PROCESS
+        self.ids = array('I', sorted(set(self.ids) | self.new))
+        self.new = set()
+
+        # SAVING PROCESS
+        with open(f'{path}.tmp', 'wb') as file:
+            self.ids.tofile(file)
+        os.replace(f'{path}.tmp', path)
+
+    # SET LIKE METHODS
+    def add(self, movie_id: int):
+        """Adds the given allocine movie id to the set."""
+
+        if movie_id is not None and movie_id not in self:
+            self.new.add(int(movie_id))
+
+    def __contains__(self, movie_id):
+        # MOVIE URLS WITHOUT ID (None) ARE NEVER KNOWN (nor anything not int)
+        if not isinstance(movie_id, int):
+            return False
+
+        # LOOKS INTO NEW IDS FIRST THEN INTO THE SORTED ARRAY
+        if movie_id in self.new:
+            return True
+        index = bisect_left(self.ids, movie_id)
+        return index < len(self.ids) and self.ids[index] == movie_id
+
+    def __len__(self):
+        return len(self.ids) + len(self.new)
@@ -28,10 +28,22 @@ CONCURRENT_REQUESTS = 32
 # See also autothrottle settings and docs
 
 # PROTECTION AGAINST SERVER OVERHELMING
-# 1. General setting
+# 1. General setting (start value, then adjusted by `MovieThrottleMiddleware`)
 DOWNLOAD_DELAY = 1
 # 2. Setup of a real time random change 
 RANDOMIZE_DOWNLOAD_DELAY = True
+# 3. Adaptive throttling (AIMD) per endpoint class (listing, movie, etc.)
+# Disabled by default (as AutoThrottle): the classes of a host then share
+# `CONCURRENT_REQUESTS_PER_DOMAIN` (see `MovieThrottleMiddleware`)
+THROTTLE_ENABLED = False
+THROTTLE_START_CONCURRENCY = 1
+THROTTLE_TARGET_LATENCY = 2     # Latency 95th percentile (seconds) not to pass
+THROTTLE_DELAY_STEP = 0.1       # Delay decrease on each round of successes
+THROTTLE_MAX_DELAY = 60
+THROTTLE_WINDOW = 100           # Number of responses the measures rely on
+# 4. Hard ceilings (ops): throttle never goes beyond these values
+THROTTLE_MIN_DELAY = 0
+THROTTLE_MAX_CONCURRENCY = 16
 
 
 # The download delay setting will honor only one of:
@@ -61,6 +73,12 @@ CONCURRENT_REQUESTS_PER_DOMAIN = 20 # (Default: 16)
 #DOWNLOADER_MIDDLEWARES = {
 #    "Movies.middlewares.MoviesDownloaderMiddleware": 543,
 #}
+DOWNLOADER_MIDDLEWARES = {
+    # Placed after compression (590) so that page digests use decoded bodies
+    "Movies.middlewares.MovieValidatorCacheMiddleware": 580,
+    # Placed before retries (550) so that `429` and `5xx` answers are seen
+    "Movies.middlewares.MovieThrottleMiddleware": 585,
+}
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
@@ -71,10 +89,44 @@ CONCURRENT_REQUESTS_PER_DOMAIN = 20 # (Default: 16)
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 ITEM_PIPELINES = {
+    "Movies.archive.RawItemArchivePipeline": 200,
     "Movies.pipelines.MovieScraperPipeline": 300,
     "Movies.pipelines.MovieDataBasePipeline": 400,
 }
 
+# Archive of raw items (see `RawItemArchivePipeline`), disabled if empty
+# Items can then be cleaned again offline: `python -m Movies.reclean archive`
+ARCHIVE_DIR = "archive"
+ARCHIVE_SEGMENT_SIZE = 64 * 1024**2 # Bytes per archive file (compressed)
+
+# Number of processes cleaning items (see `MovieScraperPipeline.get_executor`)
+# Items are cleaned in the crawling process itself if 0
+CLEANING_WORKERS = 0
+
+# Items saved into the database per transaction (see `MovieDataBasePipeline`)
+# A batch is also saved once its first item waited for the interval
+DB_BATCH_SIZE = 100
+DB_BATCH_INTERVAL = 1000 # Milliseconds
+
+# Names (people, companies) whose database `Id` is kept in memory, per table
+# Caches are filled with the names already in the database on start if warm
+DB_ID_CACHE_SIZE = 100000
+DB_ID_CACHE_WARM = True
+
+# Items waiting for the database writer thread (see `MovieDataBasePipeline`)
+# Items are saved in the crawling thread itself if 0
+DB_WRITER_QUEUE = 0
+
+# Movies already in the database are replaced (rows and associations) if set
+# Otherwise they are skipped with a warning (see `Movies.reclean`)
+DB_REPLACE_MOVIES = False
+
+# Connections pooled per database, shared by the whole process (see `schema`)
+# Pre-ping tests connections before use and recycle renews them (seconds)
+DB_POOL_SIZE = 5
+DB_POOL_PRE_PING = False
+DB_POOL_RECYCLE = -1 # Never
+
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
 #AUTOTHROTTLE_ENABLED = True
@@ -96,6 +148,19 @@ ITEM_PIPELINES = {
 #HTTPCACHE_IGNORE_HTTP_CODES = []
 #HTTPCACHE_STORAGE = "scrapy.extensions.httpcache.FilesystemCacheStorage"
 
+# Conditional re-fetch of movie pages (see `MovieValidatorCacheMiddleware`)
+# Movie pages not modified since last crawl are neither parsed nor saved again
+VALIDATOR_CACHE_ENABLED = False
+VALIDATOR_CACHE_FILE = "validators.db" # SQLite, shared by sharded workers
+
+# Incremental crawls (i.e. `scrapy crawl movies_spider -a incremental=1`)
+# File where allocine ids of movies saved in database are kept
+SEEN_MOVIES_FILE = "seen_movies.bin"
+
+# Sharded crawls (i.e. `scrapy crawl movies_spider -a frontier=frontier.db`)
+# Seconds after which a listing page claimed by a worker can be claimed again
+FRONTIER_LEASE = 600
+
 # Set settings whose default value is deprecated to a future-proof value
 REQUEST_FINGERPRINTER_IMPLEMENTATION = "2.7"
 TWISTED_REACTOR = "twisted.internet.asyncioreactor.AsyncioSelectorReactor"
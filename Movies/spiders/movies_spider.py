@@ -1,12 +1,30 @@
-import regex as re
-import scrapy, requests
-from urllib.parse import urljoin
+import os, socket, math, regex as re
+import scrapy
+from scrapy import signals
+from scrapy.spidermiddlewares.httperror import HttpError
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urljoin, urlsplit
 from Movies.items import MoviesItem
+from Movies.extractors import MovieExtractor
+from Movies.seen import SeenMovies
+from Movies.frontier import Frontier
+from Movies.checkpoint import Checkpoint, checkpointed
+
+# Sent with the allocine movie id when a movie is not (fully) scraped
+movie_lost = object()
 
 
 class MoviesSpiderSpider(scrapy.Spider):
     name = "movies_spider"
     limit = 20 # To limit the number of movies to retrieve. None otherwise
+    window = None # Listing pages fetched ahead. None: serial, 0: all at once
+    incremental = False # Whether to skip movies already saved in database
+    frontier = None # Frontier file shared by workers (i.e. sharded crawl)
+    worker = None # Worker name in sharded crawls. Default: '<host>-<pid>'
+    checkpoint = None # Journal file from which an interrupted crawl resumes
+    outstanding = 100 # Max movies requested but not done yet. None otherwise
+    priorities = {'listing': 0, 'movie': 10, 'casting': 20} # Items first
+    extractor = MovieExtractor() # Compiled data paths of movie pages
     start_urls = ["https://allocine.fr/films/"]
     allowed_domains = ["allocine.fr"]
 
@@ -15,7 +33,85 @@ class MoviesSpiderSpider(scrapy.Spider):
     custom_settings = {
         'LOG_LEVEL': 'WARNING'} # Adjust logging level not to overload console}
 
+    # INITIALIZATION OF THE SPIDER INSTANCES
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # SPIDER ARGUMENTS ARE STRINGS WHEN GIVEN IN COMMAND LINE (`-a` option)
+        self.limit = self.to_int(self.limit)
+        self.window = self.to_int(self.window)
+        self.incremental = bool(self.to_int(self.incremental))
+        self.outstanding = self.to_int(self.outstanding)
+
+        # SHARDED CRAWLS: PAGES ARE CLAIMED BY WINDOWS (see `parse`), A WORKER
+        # CLAIMING ALL PAGES AT ONCE WOULD LEAVE NOTHING TO THE OTHER ONES
+        if self.frontier and self.window == 0:
+            raise ValueError("window=0 (all listing pages at once) is not "
+                             "allowed in sharded crawls (frontier)")
+
+        # ALLOCINE IDS OF MOVIES ALREADY SAVED (loaded by the database pipeline)
+        self.seen_movies = SeenMovies()
+
+        # COUNTERS SHARED BY ALL CALLBACKS (see `book_movies` and `fan_out`)
+        self.n = 0                  # Number of movies requested so far
+        self.pages_in_flight = 0    # Number of listing pages being processed
+        self.page_movies = {}       # Movies not done yet per listing page id
+        self.pending_movies = 0     # Movies requested but not done yet
+        self.next_listing = None    # Listing page url put off (serial mode)
+
+        # SHARED FRONTIER (see `parse`) AND WORKER NAME FOR SHARDED CRAWLS
+        self.shared = None
+        self.worker = self.worker or f'{socket.gethostname()}-{os.getpid()}'
+
+        # CRAWL JOURNAL (see `start_requests` and `checkpointed` callbacks)
+        self.journal = Checkpoint(self.checkpoint) if self.checkpoint else None
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        # JOURNALED REQUESTS ARE DONE ONCE THEIR ITEMS WENT THROUGH PIPELINES
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        for signal in (signals.item_scraped, signals.item_dropped,
+                       signals.item_error):
+            crawler.signals.connect(spider.item_done, signal=signal)
+        return spider
+
+    def start_requests(self):
+        """
+        Issues the start requests or, if any, the requests of the journal.
+
+        When the crawl journal holds pending requests (i.e. previous crawl was
+        interrupted), the spider state is restored from the last snapshot and
+        the pending requests are issued again instead of the start requests.
+        """
+
+        # BASIC SETTINGS & INITIALIZATION
+        start = lambda: [scrapy.Request(url, dont_filter=True)
+                         for url in self.start_urls]
+
+        # NO JOURNAL: USUAL START REQUESTS
+        if self.journal is None:
+            yield from start()
+
+        # INTERRUPTED CRAWL: RESUMES FROM THE JOURNAL
+        elif self.journal.is_resumable():
+            self.set_state(self.journal.state())
+            requests = self.journal.pending(self)
+            self.logger.warning(f"Resuming crawl: {len(requests)} requests")
+            yield from requests
+
+        # NEW CRAWL: START REQUESTS ARE JOURNALED BEFORE BEING ISSUED
+        else:
+            requests = start()
+            self.journal.commit(self, None, requests)
+            yield from requests
+
+    async def start(self):
+        # SCRAPY 2.13+ ENTRY POINT (`start_requests` used by former versions)
+        for request in self.start_requests():
+            yield request
+
     # METHODS OF THE RELATED SPIDER INSTANCES
+    @checkpointed
     def parse(self, response):
         """
         The purpose here is to drive the scraping process
@@ -28,48 +124,247 @@ class MoviesSpiderSpider(scrapy.Spider):
         # GET THE FULL LIST OF COUNTRIES
         self.country = self.concatenate(response.xpath(path('pays')).getall())
 
+        # GET THE LISTING RANGE (required when listing pages are fanned out)
+        page_id, self.last_page = self.get_page_ids(response)
+        self.next_page = page_id + 1
+        self.page_size = len(response.xpath("//li[@class='mdl']"))
+        self.pages_in_flight = 1
+
+        # SHARDED CRAWL: ALL LISTING PAGES (page 1 included) ARE CLAIMED
+        if self.frontier:
+            self.shared = Frontier(self.frontier, self.worker,
+                                   self.settings.getint('FRONTIER_LEASE'))
+            self.shared.seed(page_id, self.last_page, self.limit)
+            self.window = 1 if self.window is None else self.window # Serial
+            self.pages_in_flight = 0
+            yield from self.fan_out()
+            return
+
         # SCRAP MOVIES
         yield from self.parse_pages(response)
 
     # Subsection dedicated to pages parsing (i.e. where movies are listed)
+    @checkpointed
     def parse_pages(self, response):
         """
         Navigates one mmovie listing page to another.
+
+        Two navigation modes are available according the `window` attribute:
+            - None: Serial navigation. Next page is requested once the current
+                    one has been parsed (i.e. one listing page per round trip)
+            - int : Fan-out navigation. Up to `window` listing pages (or the
+                    whole listing range if 0) are requested at once.
         """
 
         # BASIC SETTINGS & INITIALIZATION
-        stop = False
-        movies = response.xpath("//li[@class='mdl']")
-        self.n = 0 if not hasattr(self, 'n') else self.n
+        movies = response.xpath("//li[@class='mdl']//h2/a/@href").getall()
+        page_id = response.meta.get('page_id')
+        self.pages_in_flight -= 1
+
+        # DISCARDS MOVIES ALREADY IN DATABASE THEN BOOKS THE OTHER ONES
+        if self.incremental:
+            movies = [url for url in movies if not self.is_known(url)]
+        booked = self.book_movies(len(movies), page_id)
 
         # EXPLORES EACH MOVIE DEDICATED PAGE & RETRIEVES RELATED DATA
-        for movie in movies:
-            self.n += 1
-            movie_url = movie.xpath('.//h2/a/@href').get()
+        self.page_movies[page_id] = self.page_movies.get(page_id, 0) + booked
+        self.pending_movies += booked
+        self.crawler.stats.max_value('movies/outstanding_max',
+                                     self.pending_movies)
+        for movie_url in movies[:booked]:
+            meta = dict(self.get_movie_meta(movie_url), page_id=page_id)
+            yield response.follow(movie_url, self.parse_movie, meta=meta,
+                                  priority=self.priorities['movie'],
+                                  errback=self.parse_movie_failure)
+
+        # ACKNOWLEDGES THE PAGE AT ONCE IF NO MOVIE HAS BEEN BOOKED
+        self.ack_page(page_id)
+
+        # LIMIT REACHED: NEITHER MORE MOVIES NOR MORE PAGES
+        if booked < len(movies):
+            return
+
+        # LOOKS FOR NEW PAGE(S) WITH OTHER MOVIES TO SCRAP & MOVES TO IT IF ANY
+        # (put off while too many movies are outstanding, see `movie_done`)
+        if self.window is not None:
+            yield from self.fan_out()
+        elif next_page := self.get_next_page(response):
+            self.next_listing = response.urljoin(next_page)
+            yield from self.resume_listing()
+
+    @checkpointed
+    def parse_pages_failure(self, failure):
+        """
+        Releases the fan-out slot of a listing page whose download failed.
 
-            if self.limit and self.limit < self.n:
-                stop = True
-                break
-            else:
-                yield response.follow(movie_url, self.parse_movie)
+        In serial mode, the crawl goes on with the following listing page
+        (if any) rather than ending with the lost one.
 
-        # LOOKS FOR A NEW PAGE WITH OTHER MOVIES TO SCRAP & MOVES TO IT IF ANY
-        next_page = self.get_next_page(response)
-        if next_page and not stop:
-            yield response.follow(next_page, callback=self.parse_pages)
+        Parameter(s):
+            failure (Failure): Twisted failure related to the listing request.
+        """
 
-    def get_next_page(self, response):
+        # LOGS THE FAILURE AND SCHEDULES OTHER PAGES INSTEAD
+        url = failure.request.url
+        self.logger.warning(f"Listing page lost: {url}")
+        self.pages_in_flight -= 1
+        if self.shared:
+            self.shared.release(failure.request.meta.get('page_id'))
+        if self.window is not None:
+            yield from self.fan_out()
+        elif (page_id := self.get_listing_id(url)) < self.last_page:
+            self.next_listing = self.get_page_url(page_id + 1)
+            yield from self.resume_listing()
+
+    def fan_out(self):
         """
-        Returns the new page url to follow. Returns None If no page exists.
+        Schedules listing pages ahead, in the limit of the fan-out `window`.
+
+        Pages are not scheduled beyond what is required to reach `limit` (given
+        the number of movies per listing page), so that a limited crawl does
+        not download the whole listing range.
+        """
+
+        # NO MOVIE ON THE FIRST LISTING PAGE (ex: unexpected layout)
+        if not self.page_size and (self.limit or self.outstanding):
+            self.logger.warning("No movie on the first listing page: listing "
+                                "pages are not fanned out")
+            return
+
+        # NUMBER OF PAGES ALLOWED BY THE FAN-OUT WINDOW (None if unbounded)
+        count = self.window - self.pages_in_flight if self.window else None
+
+        # NUMBER OF PAGES STILL REQUIRED TO REACH THE LIMIT (if any)
+        if self.limit:
+            booked = self.shared.used() if self.shared else self.n
+            expected = booked + self.pages_in_flight * self.page_size
+            required = math.ceil((self.limit - expected) / self.page_size)
+            count = required if count is None else min(count, required)
+
+        # NUMBER OF PAGES ALLOWED BY THE CAP ON OUTSTANDING MOVIES (if any)
+        if self.outstanding:
+            expected = self.pending_movies + self.pages_in_flight*self.page_size
+            room = math.ceil((self.outstanding - expected) / self.page_size)
+            count = room if count is None else min(count, room)
+
+        # PAGES TO SCHEDULE (claimed from the shared frontier if any)
+        if count is not None and count <= 0:
+            return
+        elif self.shared:
+            pages = self.shared.claim(count)
+        else:
+            last = self.next_page + count if count else self.last_page + 1
+            pages = range(self.next_page, min(last, self.last_page + 1))
+            self.next_page += len(pages)
+
+        # SCHEDULES THE LISTING PAGES
+        for page_id in pages:
+            self.pages_in_flight += 1
+            yield scrapy.Request(url=self.get_page_url(page_id),
+                                 meta={'page_type': 'listing',
+                                       'page_id': page_id},
+                                 priority=self.priorities['listing'],
+                                 callback=self.parse_pages,
+                                 errback=self.parse_pages_failure)
+
+    def resume_listing(self):
+        """
+        Requests the listing page put off in serial mode, if movies allow it.
+        """
+
+        # CHECKS THE CAP ON OUTSTANDING MOVIES
+        if not self.next_listing:
+            return
+        elif self.outstanding and self.pending_movies >= self.outstanding:
+            return
+
+        # SCHEDULES THE LISTING PAGE
+        url, self.next_listing = self.next_listing, None
+        self.pages_in_flight += 1
+        yield scrapy.Request(url=url, meta={'page_type': 'listing'},
+                             priority=self.priorities['listing'],
+                             callback=self.parse_pages,
+                             errback=self.parse_pages_failure)
+
+    def book_movies(self, count: int, page_id: int = None):
+        """
+        Books movies out of `limit`. Returns the number of movies granted.
+
+        All callbacks run in the same (reactor) thread, so that counting here,
+        right before movie requests are issued, keeps the count exact however
+        many listing pages are processed concurrently. In sharded crawls, the
+        `limit` is a global budget booked from the shared frontier.
+
+        Parameter(s):
+            count   (int): Number of movies to book.
+            page_id (int): Id of the listing page the movies are listed on.
+        """
+
+        # BOOKING PROCESS
+        if self.shared:
+            granted = self.shared.book(page_id, count, self.limit)
+        elif self.limit:
+            granted = min(count, max(self.limit - self.n, 0))
+        else:
+            granted = count
+        self.n += granted
+
+        # FUNCTION OUTPUT
+        return granted
+
+    def movie_done(self, page_id):
+        """
+        Counts one movie of a listing page as done (i.e. item yielded or lost).
+
+        As movies are done, outstanding movies decrease and listing pages put
+        off (see `outstanding` attribute) are requested, which are therefore
+        yielded by this method. Once all movies of a listing page are done,
+        the page is acknowledged (see `ack_page`).
+
+        Parameter(s):
+            page_id (int): Id of the listing page the movie was found on.
+        """
+
+        # COUNTING PROCESS
+        self.pending_movies = max(self.pending_movies - 1, 0)
+        self.page_movies[page_id] = self.page_movies.get(page_id, 1) - 1
+        self.ack_page(page_id)
+
+        # RESUMES LISTING EXPANSION (if it was put off)
+        if self.window is not None:
+            yield from self.fan_out()
+        else:
+            yield from self.resume_listing()
+
+    def ack_page(self, page_id):
+        """
+        Acknowledges a listing page once all its movies are done.
+
+        Pages are acknowledged in the shared frontier (if any). Pages whose
+        worker crashed before are then claimed again by other workers (see
+        `Frontier`).
+
+        Parameter(s):
+            page_id (int): Id of the listing page.
+        """
+
+        # ACKNOWLEDGING PROCESS
+        if self.page_movies.get(page_id, 0) <= 0:
+            self.page_movies.pop(page_id, None)
+            if self.shared and page_id is not None:
+                self.shared.ack(page_id)
+
+    def get_page_ids(self, response):
+        """
+        Returns a tuple with current page id and the very last page id.
         """
 
         # BASIC SETTINGS & INITIALIZATION
-        url = None
         current = "[contains(@class, 'current')]"
         hub_path = "//nav[starts-with(@class, 'pag')]/div/span{}/text()".format
 
         # RETRIEVES THE CURRENT PAGE ID (i.e. current page number)
-        page_id = 1 + int(response.xpath(hub_path(current)).get().strip())
+        page_id = int(response.xpath(hub_path(current)).get().strip())
 
         # GET THE ID OF THE VERY LAST AVAILABLE PAGE
         numbers = response.xpath(hub_path('')).getall()
@@ -77,54 +372,71 @@ class MoviesSpiderSpider(scrapy.Spider):
         numbers = [int(number) for number in numbers if number.isnumeric()]
         last_id = max(numbers)
 
+        # FUNCTION OUTPUT
+        return page_id, last_id
+
+    def get_next_page(self, response):
+        """
+        Returns the new page url to follow. Returns None If no page exists.
+        """
+
+        # BASIC SETTINGS & INITIALIZATION
+        url = None
+        page_id, last_id = self.get_page_ids(response)
+
         # UPDATES 'url' IF REQUIRED
-        if page_id <= last_id:
-            url = f'{self.start_urls[0]}/?page={page_id}'
+        if page_id + 1 <= last_id:
+            url = self.get_page_url(page_id + 1)
 
         # FUNCTION OUTPUT
         return url
 
+    def get_page_url(self, page_id: int):
+        """
+        Returns the url of the listing page whose id (i.e. number) is given.
+        """
+
+        return f'{self.start_urls[0]}/?page={page_id}'
+
+    def get_listing_id(self, url: str):
+        """
+        Returns the id of a listing page from its url (see `get_page_url`).
+        """
+
+        return int(parse_qs(urlsplit(url).query)['page'][0])
+
     # Subsection dedicated to scraping movies homepage.
+    @checkpointed
     def parse_movie(self, response):
         """
         Parse a movie page to retrieve related data (title, synopsis, etc.)
         """
 
-        # BASIC SETTINGS & INITIALIZATION OR FEATURES
-        grab = lambda x: self.concatenate(response.xpath(x).getall())
-        tech ="//section[contains(@class, 'technical')]"
-        meta = "//div[contains(@class, 'card') and contains(@class, 'entity')]"
-        casting_url = self.get_casting_url(response)
-        #casting_url = grab("//a[contains(@title, 'Casting')]/@href")     # Old
-
-        # IMPLEMENTING DATA PATHS FOR PURELY TEXT VALUES
-        paths = {
-            'title' : f"{meta}//div[@class='meta-body-item']",
-            'ratings': f"{meta}//div[contains(@class, 'rating')]",
-            'title_fr': "//h1",
-            'synopsis': "//section[starts-with(@id, 'synopsis')]//p",
-            'creators': f"{meta}//div[contains(@class, 'oneline')]",
-            'metadata': f"{meta}//div[contains(@class, 'info')]",
-            'tech_data': f"{tech}//div[@class='item']",
-            'tech_headers': f"{tech}//span[contains(@class, 'light')]"}
-
-        # IMPLEMENTING DATA PATHS FOR TAG ATTRIBUTES
-        attributes = {'film_poster': f"{meta}//figure//img/@src"}
-
-        # RETRIEVING MOVIE GENERAL DATA
-        data = {key: grab(f'{path}//text()') for key, path in paths.items()}
-        data.update({key: grab(path) for key, path in attributes.items()})
-
-        # INSTANCIATION OF A 'MovieItem' FINALLY FILLED WITH THE SCRAPED DATA
-        item = MoviesItem(**data)
-
-        # RETRIEVING MOVIE CASTING DATA IF AVAILABLE
-        if not self.is_valid_url(casting_url):
-            yield item
-        else:
-            yield scrapy.Request(url=casting_url,
-                                 meta={'item': item},
-                                 callback=self.parse_casting)
+        try:
+            # BASIC SETTINGS & INITIALIZATION OR FEATURES
+            casting_url = self.get_casting_url(response)
+
+            # RETRIEVING MOVIE GENERAL DATA (data paths: see `MovieExtractor`)
+            data = self.extractor.extract(response.selector.root)
+            data['structured'] = self.extractor.extract_structured(
+                response.selector.root)
+
+            # INSTANCIATION OF A 'MovieItem' FILLED WITH THE SCRAPED DATA
+            item = MoviesItem(allocine_id=self.get_movie_id(response.url),
+                              **data)
+        except Exception:
+            yield from self.movie_lost(response)
+            return
+
+        # RETRIEVING MOVIE CASTING DATA IF AVAILABLE (see `parse_no_casting`)
+        yield scrapy.Request(url=casting_url,
+                             meta={'item': item,
+                                   'page_type': 'casting',
+                                   'allocine_id': item['allocine_id'],
+                                   'page_id': response.meta.get('page_id')},
+                             priority=self.priorities['casting'],
+                             callback=self.parse_casting,
+                             errback=self.parse_no_casting)
 
     # Subsection dedicated to scraping mmovies casting
     def get_casting_url(self, response):
@@ -137,41 +449,217 @@ class MoviesSpiderSpider(scrapy.Spider):
         """
 
         # PARSES THE MOVIE DEDICATED PAGE TO GET ITS ID (allocine movie id)
-        movie_id = re.sub('\D+', '', response.url)
+        movie_id = self.get_movie_id(response.url)
 
         # FUNCTION OUTPUT
         return urljoin(response.url, f'/film/fichefilm-{movie_id}/casting/')
 
+    @checkpointed
     def parse_casting(self, response):
         """
         Parse the cast page to retrieve casting data (people names and roles).
         """
 
-        # RETRIEVES CASTING DATA
-        path = "//section[contains(@class, 'casting-actor')]"
-        casting = self.concatenate(response.xpath(path).getall())
+        # RETRIEVES CASTING DATA (actors and roles, see `MovieExtractor`)
+        try:
+            casting = self.extractor.extract_casting(response.selector.root)
+        except Exception:
+            yield from self.movie_lost(response)
+            return
 
         # UPDATES SCRAPY ITEM (i.e. movie item) WITH ITS CASTING DATA
         response.meta['item']['casting'] = casting
 
         # FUNCTION OUTPUT
         yield response.meta['item']
+        yield from self.movie_done(response.meta.get('page_id'))
+
+    @checkpointed
+    def parse_no_casting(self, failure):
+        """
+        Yields the movie item without casting data when casting request fails.
+
+        Some movies have no casting page (allocine answers with a 404 error).
+        Rather than checking the casting url beforehand (i.e. one additional
+        and blocking request per movie), the casting page is directly requested
+        and this errback is called whenever the said request fails. Unless
+        the casting page does not exist, the movie is lost (see `movie_lost`
+        signal) so that it is fetched again on the next crawl.
+
+        Parameter(s):
+            failure (Failure): Twisted failure related to the casting request.
+        """
+
+        # MOVIE TO BE FETCHED AGAIN UNLESS IT HAS NO CASTING PAGE (i.e. 404)
+        response = getattr(failure.value, 'response', None)
+        if not failure.check(HttpError) or response.status != 404:
+            self.crawler.signals.send_catch_log(
+                signal=movie_lost, spider=self,
+                allocine_id=failure.request.meta.get('allocine_id'))
+
+        # FUNCTION OUTPUT (the movie item is carried by the failed request)
+        yield failure.request.meta['item']
+        yield from self.movie_done(failure.request.meta.get('page_id'))
+
+    @checkpointed
+    def parse_movie_failure(self, failure):
+        """
+        Counts a movie as done when its page request fails or is ignored.
+
+        Parameter(s):
+            failure (Failure): Twisted failure related to the movie request.
+        """
+
+        yield from self.movie_done(failure.request.meta.get('page_id'))
+
+    def movie_lost(self, response):
+        """
+        Counts a movie as done when its page cannot be parsed (ex: unexpected
+        layout), so that its listing page is still acknowledged. The
+        `movie_lost` signal is sent (ex: its validators are not saved).
+
+        Errbacks are not called on callback errors: without this, outstanding
+        movies would never decrease and the listing expansion would stop (see
+        `movie_done`). The error is logged and counted in crawl stats.
+
+        Parameter(s):
+            response (Response): Movie or casting page which failed.
+        """
+
+        self.logger.exception(f"Movie lost: {response.url}")
+        self.crawler.stats.inc_value('movies/parsing_errors')
+        self.crawler.signals.send_catch_log(
+            signal=movie_lost, spider=self,
+            allocine_id=response.meta.get('allocine_id'))
+        yield from self.movie_done(response.meta.get('page_id'))
+
+    # Subsection dedicated to the end of the crawl
+    def closed(self, reason: str):
+        """
+        Reports the worker throughput (items/sec) and closes the frontier.
+
+        In sharded crawls, the throughput of each worker is also saved into
+        the shared frontier (see `workers` table) for later comparison.
+
+        Parameter(s):
+            reason (str): Reason why the spider has been closed.
+        """
+
+        # COMPUTES THE WORKER THROUGHPUT FROM THE CRAWL STATS
+        stats = self.crawler.stats
+        items = stats.get_value('item_scraped_count', 0)
+        start = stats.get_value('start_time')
+        now = datetime.now(timezone.utc)
+        seconds = (now - start).total_seconds() if start else 0
+        throughput = items / seconds if seconds else 0
+        stats.set_value('worker/items_per_second', round(throughput, 2))
+
+        # REPORTS THE WORKER THROUGHPUT
+        self.logger.info(f"Worker {self.worker}: {items} items in "
+                         f"{seconds:.1f}s ({throughput:.2f} items/sec)")
+        if self.shared:
+            self.shared.report(items, seconds)
+            if self.journal is None: # Otherwise pages are resumed
+                self.shared.abandon()
+            self.shared.close()
+
+        # CRAWL JOURNAL IS KEPT ONLY IF THE CRAWL IS TO BE RESUMED
+        if self.journal is not None:
+            if reason == 'finished':
+                self.journal.clear()
+            self.journal.close()
+
+    # Subsection dedicated to crawl checkpoints (see `Checkpoint`)
+    def get_state(self):
+        """
+        Returns a snapshot of the spider state (i.e. what a resume requires).
+        """
+
+        # BASIC SETTINGS & INITIALIZATION
+        names = ('genre', 'country', 'n', 'last_page', 'next_page',
+                 'page_size', 'pages_in_flight', 'page_movies',
+                 'pending_movies', 'next_listing')
+
+        # FUNCTION OUTPUT (attributes not set yet are ignored)
+        return {name: getattr(self, name) for name in names
+                if hasattr(self, name)}
+
+    def set_state(self, state: dict):
+        """
+        Restores the spider state from a snapshot (see `get_state`).
+
+        Parameter(s):
+            state (dict): Spider state snapshot.
+        """
+
+        # RESTORING PROCESS
+        self.__dict__.update(state)
+
+        # SHARED FRONTIER IS OPENED AGAIN (if claimed pages were in progress)
+        if self.frontier and 'last_page' in state:
+            self.shared = Frontier(self.frontier, self.worker,
+                                   self.settings.getint('FRONTIER_LEASE'))
+
+    def item_done(self, item, response, spider, **kwargs):
+        # COUNTS ITEMS GONE THROUGH PIPELINES (see `Checkpoint.item_done`)
+        if self.journal is not None:
+            self.journal.item_done(getattr(response, 'request', None))
 
     # Miscellaneous subsection
-    def is_valid_url(self, url: str):
+    def get_movie_id(self, url: str):
         """
-        Checks url validity by sending a `head` request. Returns a boolean.
+        Returns the allocine movie id found in a movie url (None if no id).
 
         Parameter(s):
-            url (str): url to be checked
+            url (str): Any movie url (ex: '/film/fichefilm_gen_cfilm=1234.html')
         """
 
-        # TESTING A `HEAD` REQUEST FAILS (if it fails, the url is not valid)
-        try:
-            response = requests.head(url, allow_redirects=True, timeout=5)
-            return response.status_code == 200
-        except requests.RequestException:
-            return False
+        # EXTRACTION PROCESS (movie url paths hold no other digits than the id)
+        movie_id = re.sub(r'\D+', '', urlsplit(url).path) if url else ''
+
+        # FUNCTION OUTPUT
+        return int(movie_id) if movie_id else None
+
+    def get_movie_meta(self, movie_url: str):
+        """
+        Returns the `meta` dictionary of a movie page request.
+
+        Requests are tagged with their page type ('listing', 'movie' or
+        'casting') and, for movie related pages, with the allocine movie id.
+        Both are used by the downloader middlewares (see `middlewares.py`).
+
+        Parameter(s):
+            movie_url (str): Url of the movie page (as found on listing pages)
+        """
+
+        return {'page_type': 'movie',
+                'allocine_id': self.get_movie_id(movie_url)}
+
+    def is_known(self, movie_url: str):
+        """
+        Checks whether a movie has already been saved. Returns a boolean.
+
+        Parameter(s):
+            movie_url (str): Url of the movie page (as found on listing pages)
+        """
+
+        # LOOKS FOR THE MOVIE ID INTO THE SET OF ALREADY SEEN MOVIES
+        known = self.get_movie_id(movie_url) in self.seen_movies
+
+        # UPDATES CRAWL STATS AND RETURNS THE RESULT
+        if known:
+            self.crawler.stats.inc_value('incremental/skipped_movies')
+        return known
+
+    def to_int(self, value):
+        """
+        Converts a spider argument into an integer. Returns None if not given.
+
+        Parameter(s):
+            value (int|str|None): Value to convert (ex: `-a limit=100`).
+        """
+
+        return None if value in (None, '', 'None') else int(value)
 
     def concatenate(self, list_or_set):
         """Changes collections into strings with a unique separator.
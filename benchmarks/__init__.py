@@ -0,0 +1,4 @@
+# This package contains the benchmarks of the Movies project.
+#
+# Each module can be run on its own from the repository root directory:
+#     python -m benchmarks.<module_name> --help
@@ -0,0 +1,225 @@
+import argparse, dateparser, random, tempfile, timeit, regex as re
+from Databases import queries
+from Movies.extractors import MovieExtractor
+from Movies.pipelines import MovieScraperPipeline
+from benchmarks import mock_allocine
+from benchmarks.bench_extraction import load_responses
+
+
+def legacy_drop_stopwords(text: str):
+    """
+    Former `get_place` stop words removal (pattern rebuilt for each movie).
+    """
+
+    # FUNCTION OUTPUT
+    regx = r'(?:^|(?<=\W)){}(?=\W|$)'.format
+    regx = "|".join([regx(x) for x in MovieScraperPipeline.fr_stopset])
+    return re.sub(regx, '', text)
+
+def legacy_genres(text: str, genres: list):
+    """
+    Former `get_genres` extraction (alternation rebuilt for each movie).
+
+    Returns the sorted genres found and the metadata without them. Genres are
+    given longest first, otherwise the former alternation depends on the set
+    order when a genre is the prefix of another one (ex: 'Comédie').
+    """
+
+    # FUNCTION OUTPUT
+    regex = r"|".join(genres)
+    found = re.findall(regex, text)
+    return sorted(set(found)), re.sub(regex, '', text)
+
+def legacy_parse_date(date: str):
+    """
+    Former date parsing (language detection by `dateparser` on each call).
+    """
+
+    # FUNCTION OUTPUT
+    date = dateparser.parse(date) if date else None
+    return date.date() if date else None
+
+def legacy_technical(pipeline, data: str, headers: str):
+    """
+    Former `clean_technnical` extraction (one regex substitution per field).
+
+    Returns the fields as sets of values since the former version joined the
+    values of a field in `set` order (i.e. in a random order).
+    """
+
+    # BASIC SETTINGS & INITIALIZATION
+    fields = {'visa': 'visa', 'types': 'film', 'color': 'couleur',
+              'budget': 'budget', 'awards': 'r.compense',
+              'languages': 'langue', 'distributors': 'distributeur',
+              'nationalities': 'nation', 'production_year': 'ann.e'}
+    data, headers = pipeline.flatten(data), pipeline.flatten(headers)
+    heads = pipeline.get_all(r'[^¤]*', headers)
+
+    # EXTRACTION PROCESS FIELD BY FIELD
+    output = {}
+    regex = r'(?i)(?:^|[^¤])*{}(?:[^¤]|$)*'.format
+    regmask = lambda x: "|".join(header for header in (heads - set([x])))
+    for field, header in fields.items():
+        header = pipeline.get_first(regex(header), headers)
+        value = re.sub(regmask(header), '§', data)
+        value = pipeline.get_first(f'(?<={header})[^§]*', value)
+        output[field] = pipeline.get_all(r'[^¤]*', value) if value else set()
+
+    # FUNCTION OUTPUT
+    return output
+
+def date_samples(count: int, seed: int = 0):
+    """
+    Returns `count` random allocine dates (ex: '12 novembre 2023').
+    """
+
+    # BASIC SETTINGS & INITIALIZATION
+    rand = random.Random(seed)
+    months = mock_allocine.MONTHS
+
+    # SAMPLES GENERATION (days never overflow months)
+    return [f'{rand.randint(1, 28)} {rand.choice(months)} '
+            f'{rand.randint(1930, 2030)}' for _ in range(count)]
+
+def metadata_samples(count: int, seed: int = 0):
+    """
+    Returns `count` random strings looking like the movie `metadata` field.
+
+    Strings mix stop words, place names, other words and separators so that
+    stop words show up everywhere (start, end, inside words, etc.).
+    """
+
+    # BASIC SETTINGS & INITIALIZATION
+    rand = random.Random(seed)
+    words = (sorted(MovieScraperPipeline.fr_stopset)
+             + mock_allocine.COUNTRIES + mock_allocine.MONTHS
+             + mock_allocine.GENRES
+             + ['en', 'salle', 'Sortie', "l'été", 'Dé-but', 'ÉTÉ', '2023'])
+    seps = [' ', '¤', ' ¤ ', ', ', '|', ' - ', "'", '\n', '']
+
+    # SAMPLES GENERATION
+    return [''.join(rand.choice(words) + rand.choice(seps)
+                    for _ in range(rand.randint(1, 30)))
+            for _ in range(count)]
+
+def technical_samples(directory: str, count: int, seed: int = 0):
+    """
+    Returns (tech_data, tech_headers) pairs of movie pages and random ones.
+
+    Pairs of the movie pages saved in `directory` (see `bench_extraction`) are
+    completed with `count` random pairs, built from the allocine headers, in
+    which headers may be missing, repeated or used as values. Pairs have two
+    different headers at least since the former version found no values at
+    all otherwise (its mask of the other headers was then an empty regex).
+    """
+
+    # SAVED MOVIE PAGES (fields extracted the way the spider does)
+    extractor = MovieExtractor()
+    pages = [extractor.extract(x.selector.root)
+             for x in load_responses(directory)]
+    samples = [(x['tech_data'], x['tech_headers']) for x in pages]
+
+    # RANDOM SAMPLES GENERATION
+    rand = random.Random(seed)
+    headers = ['Nationalités', 'Distributeur', 'Récompenses', 'Budget',
+               'Année de production', 'Langues', 'Couleur', 'Type de film',
+               'N° de Visa', 'Format production', 'Box Office France']
+    values = ['France', 'U.S.A.', 'Warner Bros. France', '2 prix',
+              '12 nominations', '2023', '150 000 000 $', '-', 'Français',
+              'Anglais', 'Couleur', 'Noir et Blanc', 'Long-métrage', '1,5']
+    for _ in range(count):
+        heads = rand.sample(headers, rand.randint(2, len(headers)))
+        heads += rand.sample(heads, min(len(heads), rand.randint(0, 1)))
+        data = [[x] + rand.sample(values, rand.randint(0, 3)) for x in heads]
+        samples.append((' ¤ '.join(sum(data, [])), '¤'.join(heads)))
+
+    # FUNCTION OUTPUT
+    return samples
+
+
+def compare(stage: str, legacy, current, samples: list, repeat: int):
+    """
+    Checks both functions give identical outputs then prints their timings.
+
+    Parameter(s):
+        stage       (str): Name of the cleaning stage (for display only).
+        legacy (function): Former implementation.
+        current(function): Current implementation.
+        samples    (list): Inputs of both functions.
+        repeat      (int): Number of benchmark repetitions.
+    """
+
+    # EQUIVALENCE CHECK
+    for sample in samples:
+        assert current(sample) == legacy(sample), sample
+
+    # BENCHMARK
+    for name, function in [('legacy', legacy), ('current', current)]:
+        elapsed = timeit.timeit(lambda: [function(x) for x in samples],
+                                number=repeat)
+        per_movie = elapsed / repeat / len(samples) * 1e6
+        print(f'{stage:>14} {name:>8}: {per_movie:8.1f} µs per movie')
+
+def run_stage(pipeline, stage: str, field: str):
+    """
+    Returns a function running a pipeline cleaning stage on a field value.
+    """
+
+    # FUNCTION OUTPUT
+    def function(value):
+        fields = {field: value}
+        getattr(pipeline, stage)(fields)
+        return fields[field]
+    return function
+
+
+if __name__ == '__main__':
+    # COMMAND LINE INTERFACE
+    parser = argparse.ArgumentParser(
+        description='Cleaning stages time (per movie).')
+    parser.add_argument('--samples', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--fixtures', help='Directory of saved movie pages. '
+                        'Synthetic pages are generated if not given.')
+    args = parser.parse_args()
+
+    # BASIC SETTINGS & INITIALIZATION
+    pipeline = MovieScraperPipeline()
+    metadata = metadata_samples(args.samples)
+
+    # STOP WORDS REMOVAL (see `get_place`)
+    compare('stopwords', legacy_drop_stopwords,
+            run_stage(pipeline, 'get_place', 'metadata'),
+            metadata, args.repeat)
+
+    # GENRES EXTRACTION AND REMOVAL (see `get_genres`)
+    pipeline.genre = set(mock_allocine.GENRES)
+    pipeline.genre_pattern = pipeline.compile_words(pipeline.genre)
+    genres = sorted(pipeline.genre, key=len, reverse=True)
+    def current_genres(text):
+        fields = {'metadata': text}
+        pipeline.get_genres(fields)
+        found = (fields['categories'] or '').split('¤')
+        return sorted(filter(None, found)), fields['metadata']
+    compare('genres', lambda x: legacy_genres(x, genres), current_genres,
+            metadata, args.repeat)
+
+    # DATES PARSING (see `queries.parse_date`, cache disabled then enabled)
+    dates = date_samples(args.samples)
+    compare('dates', legacy_parse_date, queries.parse_date.__wrapped__,
+            dates, 1)
+    compare('dates (cached)', legacy_parse_date, queries.parse_date, dates, 1)
+
+    # TECHNICAL DATA EXTRACTION (see `clean_technnical`, values compared as
+    # sets since the former version gave them in random order)
+    directory = args.fixtures or tempfile.mkdtemp()
+    if not args.fixtures:
+        mock_allocine.save_fixtures(directory, count=100)
+    technical = technical_samples(directory, args.samples)
+    def current_technical(sample):
+        fields = dict(zip(['tech_data', 'tech_headers'], sample))
+        pipeline.clean_technnical(fields)
+        return {x: set((fields[x] or '').split('¤')) - {''}
+                for x in pipeline.technical}
+    compare('technical', lambda x: legacy_technical(pipeline, *x),
+            current_technical, technical, args.repeat)
@@ -0,0 +1,81 @@
+import argparse, resource, time
+from scrapy import signals
+from scrapy.crawler import CrawlerProcess
+from scrapy.utils.project import get_project_settings
+from Movies.spiders.movies_spider import MoviesSpiderSpider
+from benchmarks import mock_allocine
+
+
+def run(pages: int, latency: float, limit: int, pipelines: bool,
+        capacity: int = None, delay: float = 0, throttle: bool = True,
+        **spider_args):
+    """
+    Crawls the mock allocine server and returns (items, elapsed seconds).
+
+    Parameter(s):
+        pages       (int): Number of listing pages served by the mock server.
+        latency   (float): Latency (seconds) of every mock server answer.
+        limit       (int): Spider `limit` (number of movies to scrap).
+        pipelines  (bool): Whether to run the project item pipelines.
+        capacity    (int): Concurrent requests the mock server can handle.
+        delay     (float): `DOWNLOAD_DELAY` (start delay if throttled).
+        throttle   (bool): Whether to use the adaptive throttle.
+        **spider_args    : Any additional spider argument.
+    """
+
+    # BASIC SETTINGS & INITIALIZATION
+    server = mock_allocine.serve(pages=pages, latency=latency,
+                                 capacity=capacity)
+    root = f'http://127.0.0.1:{server.server_port}'
+    settings = get_project_settings()
+    settings.set('DOWNLOAD_DELAY', delay)
+    settings.set('THROTTLE_ENABLED', throttle)
+    settings.set('LOG_LEVEL', 'ERROR')
+    if not pipelines:
+        settings.set('ITEM_PIPELINES', {})
+
+    # COUNTS SCRAPED ITEMS THROUGH SCRAPY SIGNALS
+    counter = {'items': 0}
+    def count(item, response, spider):
+        counter['items'] += 1
+
+    # CRAWLING PROCESS
+    process = CrawlerProcess(settings)
+    crawler = process.create_crawler(MoviesSpiderSpider)
+    crawler.signals.connect(count, signal=signals.item_scraped)
+    start = time.perf_counter()
+    process.crawl(crawler,
+                  start_urls=[f'{root}/films/'],
+                  allowed_domains=['127.0.0.1'],
+                  limit=limit,
+                  **spider_args)
+    process.start()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    # FUNCTION OUTPUT
+    return counter['items'], elapsed
+
+
+if __name__ == '__main__':
+    # COMMAND LINE INTERFACE
+    parser = argparse.ArgumentParser(
+        description='Crawl throughput (items/sec) against a mock allocine.')
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--limit', type=int, default=150)
+    parser.add_argument('--pipelines', action='store_true')
+    parser.add_argument('--capacity', type=int)
+    parser.add_argument('--delay', type=float, default=0)
+    parser.add_argument('--no-throttle', dest='throttle', action='store_false')
+    parser.add_argument('-a', dest='spider_args', action='append', default=[],
+                        metavar='NAME=VALUE', help='Spider argument')
+    args = parser.parse_args()
+
+    spider_args = dict(arg.split('=', 1) for arg in args.spider_args)
+    items, elapsed = run(args.pages, args.latency, args.limit, args.pipelines,
+                         args.capacity, args.delay, args.throttle,
+                         **spider_args)
+    print(f'{items} items in {elapsed:.2f}s >>> {items / elapsed:.1f} items/sec')
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'Peak RSS: {rss:.0f} MB')
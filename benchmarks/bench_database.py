@@ -0,0 +1,214 @@
+import argparse, os, shutil, sqlite3, tempfile, time, regex as re
+import sqlalchemy.exc as alchemyError
+from sqlalchemy import event
+from scrapy.settings import Settings
+from types import SimpleNamespace
+from Databases import queries, schema
+from Movies.pipelines import MovieDataBasePipeline, MovieScraperPipeline
+from benchmarks import mock_allocine
+from benchmarks.bench_pipeline import raw_items
+
+# Database content by natural keys (`Id` depend on the insertion order)
+CONTENT = {
+    'movies': "SELECT * FROM movies",
+    'persons': "SELECT Full_Name FROM persons",
+    'companies': "SELECT Full_Name FROM companies",
+    'genres': "SELECT Title_Fr, Genre FROM genres JOIN movies ON Id = MovieId",
+    'countries': "SELECT Title_Fr, Country FROM countries "
+                 "JOIN movies ON Id = MovieId",
+    'languages': "SELECT Title_Fr, Language FROM languages "
+                 "JOIN movies ON Id = MovieId",
+    'distributors': "SELECT m.Title_Fr, c.Full_Name FROM distributors "
+                    "JOIN movies m ON m.Id = MovieId "
+                    "JOIN companies c ON c.Id = CompId"}
+CONTENT.update({table: f"SELECT m.Title_Fr, p.Full_Name{extra} FROM {table} "
+                       f"JOIN movies m ON m.Id = MovieId "
+                       f"JOIN persons p ON p.Id = PersonId"
+                for table, extra in [('actors', ', Characters'),
+                                     ('directors', ''),
+                                     ('screenwriters', '')]})
+
+
+class LegacyDataBasePipeline(MovieDataBasePipeline):
+    """
+    Former saving process (one transaction per row: movie, name, genre, etc.)
+    """
+
+    def process_item(self, item, spider):
+        # FILLING OF PRIMARY TABLES (then retrieving their `Id`)
+        record = self.get_record(item)
+        movie = record['movie']
+        message = f"`{movie['Title_Fr']}` is already in the database!"
+        self.add_and_commit(schema.Movies(**movie), warner=message)
+        movie_id = queries.get_movie_id(movie['Title_Fr'],
+                                        movie['Release_Date'], self.session)
+        for name in record['persons']:
+            self.add_and_commit(schema.Persons(Full_Name=name))
+        persons = queries.get_persons_id(record['persons'], self.session)
+        for name in record['companies']:
+            self.add_and_commit(schema.Companies(Full_Name=name))
+        companies = queries.get_companies_id(record['companies'],
+                                             self.session)
+
+        # FILLING DEPENDENT AND ASSOCIATION TABLES
+        rows = [table(MovieId=movie_id, **{column: value})
+                for field, (table, column) in self.dependents.items()
+                for value in record[field]]
+        rows += [schema.Actors(MovieId=movie_id, PersonId=persons[name],
+                               Characters=role)
+                 for name, role in record['casting'].items()]
+        rows += [schema.Directors(MovieId=movie_id, PersonId=persons[name])
+                 for name in record['directors']]
+        rows += [schema.ScreenWriters(MovieId=movie_id, PersonId=persons[name])
+                 for name in record['screenwriters']]
+        rows += [schema.Distributors(MovieId=movie_id, CompId=comp_id)
+                 for comp_id in companies.values()]
+        for row in rows:
+            self.add_and_commit(row)
+
+        # RECORDS THE MOVIE AS SEEN
+        self.seen_movies.add(record['allocine_id'])
+        return item
+
+    def add_and_commit(self, row, warner=None):
+        self.session.add(row)
+        try:
+            self.session.commit()
+        except alchemyError.IntegrityError:
+            self.session.rollback()
+            if warner:
+                print(warner)
+
+def clean_items(count: int, actors: int, people: int = 0):
+    """
+    Returns `count` clean items (see `bench_pipeline.raw_items`).
+
+    Parameter(s):
+        count  (int): Number of items.
+        actors (int): Number of actors per movie.
+        people (int): Number of distinct people over all movies (actors,
+                      directors, etc. are picked out of this crowd if given,
+                      instead of all being different people).
+    """
+
+    # CLEANING PROCESS
+    cleaner = MovieScraperPipeline.from_vocabularies(
+        '¤'.join(mock_allocine.GENRES), '¤'.join(mock_allocine.COUNTRIES))
+    items = [cleaner.clean(dict(x)) for x in raw_items(count, actors)]
+
+    # PEOPLE OUT OF A CROWD (the same actors, directors, etc. come again)
+    person = lambda seed: mock_allocine.person(seed % people)
+    for number, item in enumerate(items):
+        if people:
+            item['casting'] = {person(number * 7 + x * 13): role
+                               for x, role in enumerate(
+                                   item['casting'].values())}
+            item['directors'] = person(number * 3)
+            item['screenwriters'] = person(number * 5)
+            item['distributors'] = f'{person(number % 50)} Films'
+
+    # FUNCTION OUTPUT
+    return items
+
+def run(pipeline, items: list, directory: str, settings: dict):
+    """
+    Saves items into the database of a directory (created if required).
+
+    Returns the seconds, the number of SQL statements and the number of them
+    dealing with names (`persons` and `companies` tables) per item.
+
+    Only the pipeline methods are timed (i.e. the time the crawl waits for
+    the database), closing included since it saves the last batch.
+
+    Parameter(s):
+        pipeline (MovieDataBasePipeline): Pipeline to benchmark.
+        items      (list): Clean items to save.
+        directory   (str): Directory of the database (`movies.db`).
+        settings   (dict): Settings of the crawl (ex: `DB_BATCH_SIZE`).
+    """
+
+    # BASIC SETTINGS & INITIALIZATION (the database is in the current dir.)
+    os.chdir(directory)
+    spider = SimpleNamespace(settings=Settings(
+        {'SEEN_MOVIES_FILE': '', **settings}))
+    pipeline.open_spider(spider)
+
+    # COUNTS SQL STATEMENTS (a statement executed with many rows counts once)
+    counts = [0, 0]
+    def count(connection, cursor, statement, *args):
+        counts[0] += 1
+        counts[1] += bool(re.search(r'(?i)\b(?:into|from) (?:persons|'
+                                    r'companies)\b', statement))
+    event.listen(pipeline.session.get_bind(), 'before_cursor_execute', count)
+
+    # SAVING PROCESS
+    start = time.perf_counter()
+    for item in items:
+        pipeline.process_item(item, spider)
+    pipeline.close_spider(spider)
+    elapsed = time.perf_counter() - start
+
+    # FUNCTION OUTPUT
+    return elapsed / len(items), counts[0] / len(items), counts[1] / len(items)
+
+def dump(path: str):
+    """Returns the content of a movie database (see `CONTENT`)."""
+
+    with sqlite3.connect(path) as database:
+        return {table: sorted(database.execute(query).fetchall(), key=repr)
+                for table, query in CONTENT.items()}
+
+
+if __name__ == '__main__':
+    # COMMAND LINE INTERFACE
+    parser = argparse.ArgumentParser(
+        description='Database time per item: former row by row commits '
+                    'against batched bulk inserts and cached names.')
+    parser.add_argument('--items', type=int, default=200)
+    parser.add_argument('--actors', type=int, default=30)
+    parser.add_argument('--people', type=int, default=1000,
+                        help='Distinct people over all movies (0: all).')
+    parser.add_argument('--batch', type=int, default=100,
+                        help='Items per transaction (`DB_BATCH_SIZE`).')
+    parser.add_argument('--directory', default='.',
+                        help='Where to create databases (fsync matters).')
+    args = parser.parse_args()
+
+    # BASIC SETTINGS & INITIALIZATION (two crawls, i.e. two halves of items)
+    items = clean_items(args.items, args.actors, args.people)
+    crawls = [('1st crawl', items[:len(items) // 2]),
+              ('next crawl', items[len(items) // 2:])]
+    cwd = os.getcwd()
+
+    # BENCHMARK (all databases must end up the same)
+    # >>> `insert+query`: batches saved without `RETURNING` (i.e. INSERT
+    #     statements skipping existing rows followed by queries of `Id`)
+    # >>> `cached`: `returning` along with `Id` caches (warmed on start)
+    contents, times, returns = [], {}, queries.returns
+    for name, pipeline, cache in [
+            ('legacy', LegacyDataBasePipeline, 0),
+            ('insert+query', MovieDataBasePipeline, 0),
+            ('returning', MovieDataBasePipeline, 0),
+            ('cached', MovieDataBasePipeline, 100000)]:
+        queries.returns = (returns if name in ('returning', 'cached')
+                           else lambda x: False)
+        settings = {'DB_BATCH_SIZE': args.batch, 'DB_ID_CACHE_SIZE': cache}
+        directory = tempfile.mkdtemp(dir=os.path.abspath(args.directory))
+        try:
+            for crawl, part in crawls:
+                instance = pipeline()
+                seconds, statements, lookups = run(instance, part, directory,
+                                                   settings)
+                rates = [x.hit_rate() for x in instance.caches.values()]
+                times[name] = seconds
+                print(f'{name:>12} ({crawl:>10}): {seconds * 1000:8.2f} ms, '
+                      f'{statements:6.2f} SQL statements ({lookups:5.2f} for '
+                      f'names) per item' + (f', hit rates {rates}' if rates
+                                            else ''))
+            contents.append(dump(os.path.join(directory, 'movies.db')))
+        finally:
+            os.chdir(cwd)
+            schema.dispose() # Closes the pooled connections
+            shutil.rmtree(directory)
+    assert all(content == contents[0] for content in contents)
+    print(f'speedup (next crawl): {times["legacy"] / times["cached"]:8.1f}x')
@@ -0,0 +1,133 @@
+import argparse, glob, os, tempfile, timeit, regex as re
+from scrapy.http import HtmlResponse
+from Movies.extractors import MovieExtractor
+from Movies.pipelines import MovieScraperPipeline
+from benchmarks import mock_allocine
+
+
+def legacy_extract(response):
+    """
+    Former `parse_movie` extraction (one full page XPath query per field).
+    """
+
+    # BASIC SETTINGS & INITIALIZATION OR FEATURES
+    grab = lambda x: "¤".join(response.xpath(x).getall())
+    tech ="//section[contains(@class, 'technical')]"
+    meta = "//div[contains(@class, 'card') and contains(@class, 'entity')]"
+
+    # IMPLEMENTING DATA PATHS FOR PURELY TEXT VALUES
+    paths = {
+        'title' : f"{meta}//div[@class='meta-body-item']",
+        'ratings': f"{meta}//div[contains(@class, 'rating')]",
+        'title_fr': "//h1",
+        'synopsis': "//section[starts-with(@id, 'synopsis')]//p",
+        'creators': f"{meta}//div[contains(@class, 'oneline')]",
+        'metadata': f"{meta}//div[contains(@class, 'info')]",
+        'tech_data': f"{tech}//div[@class='item']",
+        'tech_headers': f"{tech}//span[contains(@class, 'light')]"}
+
+    # IMPLEMENTING DATA PATHS FOR TAG ATTRIBUTES
+    attributes = {'film_poster': f"{meta}//figure//img/@src"}
+
+    # RETRIEVING MOVIE GENERAL DATA
+    data = {key: grab(f'{path}//text()') for key, path in paths.items()}
+    data.update({key: grab(path) for key, path in attributes.items()})
+    return data
+
+def legacy_casting(pipeline, response):
+    """
+    Former casting extraction (raw html) and cleaning (one regex per actor).
+    """
+
+    # EXTRACTION (raw html of the casting section)
+    path = "//section[contains(@class, 'casting-actor')]"
+    casting = "¤".join(response.xpath(path).getall())
+
+    # BASIC SETTINGS & INITIALIZATION OF THE CLEANING
+    roles = {}
+    del_role_txt = r'(?i)r[oô]le\s*:*\s*'
+    actors_regex = r'(?i)(?<=link[^>]*>)[^<]*'
+    roles_regexp = r'(?i)(?<={}.*light[^>]*>)[^<]*'.format
+    casting = re.sub(del_role_txt, '', pipeline.flatten(casting))
+
+    # CLEANING PROCESS (actors then their role)
+    for actor in pipeline.get_all(actors_regex, casting):
+        role = pipeline.get_first(roles_regexp(actor), casting)
+        roles[actor] = role.strip(' <>¤') if role else None
+
+    # FUNCTION OUTPUT
+    return roles
+
+def load_responses(directory: str, casting: bool = False):
+    """
+    Returns parsed scrapy responses of the movie pages of a directory.
+
+    Parameter(s):
+        directory (str): Directory of the saved pages.
+        casting  (bool): Whether to load casting pages instead of movie ones.
+    """
+
+    # LOADING PROCESS
+    responses = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        if path.endswith('_casting.html') != casting:
+            continue
+        with open(path, 'rb') as file:
+            response = HtmlResponse(url=f'https://allocine.fr/{path}',
+                                    body=file.read(), encoding='utf-8')
+        response.selector # Parses the page once for all (not benchmarked)
+        responses.append(response)
+
+    # FUNCTION OUTPUT
+    return responses
+
+
+if __name__ == '__main__':
+    # COMMAND LINE INTERFACE
+    parser = argparse.ArgumentParser(
+        description='Movie page field extraction time (per movie).')
+    parser.add_argument('--fixtures', help='Directory of saved movie pages. '
+                        'Synthetic pages are generated if not given.')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--actors', type=int, default=20,
+                        help='Number of actors per synthetic casting page.')
+    args = parser.parse_args()
+
+    # FIXTURES LOADING (or generation)
+    directory = args.fixtures or tempfile.mkdtemp()
+    if not args.fixtures:
+        mock_allocine.save_fixtures(directory, count=100,
+                                    actors=args.actors)
+    responses = load_responses(directory)
+
+    # EQUIVALENCE CHECK
+    extractor = MovieExtractor()
+    compiled_extract = lambda x: extractor.extract(x.selector.root)
+    for response in responses:
+        assert compiled_extract(response) == legacy_extract(response)
+
+    # BENCHMARK
+    for name, function in [('legacy', legacy_extract),
+                           ('compiled', compiled_extract)]:
+        elapsed = timeit.timeit(lambda: [function(x) for x in responses],
+                                number=args.repeat)
+        per_movie = elapsed / args.repeat / len(responses) * 1e6
+        print(f'{name:>8}: {per_movie:8.1f} µs per movie')
+
+    # CASTING EXTRACTION AND CLEANING (equivalence check then benchmark)
+    pipeline = MovieScraperPipeline()
+    castings = load_responses(directory, casting=True)
+    def structured_casting(response):
+        casting = extractor.extract_casting(response.selector.root)
+        fields = {'casting': casting}
+        pipeline.clean_casting(fields)
+        return fields['casting']
+    for response in castings:
+        assert structured_casting(response) == legacy_casting(pipeline,
+                                                              response)
+    for name, function in [('legacy', lambda x: legacy_casting(pipeline, x)),
+                           ('lxml', structured_casting)]:
+        elapsed = timeit.timeit(lambda: [function(x) for x in castings],
+                                number=1)
+        per_movie = elapsed / len(castings) * 1e6
+        print(f'casting {name:>8}: {per_movie:8.1f} µs per movie')
@@ -0,0 +1,105 @@
+import argparse, random, timeit, regex as re
+from Movies.pipelines import MovieScraperPipeline
+from benchmarks import mock_allocine
+
+# Property-based testing is optional (seeded random strings otherwise)
+try:
+    from hypothesis import given, settings, strategies as st
+except ImportError:
+    given = None
+
+# Characters both implementations handle differently if anything is wrong
+ALPHABET = ' ¤,.-|\'"\t\n\r\x0b\x0c\xa0 　aZé09'
+
+
+def legacy_flatten(txt: str, commas: bool = True):
+    """
+    Former `flatten` (4 to 5 successive substitutions on the whole string).
+    """
+
+    # SETTING UP REGEXES TO BE APPLIED SUCCESSIVELY
+    regexes = [r'(?<!\d),(?!\d)'] if commas else []
+    regexes += [r'[^ \S]', r'\s*¤+\s*', r'¤+\W*¤+']
+
+    # FLATTENING & CLEANING PROCESS
+    for regex in regexes:
+        txt = re.sub(regex, '¤', txt)
+
+    # FUNCTION OUTPUT
+    return re.sub(r'\s+', ' ', txt)
+
+def random_samples(count: int, seed: int = 0):
+    """Returns `count` random strings made of the `ALPHABET` characters."""
+
+    rand = random.Random(seed)
+    return [''.join(rand.choices(ALPHABET, k=rand.randint(0, 40)))
+            for _ in range(count)]
+
+def check_equivalence(flatten, examples: int):
+    """
+    Checks `flatten` gives the very same outputs as the former version.
+
+    Strings are generated by hypothesis if installed (shrunk to the smallest
+    failing string on error), and randomly otherwise.
+
+    Parameter(s):
+        flatten (function): Current implementation.
+        examples     (int): Number of generated strings per commas mode.
+    """
+
+    # PROPERTY-BASED CHECK
+    if given is not None:
+        @settings(max_examples=examples, deadline=None)
+        @given(st.text(alphabet=ALPHABET) | st.text(), st.booleans())
+        def prop(txt, commas):
+            assert flatten(txt, commas) == legacy_flatten(txt, commas)
+        return prop()
+
+    # RANDOM CHECK (hypothesis not installed)
+    for txt in random_samples(examples):
+        for commas in (True, False):
+            assert flatten(txt, commas) == legacy_flatten(txt, commas), txt
+
+def corpus(count: int):
+    """
+    Returns strings looking like flattened fields (movie and casting pages).
+
+    Pages are joined on their text nodes with '¤' the way spider fields are.
+    """
+
+    # BASIC SETTINGS & INITIALIZATION
+    text = lambda html: '¤'.join(re.split(r'<[^>]*>', html))
+
+    # CORPUS GENERATION
+    return [text(page(1000 + x)) for x in range(count)
+            for page in (mock_allocine.movie_page,
+                         lambda x: mock_allocine.casting_page(x, 20))]
+
+
+if __name__ == '__main__':
+    # COMMAND LINE INTERFACE
+    parser = argparse.ArgumentParser(
+        description='flatten equivalence check and throughput (MB/s).')
+    parser.add_argument('--examples', type=int, default=20000)
+    parser.add_argument('--pages', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    # EQUIVALENCE CHECK
+    flatten = MovieScraperPipeline().flatten
+    check_equivalence(flatten, args.examples)
+    samples = corpus(args.pages)
+    for commas in (True, False):
+        for sample in samples:
+            assert flatten(sample, commas) == legacy_flatten(sample, commas)
+
+    # BENCHMARK
+    size = sum(len(x.encode()) for x in samples) / 1e6
+    for commas in (True, False):
+        for name, function in [('legacy', legacy_flatten),
+                               ('current', flatten)]:
+            elapsed = timeit.timeit(
+                lambda: [function(x, commas) for x in samples],
+                number=args.repeat)
+            rate = size * args.repeat / elapsed
+            print(f'commas={commas!s:>5} {name:>8}: {rate:8.1f} MB/s')
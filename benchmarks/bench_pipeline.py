@@ -0,0 +1,117 @@
+import argparse, os, time
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+from twisted.internet import defer, task
+from Movies.extractors import MovieExtractor
+from Movies.items import MoviesItem
+from Movies.pipelines import MovieScraperPipeline
+from Movies.spiders.movies_spider import MoviesSpiderSpider
+from benchmarks import mock_allocine
+
+
+def raw_items(count: int, actors: int):
+    """
+    Returns `count` raw movie items as scraped from synthetic pages.
+
+    Parameter(s):
+        count  (int): Number of items.
+        actors (int): Number of actors per casting page.
+    """
+
+    # BASIC SETTINGS & INITIALIZATION
+    extractor = MovieExtractor()
+    root = lambda html: HtmlResponse(url='https://allocine.fr', body=html,
+                                     encoding='utf-8').selector.root
+
+    # SCRAPING PROCESS (the way `parse_movie` and `parse_casting` do)
+    items = []
+    for movie_id in range(1000, 1000 + count):
+        page = root(mock_allocine.movie_page(movie_id))
+        item = MoviesItem(allocine_id=movie_id, **extractor.extract(page))
+        item['structured'] = extractor.extract_structured(page)
+        item['casting'] = extractor.extract_casting(
+            root(mock_allocine.casting_page(movie_id, actors)))
+        items.append(item)
+
+    # FUNCTION OUTPUT
+    return items
+
+@defer.inlineCallbacks
+def run(items: list, workers: int):
+    """
+    Cleans items with the given number of workers. Returns the throughput.
+
+    Items are handed over one by one to the pipeline the way scrapy does
+    (i.e. along with other reactor tasks). The longest time the reactor was
+    blocked is measured by a looping call ticking every millisecond.
+
+    Parameter(s):
+        items  (list): Raw items to clean (the first one warms workers up).
+        workers (int): Value of the `CLEANING_WORKERS` setting.
+
+    Returns: items/sec, the longest reactor stall (seconds) and clean items
+    """
+
+    # BASIC SETTINGS & INITIALIZATION
+    crawler = get_crawler(MoviesSpiderSpider, {'CLEANING_WORKERS': workers})
+    spider = MoviesSpiderSpider.from_crawler(crawler)
+    spider.genre = '¤'.join(mock_allocine.GENRES)
+    spider.country = '¤'.join(mock_allocine.COUNTRIES)
+    pipeline = MovieScraperPipeline()
+    clean = lambda x: defer.maybeDeferred(pipeline.process_item, x, spider)
+    yield clean(MoviesItem(items[0])) # Workers are started on 1st item
+
+    # REACTOR STALLS MONITORING
+    ticks = [time.perf_counter()]
+    stall = [0]
+    def tick():
+        stall[0] = max(stall[0], time.perf_counter() - ticks[-1])
+        ticks.append(time.perf_counter())
+    monitor = task.LoopingCall(tick)
+    monitor.start(0.001)
+
+    # CLEANING PROCESS (one item handed over per reactor iteration)
+    start = time.perf_counter()
+    cleaned = []
+    def feed():
+        for item in items:
+            cleaned.append(clean(MoviesItem(item)))
+            yield
+    yield task.cooperate(feed()).whenDone()
+    cleaned = yield defer.gatherResults(cleaned, consumeErrors=True)
+    elapsed = time.perf_counter() - start
+
+    # FUNCTION OUTPUT
+    monitor.stop()
+    pipeline.close_spider(spider)
+    return len(items) / elapsed, stall[0], [dict(x) for x in cleaned]
+
+@defer.inlineCallbacks
+def main(reactor, args):
+    # BASIC SETTINGS & INITIALIZATION
+    items = raw_items(args.items, args.actors)
+    counts = args.workers or sorted({0, 1, 2, os.cpu_count() or 1})
+    print(f'{os.cpu_count()} cores, {len(items)} items')
+
+    # BENCHMARK (items must be cleaned the same way whatever the workers)
+    reference = None
+    for workers in counts:
+        rate, stall, cleaned = yield run(items, workers)
+        reference = reference or cleaned
+        assert cleaned == reference
+        print(f'{workers:>2} workers: {rate:8.1f} items/sec, longest reactor '
+              f'stall {stall * 1000:6.1f} ms')
+
+
+if __name__ == '__main__':
+    # COMMAND LINE INTERFACE
+    parser = argparse.ArgumentParser(
+        description='Cleaning throughput (items/sec) against worker count.')
+    parser.add_argument('--items', type=int, default=500)
+    parser.add_argument('--actors', type=int, default=200)
+    parser.add_argument('--workers', type=int, nargs='*',
+                        help='Worker counts to try (default: 0, 1, 2, cores)')
+    args = parser.parse_args()
+
+    # BENCHMARK RUN (within the twisted reactor)
+    task.react(main, [args])
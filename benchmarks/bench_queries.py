@@ -0,0 +1,86 @@
+import argparse, os, shutil, tempfile, time
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from Databases import queries, schema
+from benchmarks import mock_allocine
+
+
+def legacy_db_connect(url: str = "sqlite:///./movies.db", **kwargs):
+    """
+    Former `schema.db_connect` (a new engine and schema checks on each call).
+    """
+
+    engine = create_engine(url, **kwargs)
+    schema.MovieDB.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+def fill(people: int):
+    """
+    Creates the database of the current directory with `people` persons.
+
+    Returns their full names.
+    """
+
+    # FILLING PROCESS
+    names = [mock_allocine.person(x) for x in range(people)]
+    session = schema.db_connect()()
+    session.add_all(schema.Persons(Full_Name=name) for name in names)
+    session.commit()
+    session.close()
+
+    # FUNCTION OUTPUT
+    return names
+
+def run(names: list, calls: int):
+    """
+    Calls `queries.get_persons_id` without a session (i.e. the session is
+    given by `queries.manage_session`). Returns the seconds per call.
+
+    Parameter(s):
+        names (list): Full names requested in turn, one per call.
+        calls  (int): Number of calls.
+    """
+
+    # QUERYING PROCESS (the results must be those of the database)
+    start = time.perf_counter()
+    for number in range(calls):
+        name = names[number % len(names)]
+        assert queries.get_persons_id(name) == {
+            name: number % len(names) + 1}
+    return (time.perf_counter() - start) / calls
+
+
+if __name__ == '__main__':
+    # COMMAND LINE INTERFACE
+    parser = argparse.ArgumentParser(
+        description='Time per query given its own session: former engine '
+                    'per call against the engines registry.')
+    parser.add_argument('--calls', type=int, default=10000)
+    parser.add_argument('--people', type=int, default=1000,
+                        help='Persons in the database.')
+    parser.add_argument('--directory', default='.',
+                        help='Where to create the database.')
+    args = parser.parse_args()
+
+    # BASIC SETTINGS & INITIALIZATION (the database is in the current dir.)
+    cwd = os.getcwd()
+    directory = tempfile.mkdtemp(dir=args.directory)
+    os.chdir(directory)
+
+    # BENCHMARK (`manage_session` calls `schema.db_connect` on each query)
+    times = {}
+    db_connect = schema.db_connect
+    try:
+        names = fill(args.people)
+        for name, connect in [('legacy', legacy_db_connect),
+                              ('registry', db_connect)]:
+            schema.db_connect = connect
+            times[name] = run(names, args.calls)
+            print(f'{name:>8}: {times[name] * 1e6:9.1f} µs per '
+                  f'`get_persons_id` call ({args.calls} calls)')
+    finally:
+        schema.db_connect = db_connect
+        os.chdir(cwd)
+        schema.dispose() # Closes the pooled connections
+        shutil.rmtree(directory)
+    print(f' speedup: {times["legacy"] / times["registry"]:9.1f}x')
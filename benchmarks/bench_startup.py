@@ -0,0 +1,73 @@
+import argparse, os, subprocess, sys, regex as re
+
+# Project modules and the libraries any crawl imports anyway (the floor)
+MODULES = ['Movies.pipelines', 'Movies.spiders.movies_spider',
+           'Movies.archive', 'Movies.reclean', 'Databases.queries']
+FLOOR = 'scrapy, sqlalchemy.orm'
+
+
+def import_times(module: str):
+    """
+    Imports a module in a fresh interpreter with `python -X importtime`.
+
+    Returns {imported module: (self time, cumulative time)} in microseconds.
+
+    Parameter(s):
+        module (str): Dotted name(s) of the module(s) to import.
+    """
+
+    # IMPORTING PROCESS (cold start, i.e. a brand new interpreter)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        [os.getcwd(), os.environ.get('PYTHONPATH', '')]))
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c',
+                             f'import {module}'], env=env, check=True,
+                            capture_output=True, text=True).stderr
+
+    # PARSING PROCESS (lines as 'import time: self | cumulative | name')
+    times = {}
+    for line in stderr.splitlines():
+        if match := re.match(r'import time:\s*(\d+)\s*\|\s*(\d+)\s*\|\s*(.+)',
+                             line):
+            times[match[3]] = (int(match[1]), int(match[2]))
+
+    # FUNCTION OUTPUT
+    return times
+
+def best_of(module: str, repeat: int):
+    """Returns the import times of the fastest of `repeat` cold imports."""
+
+    runs = [import_times(module) for _ in range(repeat)]
+    return min(runs, key=total)
+
+def total(times: dict):
+    """Returns the time (ms) spent importing the given modules."""
+
+    return sum(own for own, _ in times.values()) / 1000
+
+
+if __name__ == '__main__':
+    # COMMAND LINE INTERFACE
+    parser = argparse.ArgumentParser(
+        description='Cold start import time of the project modules.')
+    parser.add_argument('modules', nargs='*', default=MODULES)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8,
+                        help='Number of slowest imports (self time) listed.')
+    parser.add_argument('--target', type=float, default=300,
+                        help='Import time (ms) allowed over the floor.')
+    args = parser.parse_args()
+
+    # FLOOR (libraries a crawl requires whatever the project does)
+    floor = best_of(FLOOR, args.repeat)
+    print(f'{"floor":>30}: {total(floor):7.1f} ms ({FLOOR})')
+
+    # BENCHMARK (project overhead = modules the floor does not import)
+    for module in args.modules:
+        times = best_of(module, args.repeat)
+        extra = {k: v for k, v in times.items() if k not in floor}
+        status = 'ok' if total(extra) <= args.target else 'SLOW'
+        print(f'{module:>30}: {total(times):7.1f} ms, {total(extra):7.1f} ms '
+              f'over the floor [{status}]')
+        slowest = sorted(extra.items(), key=lambda x: -x[1][0])[:args.top]
+        for name, (own, _) in slowest:
+            print(f'{"":>32}{own / 1000:7.1f} ms  {name}')
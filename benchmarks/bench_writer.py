@@ -0,0 +1,120 @@
+import argparse, gc, os, shutil, tempfile, time
+from sqlalchemy import event
+from scrapy.utils.test import get_crawler
+from twisted.internet import defer, task
+from Databases import schema
+from Movies.pipelines import MovieDataBasePipeline
+from Movies.spiders.movies_spider import MoviesSpiderSpider
+from benchmarks.bench_database import clean_items
+
+
+@defer.inlineCallbacks
+def run(items: list, settings: dict, latency: float, rate: float):
+    """
+    Saves items into a brand new database. Returns the throughput.
+
+    Items are handed over one by one to the pipeline the way scrapy does
+    (i.e. along with other reactor tasks), at the pace of a crawl. The
+    longest time the reactor was blocked is measured by a looping call
+    ticking every millisecond.
+
+    Parameter(s):
+        items     (list): Clean items to save.
+        settings  (dict): Settings of the crawl (ex: `DB_WRITER_QUEUE`).
+        latency  (float): Seconds added to every SQL statement (ex: to mimic
+                          a remote database).
+        rate     (float): Items scraped per second.
+
+    Returns: items/sec, the longest reactor stall (seconds) and the number
+             of items which waited for room in the writer queue
+    """
+
+    # BASIC SETTINGS & INITIALIZATION (the database is in the current dir.)
+    from twisted.internet import reactor
+    crawler = get_crawler(MoviesSpiderSpider,
+                          {'SEEN_MOVIES_FILE': '', **settings})
+    spider = MoviesSpiderSpider.from_crawler(crawler)
+    pipeline = MovieDataBasePipeline()
+    pipeline.open_spider(spider)
+
+    # SIMULATED ROUND TRIPS (every statement waits for `latency` seconds)
+    event.listen(pipeline.session_maker.kw['bind'], 'before_cursor_execute',
+                 lambda *args: time.sleep(latency))
+
+    # REACTOR STALLS MONITORING
+    ticks = [time.perf_counter()]
+    stall = [0]
+    def tick():
+        stall[0] = max(stall[0], time.perf_counter() - ticks[-1])
+        ticks.append(time.perf_counter())
+    monitor = task.LoopingCall(tick)
+    monitor.start(0.001)
+
+    # SAVING PROCESS (one item handed over every 1/rate second)
+    start = time.perf_counter()
+    saved = []
+    def feed():
+        for item in items:
+            saved.append(defer.maybeDeferred(pipeline.process_item, item,
+                                             spider))
+            yield task.deferLater(reactor, 1 / rate, lambda: None)
+    yield task.cooperate(feed()).whenDone()
+    yield defer.gatherResults(saved, consumeErrors=True)
+    yield defer.maybeDeferred(pipeline.close_spider, spider)
+    elapsed = time.perf_counter() - start
+
+    # FUNCTION OUTPUT
+    monitor.stop()
+    full = crawler.stats.get_value('db/writer/queue_full', 0)
+    return len(items) / elapsed, stall[0], full
+
+@defer.inlineCallbacks
+def main(reactor, args):
+    # BASIC SETTINGS & INITIALIZATION
+    items = clean_items(args.items, args.actors, args.people)
+    gc.freeze() # Items are left out of (long) garbage collections
+    cwd = os.getcwd()
+
+    # BENCHMARK (in the crawling thread then with writer threads, the small
+    # queue being full most of the time)
+    for queue in (0, args.queue, args.small_queue):
+        directory = tempfile.mkdtemp(dir=args.directory)
+        os.chdir(directory)
+        try:
+            rate, stall, full = yield run(items, {'DB_WRITER_QUEUE': queue,
+                                            'DB_BATCH_SIZE': args.batch},
+                                    args.latency / 1000, args.rate)
+        finally:
+            os.chdir(cwd)
+            schema.dispose() # Closes the pooled connections
+            shutil.rmtree(directory)
+        mode = f'writer thread (queue {queue})' if queue else 'crawl thread'
+        print(f'{mode:>26}: {rate:8.1f} items/sec, longest reactor stall '
+              f'{stall * 1000:7.1f} ms, {full:4d} items waited for room')
+
+
+if __name__ == '__main__':
+    # COMMAND LINE INTERFACE
+    parser = argparse.ArgumentParser(
+        description='Reactor stalls due to the database, with and without '
+                    'the writer thread.')
+    parser.add_argument('--items', type=int, default=300)
+    parser.add_argument('--actors', type=int, default=30)
+    parser.add_argument('--people', type=int, default=1000,
+                        help='Distinct people over all movies (0: all).')
+    parser.add_argument('--batch', type=int, default=20,
+                        help='Items per transaction (`DB_BATCH_SIZE`).')
+    parser.add_argument('--queue', type=int, default=100,
+                        help='Size of the writer queue (`DB_WRITER_QUEUE`).')
+    parser.add_argument('--small-queue', type=int, default=5,
+                        help='Size of a writer queue smaller than a batch.')
+    parser.add_argument('--latency', type=float, default=5,
+                        help='Milliseconds added to every SQL statement.')
+    parser.add_argument('--rate', type=float, default=100,
+                        help='Items scraped per second.')
+    parser.add_argument('--directory', default='.',
+                        help='Where to create databases (fsync matters).')
+    args = parser.parse_args()
+
+    # BENCHMARK RUN (within the twisted reactor)
+    task.react(main, [args])
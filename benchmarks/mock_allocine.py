@@ -0,0 +1,289 @@
+import argparse, json, os, random, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+# SYNTHETIC VOCABULARIES (used to build allocine-like pages)
+GENRES = ['Action', 'Animation', 'Aventure', 'Biopic', 'Comédie',
+          'Comédie dramatique', 'Drame', 'Epouvante-horreur', 'Thriller']
+COUNTRIES = ['France', 'U.S.A.', 'Italie', 'Royaume-Uni', 'Japon']
+MONTHS = ['janvier', 'février', 'mars', 'avril', 'mai', 'juin', 'juillet',
+          'août', 'septembre', 'octobre', 'novembre', 'décembre']
+
+# PAGE TEMPLATES
+LISTING = """<html><body>
+<ul data-name="Par genre">{genres}</ul>
+<ul data-name="Par pays">{countries}</ul>
+<ul>{movies}</ul>
+<nav class="pagination cf"><div class="pagination-item-holder">{pages}</div></nav>
+</body></html>"""
+
+MOVIE = """<html><head>
+<script type="application/ld+json">{jsonld}</script>
+</head><body>
+<div class="titlebar"><h1>{title}</h1></div>
+<div class="card entity-card entity-card-list cf">
+  <figure class="thumbnail"><img class="thumbnail-img" src="{poster}" alt="{title}"></figure>
+  <div class="meta-body">
+    <div class="meta-body-item meta-body-info">
+      <span class="date">{date}</span> en salle <span class="spacer">|</span>
+      {runtime} <span class="spacer">|</span> {genres}
+    </div>
+    <div class="meta-body-item meta-body-direction meta-body-oneline">
+      <span class="light">De</span> <span class="dark-grey-link">{director}</span>
+      <span class="light">Par</span> <span class="dark-grey-link">{writer}</span>
+    </div>
+    <div class="meta-body-item"><span class="light">Titre original</span>
+      <span class="dark-grey">{title} (VO)</span></div>
+  </div>
+  <div class="rating-holder">
+    <div class="rating-item"><span class="rating-title">Presse</span>
+      <span class="stareval-note">{press}</span></div>
+    <div class="rating-item"><span class="rating-title">Spectateurs</span>
+      <span class="stareval-note">{public}</span></div>
+  </div>
+</div>
+<section id="synopsis-details" class="section ovw">
+  <div class="content-txt"><p class="bo-p">{synopsis}</p></div>
+</section>
+<section class="section ovw ovw-technical">
+  <div class="item"><span class="what light">Nationalité</span>
+    <span class="that"><span class="nationality">{country}</span></span></div>
+  <div class="item"><span class="what light">Distributeur</span>
+    <span class="that">{distributor}</span></div>
+  <div class="item"><span class="what light">Récompenses</span>
+    <span class="that">{awards} nominations</span></div>
+  <div class="item"><span class="what light">Année de production</span>
+    <span class="that">{year}</span></div>
+  <div class="item"><span class="what light">Budget</span>
+    <span class="that">{budget}</span></div>
+  <div class="item"><span class="what light">Langues</span>
+    <span class="that">Français, Anglais</span></div>
+  <div class="item"><span class="what light">Couleur</span>
+    <span class="that">Couleur</span></div>
+  <div class="item"><span class="what light">Type de film</span>
+    <span class="that">Long-métrage</span></div>
+  <div class="item"><span class="what light">N° de Visa</span>
+    <span class="that">{visa}</span></div>
+</section>
+</body></html>"""
+
+CASTING = """<html><body>
+<section class="section casting-actor">
+<div class="gd gd-gap-20 gd-xs-2 gd-s-4">{cards}</div>
+{rows}
+</section>
+</body></html>"""
+
+CARD = """<div class="card person-card person-card-col"><div class="meta">
+<div class="meta-title"><a class="meta-title-link" href="/personne/{pid}.html">{name}</a></div>
+<div class="meta-sub light">{role}</div></div></div>"""
+
+ROW = """<div class="md-table-row"><span class="item link">{name}</span>
+<span class="item light">{role}</span></div>"""
+
+
+# PAGE BUILDERS (deterministic for a given movie id)
+def person(seed: int):
+    """Returns a deterministic fake person name."""
+
+    # NAME BUILDING (letters only, as digits would be dropped on cleaning)
+    first = ['Jodie', 'Austin', 'Tom', 'Adèle', 'Pierre', 'Léa', 'Omar']
+    last = ['Comer', 'Butler', 'Hardy', 'Simphal', 'Niney', 'Seydoux', 'Sy']
+    suffix = ''.join(chr(97 + int(digit)) for digit in str(seed))
+    return f'{first[seed % len(first)]} {last[(seed // 7) % len(last)]}{suffix}'
+
+def listing_page(page: int, last: int, per_page: int):
+    """Returns the html of one listing page (i.e. `/films/?page=<page>`)."""
+
+    # BUILDING MOVIE LINKS AND PAGINATION
+    first_id = 1000 + (page - 1) * per_page
+    movies = ''.join(f'<li class="mdl"><h2><a href="/film/fichefilm_gen_cfilm='
+                     f'{movie_id}.html">Film {movie_id}</a></h2></li>'
+                     for movie_id in range(first_id, first_id + per_page))
+    pages = ''.join(f'<span class="item{" current" if n == page else ""}">'
+                    f'{n}</span>' for n in sorted({1, page, last}))
+
+    # FUNCTION OUTPUT
+    return LISTING.format(
+        genres=''.join(f'<li><a>{genre}</a></li>' for genre in GENRES),
+        countries=''.join(f'<li><a>{country}</a></li>' for country in COUNTRIES),
+        movies=movies,
+        pages=pages)
+
+def movie_page(movie_id: int):
+    """Returns the html of one movie page."""
+
+    # BASIC SETTINGS & INITIALIZATION (pseudo random but reproducible data)
+    rng = random.Random(movie_id)
+    genres = rng.sample(GENRES, 2)
+    day, month = rng.randint(1, 28), rng.randint(1, 12)
+    year = rng.randint(1950, 2024)
+    hours, minutes = rng.randint(1, 3), rng.randint(1, 59)
+    title = f'Film {movie_id}'
+
+    # EMBEDDED JSON-LD (the same data as the one displayed on the page)
+    jsonld = {'@context': 'http://schema.org', '@type': 'Movie',
+              'name': title, 'genre': genres,
+              'datePublished': f'{year}-{month:02d}-{day:02d}',
+              'duration': f'PT{hours}H{minutes}M',
+              'director': {'@type': 'Person', 'name': person(movie_id)}}
+
+    # FUNCTION OUTPUT
+    return MOVIE.format(
+        jsonld=json.dumps(jsonld, ensure_ascii=False),
+        title=title,
+        poster=f'https://fr.web.img6.acsta.net/pictures/{movie_id}.jpg',
+        date=f'{day} {MONTHS[month - 1]} {year}',
+        runtime=f'{hours}h {minutes:02d}min',
+        genres=', '.join(f'<span>{genre}</span>' for genre in genres),
+        director=person(movie_id),
+        writer=person(movie_id + 1),
+        press=f'{rng.randint(1, 4)},{rng.randint(0, 9)}',
+        public=f'{rng.randint(1, 4)},{rng.randint(0, 9)}',
+        synopsis='Une histoire, inventée pour les tests, sur 3,5 lignes. ' * 5,
+        country=rng.choice(COUNTRIES),
+        distributor=f'Distributeur {movie_id % 50}',
+        awards=rng.randint(0, 9),
+        year=rng.randint(1950, 2024),
+        budget='-',
+        visa=movie_id * 7)
+
+def casting_page(movie_id: int, actors: int):
+    """Returns the html of one movie casting page."""
+
+    # MAIN ACTORS ARE SHOWN AS CARDS, OTHER ONES AS TABLE ROWS
+    people = [(person(movie_id * 100 + n), f'Rôle : {person(n)}')
+              for n in range(actors)]
+    cards = ''.join(CARD.format(pid=n, name=name, role=role)
+                    for n, (name, role) in enumerate(people[:8]))
+    rows = ''.join(ROW.format(name=name, role=role)
+                   for name, role in people[8:])
+
+    # FUNCTION OUTPUT
+    return CASTING.format(cards=cards, rows=rows)
+
+
+def save_fixtures(directory: str, count: int = 100, actors: int = 20):
+    """
+    Saves `count` movie pages and their casting page as html files.
+
+    Files are named `<movie id>.html` and `<movie id>_casting.html`. Returns
+    the list of saved movie page paths.
+
+    Parameter(s):
+        directory (str): Directory where to save the pages (must exist).
+        count     (int): Number of movies.
+        actors    (int): Number of actors per casting page.
+    """
+
+    # SAVING PROCESS
+    paths = []
+    for movie_id in range(1000, 1000 + count):
+        paths.append(os.path.join(directory, f'{movie_id}.html'))
+        with open(paths[-1], 'w', encoding='utf-8') as file:
+            file.write(movie_page(movie_id))
+        casting = os.path.join(directory, f'{movie_id}_casting.html')
+        with open(casting, 'w', encoding='utf-8') as file:
+            file.write(casting_page(movie_id, actors))
+
+    # FUNCTION OUTPUT
+    return paths
+
+
+# MOCK HTTP SERVER
+class MockAllocineHandler(BaseHTTPRequestHandler):
+    """
+    Serves synthetic allocine pages. Settings are class attributes.
+    """
+    pages = 10          # Number of listing pages
+    per_page = 15       # Number of movies per listing page
+    actors = 20         # Number of actors per casting page
+    latency = 0.05      # Seconds waited before answering any request
+    no_casting = 5      # One movie out of `no_casting` has no casting page
+    capacity = None     # Concurrent requests served beyond which `429` answers
+
+    def route(self):
+        """Returns a (status, html) tuple according the requested path."""
+
+        # BASIC SETTINGS & INITIALIZATION
+        url = urlsplit(self.path)
+        digits = ''.join(char for char in url.path if char.isdigit())
+
+        # ROUTING
+        if url.path.startswith('/films'):
+            page = int(parse_qs(url.query).get('page', ['1'])[0])
+            return 200, listing_page(page, self.pages, self.per_page)
+        if url.path.startswith('/film/fichefilm_gen'):
+            return 200, movie_page(int(digits))
+        if url.path.endswith('/casting/') and int(digits) % self.no_casting:
+            return 200, casting_page(int(digits), self.actors)
+        return 404, '<html><body>Not found</body></html>'
+
+    def answer(self, body: bool):
+        # SIMULATES AN OVERLOADED SERVER (requests beyond `capacity`)
+        server = type(self)
+        with server.lock:
+            server.in_flight += 1
+            overloaded = server.capacity and server.in_flight > server.capacity
+
+        # SIMULATES NETWORK AND SERVER LATENCY THEN ANSWERS
+        time.sleep(self.latency)
+        status, html = (429, 'Too many requests') if overloaded else self.route()
+        with server.lock:
+            server.in_flight -= 1
+        payload = html.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if body:
+            self.wfile.write(payload)
+
+    def do_GET(self):
+        self.answer(body=True)
+
+    def do_HEAD(self):
+        self.answer(body=False)
+
+    def log_message(self, format, *args):
+        pass # Keeps the benchmark output readable
+
+def serve(port: int = 0, **settings):
+    """
+    Starts the mock server in a daemon thread. Returns the server instance.
+
+    Parameter(s):
+        port       (int): Port to listen to. 0 lets the system choose one.
+        **settings      : Any `MockAllocineHandler` class attribute override.
+    """
+
+    # SERVER INSTANCIATION WITH ITS OWN HANDLER SETTINGS
+    settings.update(lock=threading.Lock(), in_flight=0)
+    handler = type('Handler', (MockAllocineHandler,), settings)
+    server_class = type('Server', (ThreadingHTTPServer,),
+                        {'request_queue_size': 256}) # Many connections
+    server = server_class(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+
+    # SERVING IN BACKGROUND
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    # COMMAND LINE INTERFACE (serves pages until interrupted)
+    parser = argparse.ArgumentParser(description='Mock allocine web server.')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--pages', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--capacity', type=int)
+    args = parser.parse_args()
+
+    server = serve(args.port, pages=args.pages, latency=args.latency,
+                   capacity=args.capacity)
+    print(f'Serving on http://127.0.0.1:{server.server_port}/films/')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
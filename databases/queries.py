@@ -1,7 +1,9 @@
 #import schema
-import dateparser, datetime
-from functools import wraps
+import datetime, regex as re
+from functools import lru_cache, wraps
 from Databases import schema
+from sqlalchemy import delete, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 
 # CREATING FUNCTION DECORATOR TO MANAGE SESSIONS
@@ -22,17 +24,18 @@ def manage_session(func):
             session = isinstance(kwargs.get('session'), Session)
 
         # CHECKING WHETHER A SESSION IS ACTIVE AND OPEN ONE IF NOT
+        # (the connection comes from the pool of the database, see `schema`)
         if not session:
             wrapper_inner_session = schema.db_connect()
             wrapper_inner_session = wrapper_inner_session()
             kwargs['session'] = wrapper_inner_session
 
-        # EXECUTION OF THE FUNCTION
-        wrapped_function = func(*args, **kwargs)
-
-        # CLOSING TEMPORARY SESSION
-        if not session:
-            wrapper_inner_session.close()
+        # EXECUTION OF THE FUNCTION (then the connection goes back to the pool)
+        try:
+            wrapped_function = func(*args, **kwargs)
+        finally:
+            if not session:
+                wrapper_inner_session.close()
 
         # WRAPPER OUTPUT
         return wrapped_function
@@ -40,6 +43,53 @@ def manage_session(func):
     # DECORATOR OUTPUT
     return wrapper
 
+# DATES PARSING (allocine dates are like '12 novembre 2023' or '2023/11/12')
+MONTHS = {'janvier': 1, 'janv': 1, 'février': 2, 'fevrier': 2, 'févr': 2,
+          'fevr': 2, 'mars': 3, 'avril': 4, 'avr': 4, 'mai': 5, 'juin': 6,
+          'juillet': 7, 'juil': 7, 'août': 8, 'aout': 8, 'septembre': 9,
+          'sept': 9, 'octobre': 10, 'oct': 10, 'novembre': 11, 'nov': 11,
+          'décembre': 12, 'decembre': 12, 'déc': 12, 'dec': 12}
+FRENCH_DATE = re.compile(r'(\d{1,2})(?:er)?\s*(\p{L}+)\.?\s*(\d{4})')
+NUMERIC_DATE = re.compile(r'(\d{4})[/-](\d{1,2})[/-](\d{1,2})')
+
+@lru_cache(maxsize=4096)
+def parse_date(date: str):
+    """
+    Parses a string representing a date and returns a `datetime.date` object.
+
+    Allocine dates (ex: '12 novembre 2023') and dates already formated (ex:
+    '2023/11/12') are parsed with a month lookup table. Any other string is
+    handed over to `dateparser` (much slower, as it detects the language).
+    Results are cached as the same release dates come again and again.
+
+    Parameter(s):
+        date (str): String representing a date otherwise None
+
+    Returns: A datetime.date object or simply None
+    """
+
+    # BASIC SETTINGS & INITIALIZATION
+    if not date:
+        return None
+    text = date.strip().lower()
+
+    # FAST PATH (allocine and numeric formats)
+    try:
+        if match := FRENCH_DATE.fullmatch(text):
+            day, month, year = match.groups()
+            if month in MONTHS:
+                return datetime.date(int(year), MONTHS[month], int(day))
+        elif match := NUMERIC_DATE.fullmatch(text):
+            year, month, day = (int(x) for x in match.groups())
+            return datetime.date(year, month, day)
+    except ValueError:
+        return None # Day out of month range (ex: '31 février 2023')
+
+    # SLOW PATH (any other format, `dateparser` is long to import)
+    import dateparser
+    date = dateparser.parse(date)
+    return date.date() if date else None
+
 # QUERIES SECTION
 @manage_session
 def get_movie_id(title, date=None, session=None, warns=True):
@@ -57,8 +107,7 @@ def get_movie_id(title, date=None, session=None, warns=True):
 
     # BASIC SETTINGS & INITIALIZATION (try to parse date if given as a string)
     if not isinstance(date, datetime.date):
-        date = dateparser.parse(date) if date else None
-        date = date.date() if date else None
+        date = parse_date(date)
 
     # WARNS USER WHEN DATE IS `BAD` (i.e. when `date` still is None)
     if warns and not isinstance(date, datetime.date):
@@ -73,6 +122,33 @@ def get_movie_id(title, date=None, session=None, warns=True):
     # FUNCTION OUTPUT
     return query[0]
 
+@manage_session
+def get_movies_id(titles, session=None):
+    """
+    Returns a dictionary with (title, release date) as keys and `Id` as values.
+
+    The lowest `Id` wins when several movies share a title and a date (i.e.
+    movies without release date), as `get_movie_id` would return it.
+
+    Parameter(s)
+        titles (tuple|list|set): French titles of the requested movies.
+        session      (Session): OPTIONAL. SQLAlchemy session to use. If one
+                                session is provided, then it is simply used
+                                but not closed. if no session is provided,
+                                then one is open and closed at the end.
+    """
+
+    # QUERYING THE DATABASE
+    query = (session
+             .query(schema.Movies.Id, schema.Movies.Title_Fr,
+                    schema.Movies.Release_Date)
+             .filter(schema.Movies.Title_Fr.in_(titles))
+             .order_by(schema.Movies.Id.desc())
+             .all())
+
+    # FUNCTION OUTPUT
+    return {(title, date): code_id for code_id, title, date in query}
+
 @manage_session
 def get_persons_id(names, session=None):
     """
@@ -127,6 +203,216 @@ def get_companies_id(names, session=None):
     # FUNCTION OUTPUT
     return {full_name: code_id for code_id, full_name in query}
 
+# WRITES SECTION
+# Modules building `INSERT ... ON CONFLICT` statements by database type
+UPSERTS = {'sqlite': sqlite, 'postgresql': postgresql}
+# Database types whose INSERT statements can skip existing rows (see below)
+IGNORES = (*UPSERTS, 'mysql', 'mariadb')
+
+def check_database(engine):
+    """
+    Raises a ValueError if rows cannot be saved into the given database.
+
+    Saving relies on INSERT statements skipping existing rows (see
+    `insert_ignore`), whose syntax depends on the database type: other types
+    are rejected once, before any write.
+
+    Parameter(s)
+        engine (Engine): SQLAlchemy engine of the database.
+    """
+
+    dialect = engine.dialect.name
+    if dialect not in IGNORES:
+        raise ValueError(f"Database type not supported: {dialect} "
+                         f"(supported: {', '.join(IGNORES)})")
+
+def insert_ignore(table, session):
+    """
+    Returns a bulk INSERT statement skipping rows already in the database.
+
+    Rows breaking a unique constraint (or the primary key) are skipped one by
+    one, so that a single statement can insert many rows (executed with a list
+    of dicts) whatever the rows already saved.
+
+    Parameter(s)
+        table  (MovieDB): Table (i.e. class of `schema`) to insert rows into.
+        session (Session): SQLAlchemy session the statement is executed with
+                           (on a database checked by `check_database`).
+    """
+
+    # BASIC SETTINGS & INITIALIZATION
+    dialect = session.get_bind().dialect.name
+
+    # FUNCTION OUTPUT (the syntax depends on the database type, see `IGNORES`)
+    if dialect in UPSERTS:
+        return UPSERTS[dialect].insert(table).on_conflict_do_nothing()
+    return insert(table).prefix_with('IGNORE')
+
+def returns(session):
+    """
+    Tells whether `INSERT ... ON CONFLICT ... RETURNING` can be used.
+
+    That is the case of postgreSQL and sqlite from version 3.35 onwards.
+    """
+
+    dialect = session.get_bind().dialect
+    return dialect.name in UPSERTS and dialect.insert_returning
+
+def upsert_names(table, names, session):
+    """
+    Saves names not saved yet and returns {name: `Id`} for all given names.
+
+    New names are saved and their `Id` returned by the very same statement
+    (`INSERT ... ON CONFLICT DO NOTHING ... RETURNING`). Names already saved
+    (i.e. not returned) are then queried, so that existing rows are never
+    written again. Databases without `RETURNING` get an INSERT skipping
+    existing names followed by a query of `Id`.
+
+    Parameter(s)
+        table  (MovieDB): Either `schema.Persons` or `schema.Companies`.
+        names     (set): Full names of people or companies.
+        session (Session): SQLAlchemy session to use (not commited).
+    """
+
+    # BASIC SETTINGS & INITIALIZATION
+    rows = [{'Full_Name': name} for name in names]
+    if not rows:
+        return {}
+
+    # BASIC SETTINGS & INITIALIZATION (names saved before, i.e. queried)
+    get_ids = lambda names: {full_name: code_id for code_id, full_name
+                             in (session
+                                 .query(table.Id, table.Full_Name)
+                                 .filter(table.Full_Name.in_(names)))}
+
+    # DATABASES WITHOUT `RETURNING` (two statements)
+    if not returns(session):
+        session.execute(insert_ignore(table, session), rows)
+        return get_ids(names)
+
+    # SAVING PROCESS (SQLAlchemy sends rows by many VALUES at once)
+    columns = table.__table__.c
+    statement = (UPSERTS[session.get_bind().dialect.name]
+                 .insert(table.__table__)
+                 .on_conflict_do_nothing(index_elements=[columns.Full_Name])
+                 .returning(columns.Id, columns.Full_Name))
+    saved = {name: code_id for code_id, name
+             in session.execute(statement, rows)}
+
+    # FUNCTION OUTPUT (names already saved are queried)
+    missing = [name for name in names if name not in saved]
+    return {**saved, **get_ids(missing)} if missing else saved
+
+def insert_movies(rows, session):
+    """
+    Saves movies not saved yet. Returns {(title, date): `Id`} of saved ones.
+
+    Movies already in the database (same french title and release date) are
+    skipped and missing from the output. Saved movies are returned by the
+    INSERT statement itself (`ON CONFLICT DO NOTHING ... RETURNING`) if the
+    database allows it, and queried otherwise.
+
+    Parameter(s)
+        rows   (list): Rows of the `movies` table (dicts, distinct movies).
+        session (Session): SQLAlchemy session to use (not commited).
+    """
+
+    # BASIC SETTINGS & INITIALIZATION
+    if not rows:
+        return {}
+
+    # DATABASES WITHOUT `RETURNING` (movies queried before and after)
+    if not returns(session):
+        titles = {row['Title_Fr'] for row in rows}
+        saved = get_movies_id(titles, session)
+        session.execute(insert_ignore(schema.Movies, session), rows)
+        return {key: movie_id for key, movie_id
+                in get_movies_id(titles, session).items() if key not in saved}
+
+    # SAVING PROCESS (SQLAlchemy sends rows by many VALUES at once)
+    table = schema.Movies.__table__
+    statement = (UPSERTS[session.get_bind().dialect.name]
+                 .insert(table)
+                 .on_conflict_do_nothing()
+                 .returning(table.c.Id, table.c.Title_Fr,
+                            table.c.Release_Date))
+
+    # FUNCTION OUTPUT
+    return {(title, date): movie_id for movie_id, title, date
+            in session.execute(statement, rows)}
+
+def upsert_movies(rows, session):
+    """
+    Saves movies, rows of movies already saved (same french title and release
+    date) being replaced. Returns {(title, date): `Id`} of all given movies.
+
+    Movies are saved and their `Id` returned by the very same statement
+    (`INSERT ... ON CONFLICT (Title_Fr, Release_Date) DO UPDATE ...
+    RETURNING`) if the database allows it. Otherwise, saved movies are
+    queried then updated by `Id` and new ones inserted. Movies without
+    release date never conflict (NULL dates are distinct), hence they are
+    always matched by title (the lowest `Id` wins, see `get_movies_id`).
+
+    Parameter(s)
+        rows   (list): Rows of the `movies` table (dicts, distinct movies).
+        session (Session): SQLAlchemy session to use (not commited).
+    """
+
+    # BASIC SETTINGS & INITIALIZATION
+    key = lambda row: (row['Title_Fr'], row['Release_Date'])
+    upserts = returns(session)
+    queried = [row for row in rows
+               if not upserts or row['Release_Date'] is None]
+
+    # MOVIES ALREADY SAVED UPDATED BY `Id` (only those without release date
+    # if the database allows `ON CONFLICT ... RETURNING`)
+    saved = get_movies_id({row['Title_Fr'] for row in queried}, session)
+    saved = {key(row): saved[key(row)] for row in queried
+             if key(row) in saved}
+    if saved:
+        session.execute(update(schema.Movies),
+                        [{**row, 'Id': saved[key(row)]} for row in rows
+                         if key(row) in saved])
+    rows = [row for row in rows if key(row) not in saved]
+
+    # DATABASES WITHOUT `RETURNING` (new movies inserted)
+    if not upserts:
+        return {**saved, **insert_movies(rows, session)}
+    elif not rows:
+        return saved
+
+    # SAVING PROCESS (every column but the natural key is replaced)
+    table = schema.Movies.__table__
+    statement = UPSERTS[session.get_bind().dialect.name].insert(table)
+    natural = ('Title_Fr', 'Release_Date')
+    statement = (statement
+                 .on_conflict_do_update(
+                     index_elements=[table.c[x] for x in natural],
+                     set_={x.name: statement.excluded[x.name]
+                           for x in table.c
+                           if x.name not in natural and not x.primary_key})
+                 .returning(table.c.Id, table.c.Title_Fr,
+                            table.c.Release_Date))
+
+    # FUNCTION OUTPUT
+    return {**saved, **{(title, date): movie_id for movie_id, title, date
+                        in session.execute(statement, rows)}}
+
+def delete_dependents(movie_ids, session):
+    """
+    Deletes the rows of dependent and association tables of given movies
+    (i.e. genres, countries, actors, etc.), so that they can be saved again.
+
+    Parameter(s)
+        movie_ids (list): `Id` of the movies.
+        session (Session): SQLAlchemy session to use (not commited).
+    """
+
+    for table in (schema.Genres, schema.Countries, schema.Languages,
+                  schema.Actors, schema.Directors, schema.ScreenWriters,
+                  schema.Distributors):
+        session.execute(delete(table).where(table.MovieId.in_(movie_ids)))
+
 # QUERIES TESTING
 # print(get_persons_id(['Alexandre De La Patellière',
 #                       'Pierfrancesco Favino',
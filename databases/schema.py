@@ -1,7 +1,18 @@
+import os, threading
 from sqlalchemy import create_engine, PrimaryKeyConstraint, UniqueConstraint
+from sqlalchemy.engine import make_url
 from sqlalchemy import Column, ForeignKey, Integer, String, Date, Numeric
 from sqlalchemy.orm import sessionmaker, declarative_base, relationship
 
+# ENGINES REGISTRY (one pool of connections per database, see `db_connect`)
+DEFAULT_URL = "sqlite:///./movies.db"
+POOL = {'pool_size': 5,          # Connections kept open
+        'pool_pre_ping': False,  # Tests connections on checkout (remote DB)
+        'pool_recycle': -1}      # Seconds before reconnecting (-1: never)
+SESSION_MAKERS = {}
+CREATED = set()
+LOCK = threading.RLock()
+
 # INSTANCIATING A DATABASE FRAMEWORK (i.e. a mix of container and base class) 
 MovieDB = declarative_base()
 
@@ -29,30 +40,92 @@ def foreign_key(target):
     # RETURNS A LIST TO BE USED AS ARGUMENT IN ANY `Column` METHOD CALL
     return [target_column.type, ForeignKey(target)]
 
-def db_connect(url: str = "sqlite:///./movies.db", **kwargs):
+def db_connect(url: str = DEFAULT_URL, create: bool = True, **kwargs):
     """
-    Creates or updates the database schema then returns access to it.
+    Returns access to a database, its schema being created or updated once.
 
-    The database itself is never overwritten but only udpdated or created when
-    not already in place. The same for the tables inside the database.
+    Engines (i.e. pools of connections) are created once per database and
+    per options then shared by the whole process: sessions given by the same
+    `sessionmaker` reuse the connections of the pool instead of opening new
+    ones. The database itself is never overwritten but only udpdated or
+    created when not already in place. The same for the tables inside it.
 
     Parameter(s):
-        url (str): url to connect the choosen database.
-                   By default: "sqlite:///../movies.db"
-        **kwargs : Additional arguments to be passed to `create_engine` method.
-                   For any details about the said method, see SQLAlchemy doc.
+        url     (str): url to connect the choosen database.
+                       By default: "sqlite:///./movies.db"
+        create (bool): Whether to create the schema (see `create_schema`).
+        **kwargs     : Additional arguments to be passed to `create_engine`
+                       method, over the pooling defaults (see `POOL`). For any
+                       details about the said method, see SQLAlchemy doc.
 
     Returns:
         A SQLAlchemy `sessionmaker` object to be instanciated into sessions.
     """
+    # BASIC SETTINGS & INITIALIZATION (same database, same engine & options)
+    url = get_url(url)
+    options = {**POOL, **kwargs}
+    key = (url, repr(sorted(options.items())))
+
     # SET THE DB TYPE (sqlite, PostgreSQL, etc.) AND AN ENGINE (i.e. connector)
-    engine = create_engine(url, **kwargs)
+    with LOCK:
+        if key not in SESSION_MAKERS:
+            engine = create_engine(url, **options)
+            SESSION_MAKERS[key] = sessionmaker(bind=engine)
+        session_maker = SESSION_MAKERS[key]
 
     # CREATES THE REQUIRED DATABASE (according data given into `url`)
-    MovieDB.metadata.create_all(engine)
+    if create:
+        create_schema(session_maker.kw['bind'])
 
     # FUNCTION OUTPUT (returns a `sessionmaker` object to help DB interactions)
-    return sessionmaker(bind=engine)
+    return session_maker
+
+def create_schema(engine):
+    """
+    Creates the missing tables of a database (once per database and process).
+
+    Parameter(s):
+        engine (Engine): SQLAlchemy engine of the database.
+    """
+
+    with LOCK:
+        if engine not in CREATED:
+            MovieDB.metadata.create_all(engine)
+            CREATED.add(engine)
+
+def get_url(url: str):
+    """
+    Returns the url of a database as a string, SQLite paths made absolute.
+
+    Relative paths depend on the current directory: the same url may not be
+    the same database (i.e. the same engine) from one call to another.
+
+    Parameter(s):
+        url (str): url of the database (ex: "sqlite:///./movies.db").
+    """
+
+    url = make_url(url)
+    if (url.get_backend_name() == 'sqlite' and url.database
+            and url.database != ':memory:'
+            and not url.database.startswith('file:')):
+        url = url.set(database=os.path.abspath(url.database))
+    return url.render_as_string(hide_password=False)
+
+def dispose(url: str = None):
+    """
+    Closes the pooled connections of a database (all if no url) then forgets
+    its engines, the next `db_connect` creating them again.
+
+    Parameter(s):
+        url (str): url of the database. OPTIONAL.
+    """
+
+    with LOCK:
+        target = url and get_url(url)
+        for key in [x for x in SESSION_MAKERS if target in (None, x[0])]:
+            engine = SESSION_MAKERS.pop(key).kw['bind']
+            engine.dispose()
+            CREATED.discard(engine)
 
 # CREATING TABLES OF THE DATABASE
 class Movies(MovieDB):